@@ -1,25 +1,109 @@
 import random
+from collections import deque
 from typing import List, Tuple, Optional, Set
 from enum import Enum
 
+from app.core.bitboard import CELL_COUNT, cell_index, cell_position, iter_bits
+from app.core.endgame import EndgameSolver
+from app.core.monte_carlo import FleetSampler
+from app.core.probability import PlacementDensity
+
 class AIDifficulty(Enum):
     EASY = "easy"
     MEDIUM = "medium"
     HARD = "hard"
     EXPERT = "expert"  # เพิ่มระดับ Expert
+    MONTE_CARLO = "monte_carlo"  # สุ่มจำลองกองเรือภายในงบเวลาที่กำหนด
+
+# ช่องลายหมากรุก (row + col คู่) เรียงตามแถว คำนวณครั้งเดียวต่อ process
+PARITY_CELLS = tuple((row, col) for row in range(10) for col in range(10) if (row + col) % 2 == 0)
+# กองเรือมาตรฐาน ใช้ tuple เดียวกันทุก AI ที่ไม่ได้ระบุ ship_sizes
+DEFAULT_SHIP_SIZES = (5, 4, 3, 3, 2, 2)
+# ลำดับเริ่มต้นของช่องที่ยังไม่ยิง (copy เป็น bytearray ต่อ AI)
+_ALL_CELLS = bytes(range(CELL_COUNT))
 
 class AIOpponent:
-    def __init__(self, difficulty: AIDifficulty = AIDifficulty.MEDIUM):
+    # งบเวลา (วินาที) และจำนวน sample สูงสุดต่อการยิงหนึ่งครั้งของ Monte Carlo AI
+    # ops ปรับค่าเริ่มต้นได้ที่ class หรือส่งเข้า constructor ต่อเกม
+    monte_carlo_time_budget: Optional[float] = 0.005
+    monte_carlo_sample_budget: Optional[int] = 2000
+    # เมื่อเรือที่ยังไม่จมเหลือไม่เกินจำนวนนี้ expert/monte_carlo จะแจกแจงทุกตำแหน่งที่เป็นไปได้แบบ exact
+    # ค่าเริ่มต้น 0 = ปิด: solver ช้ากว่า placement count ปกติและไม่ได้ทำให้เกมสั้นลง ops เปิดเองได้
+    endgame_max_ships: int = 0
+
+    def __init__(self, difficulty: AIDifficulty = AIDifficulty.MEDIUM, ship_sizes: Optional[List[int]] = None,
+                 time_budget: Optional[float] = None, sample_budget: Optional[int] = None):
         self.difficulty = difficulty
         self.last_hit = None
-        self.target_queue = []  # For tracking hits in medium/hard mode
-        self.shot_history = set()  # Track all shots taken
+        self.target_queue = deque()  # For tracking hits in medium/hard mode
+        self.queued_mask = 0  # Bitmask of cells in target_queue (no duplicates)
+        self.shot_mask = 0  # Bitmask of all shots taken
         self.hunt_mode = False  # For hard mode
-        self.hunt_targets = []  # Potential targets in hunt mode
-        self.hit_sequence = []  # Track sequence of hits for ship direction detection
-        self.probable_ship_positions = set()  # For expert mode
-        self.ship_sizes = [5, 4, 3, 3, 2, 2]  # Standard battleship ship sizes
+        self.hunt_targets = deque()  # Potential targets in hunt mode
+        self.hit_sequence = []  # Cell indices of hits, for ship direction detection
+        sizes = tuple(ship_sizes) if ship_sizes else DEFAULT_SHIP_SIZES
+        self.ship_sizes = DEFAULT_SHIP_SIZES if sizes == DEFAULT_SHIP_SIZES else sizes  # Standard battleship ship sizes
+        self.time_budget = time_budget if time_budget is not None else self.monte_carlo_time_budget
+        self.sample_budget = sample_budget if sample_budget is not None else self.monte_carlo_sample_budget
+        self.density = self._new_density()
+        self._reset_shot_pool()
         
+    def _reset_shot_pool(self) -> None:
+        """Unshot cell indices + position of each cell in that pool, so random picks and removals are O(1)"""
+        self.unshot_cells = bytearray(_ALL_CELLS)
+        self.unshot_index = bytearray(_ALL_CELLS)
+        self.parity_cursor = 0  # Next candidate in PARITY_CELLS
+    
+    @property
+    def shot_history(self) -> Set[Tuple[int, int]]:
+        """Every shot taken as (row, col)"""
+        return {cell_position(cell) for cell in iter_bits(self.shot_mask)}
+    
+    def _was_shot(self, cell: Tuple[int, int]) -> bool:
+        return bool(self.shot_mask >> cell_index(*cell) & 1)
+    
+    def _mark_shot(self, cell: Tuple[int, int]) -> None:
+        """Record a shot: set its bit and swap-remove it from the unshot pool"""
+        index = cell_index(*cell)
+        if self.shot_mask >> index & 1:
+            return
+        self.shot_mask |= 1 << index
+        position = self.unshot_index[index]
+        last = self.unshot_cells.pop()
+        if position < len(self.unshot_cells):
+            self.unshot_cells[position] = last
+            self.unshot_index[last] = position
+    
+    def _push_target(self, cell: Tuple[int, int], front: bool = False) -> None:
+        """Queue a follow-up target unless it was already shot or queued"""
+        bit = 1 << cell_index(*cell)
+        if (self.shot_mask | self.queued_mask) & bit:
+            return
+        self.queued_mask |= bit
+        if front:
+            self.target_queue.appendleft(cell)
+        else:
+            self.target_queue.append(cell)
+    
+    def _pop_target(self) -> Optional[Tuple[int, int]]:
+        """Pop the next queued target that has not been shot yet"""
+        while self.target_queue:
+            cell = self.target_queue.popleft()
+            self.queued_mask &= ~(1 << cell_index(*cell))
+            if not self._was_shot(cell):
+                return cell
+        return None
+    
+    def _clear_targets(self) -> None:
+        self.target_queue.clear()
+        self.queued_mask = 0
+    
+    def _new_density(self) -> Optional[PlacementDensity]:
+        """Expert and Monte Carlo modes keep an exact placement-count map of the opponent board"""
+        if self.difficulty in (AIDifficulty.EXPERT, AIDifficulty.MONTE_CARLO):
+            return PlacementDensity(self.ship_sizes)
+        return None
+
     def get_next_shot(self, board_size: int = 10) -> Tuple[int, int]:
         """Get the next shot position based on AI difficulty"""
         if self.difficulty == AIDifficulty.EASY:
@@ -28,26 +112,24 @@ class AIOpponent:
             return self._get_medium_shot(board_size)
         elif self.difficulty == AIDifficulty.HARD:
             return self._get_hard_shot(board_size)
+        elif self.difficulty == AIDifficulty.MONTE_CARLO:
+            return self._get_monte_carlo_shot(board_size)
         else:  # EXPERT
             return self._get_expert_shot(board_size)
     
     def _get_random_shot(self, board_size: int) -> Tuple[int, int]:
         """Easy mode: completely random shots"""
-        while True:
-            row = random.randint(0, board_size - 1)
-            col = random.randint(0, board_size - 1)
-            if (row, col) not in self.shot_history:
-                self.shot_history.add((row, col))
-                return row, col
+        shot = cell_position(self.unshot_cells[random.randrange(len(self.unshot_cells))])
+        self._mark_shot(shot)
+        return shot
     
     def _get_medium_shot(self, board_size: int) -> Tuple[int, int]:
         """Medium mode: random + target tracking after hits"""
         # If we have targets to follow up on, prioritize them
-        if self.target_queue:
-            row, col = self.target_queue.pop(0)
-            if (row, col) not in self.shot_history:
-                self.shot_history.add((row, col))
-                return row, col
+        target = self._pop_target()
+        if target:
+            self._mark_shot(target)
+            return target
         
         # Otherwise, random shot
         return self._get_random_shot(board_size)
@@ -55,58 +137,91 @@ class AIOpponent:
     def _get_hard_shot(self, board_size: int) -> Tuple[int, int]:
         """Hard mode: checkerboard pattern + smart targeting"""
         # If we have specific targets, prioritize them
-        if self.target_queue:
-            row, col = self.target_queue.pop(0)
-            if (row, col) not in self.shot_history:
-                self.shot_history.add((row, col))
-                return row, col
+        target = self._pop_target()
+        if target:
+            self._mark_shot(target)
+            return target
         
         # If in hunt mode, use hunt targets
-        if self.hunt_mode and self.hunt_targets:
-            row, col = self.hunt_targets.pop(0)
-            if (row, col) not in self.shot_history:
-                self.shot_history.add((row, col))
-                return row, col
+        while self.hunt_mode and self.hunt_targets:
+            target = self.hunt_targets.popleft()
+            if not self._was_shot(target):
+                self._mark_shot(target)
+                return target
         
         # Use checkerboard pattern for efficient hunting
         shot = self._get_checkerboard_shot(board_size)
         if shot:
-            self.shot_history.add(shot)
+            self._mark_shot(shot)
             return shot
         
+        # Checkerboard exhausted: remaining cells at random
+        return self._get_random_shot(board_size)
+    
     def _get_expert_shot(self, board_size: int) -> Tuple[int, int]:
-        """Expert mode: Advanced probability-based targeting with ship size analysis"""
-        # If we have specific targets, prioritize them with intelligent ordering
-        if self.target_queue:
-            # Sort targets by probability (closer to known hits first)
-            self.target_queue.sort(key=lambda pos: self._calculate_target_priority(pos))
-            row, col = self.target_queue.pop(0)
-            if (row, col) not in self.shot_history:
-                self.shot_history.add((row, col))
-                return row, col
+        """Expert mode: exact placement counting over the remaining fleet"""
+        shot = self._get_endgame_shot()
+        if shot:
+            return shot
         
-        # Use probability density function for ship placement
+        # Shoot the cell covered by the most placements consistent with hits, misses and sunk ships
         best_shot = self._get_highest_probability_shot(board_size)
         if best_shot:
-            self.shot_history.add(best_shot)
+            self._mark_shot(best_shot)
             return best_shot
         
         # Fallback to checkerboard if probability analysis fails
         shot = self._get_checkerboard_shot(board_size)
         if shot:
-            self.shot_history.add(shot)
+            self._mark_shot(shot)
             return shot
         
         # Final fallback to random
         return self._get_random_shot(board_size)
     
+    def _get_monte_carlo_shot(self, board_size: int) -> Tuple[int, int]:
+        """Monte Carlo mode: sample whole fleets consistent with the board until the budget runs out"""
+        shot = self._get_endgame_shot()
+        if shot:
+            return shot
+        
+        cell = FleetSampler(self.density).best_cell(self.time_budget, self.sample_budget)
+        if cell is not None:
+            shot = cell_position(cell)
+            if not self._was_shot(shot):
+                self._mark_shot(shot)
+                return shot
+        
+        # No consistent sample within budget: use the exact placement counts
+        return self._get_expert_shot(board_size)
+    
+    def _get_endgame_shot(self) -> Optional[Tuple[int, int]]:
+        """Solve the endgame exactly once only a few ships are still afloat"""
+        if self.density is None:
+            return None
+        
+        ships_afloat = sum(self.density.remaining.values())
+        if not 0 < ships_afloat <= self.endgame_max_ships:
+            return None
+        
+        cell = EndgameSolver(self.density).best_cell()
+        if cell is None:
+            return None
+        
+        shot = cell_position(cell)
+        if self._was_shot(shot):
+            return None
+        self._mark_shot(shot)
+        return shot
+    
     def _calculate_target_priority(self, pos: Tuple[int, int]) -> float:
         """Calculate priority score for a target position"""
         row, col = pos
         priority = 0.0
         
         # Higher priority for positions adjacent to recent hits
-        for hit_row, hit_col in self.hit_sequence[-3:]:  # Consider last 3 hits
+        for hit in self.hit_sequence[-3:]:  # Consider last 3 hits
+            hit_row, hit_col = cell_position(hit)
             distance = abs(row - hit_row) + abs(col - hit_col)
             if distance == 1:
                 priority += 10.0
@@ -117,95 +232,48 @@ class AIOpponent:
     
     def _get_highest_probability_shot(self, board_size: int) -> Optional[Tuple[int, int]]:
         """Get shot with highest probability of hitting a ship"""
-        probability_map = [[0.0 for _ in range(board_size)] for _ in range(board_size)]
+        if self.density is None:
+            return None
         
-        # Calculate probability for each position
-        for row in range(board_size):
-            for col in range(board_size):
-                if (row, col) not in self.shot_history:
-                    probability_map[row][col] = self._calculate_position_probability(row, col, board_size)
-        
-        # Find position with highest probability
-        max_prob = 0.0
-        best_pos = None
-        
-        for row in range(board_size):
-            for col in range(board_size):
-                if probability_map[row][col] > max_prob:
-                    max_prob = probability_map[row][col]
-                    best_pos = (row, col)
+        cell = self.density.best_cell()
+        if cell is None:
+            return None
         
+        best_pos = cell_position(cell)
+        if self._was_shot(best_pos):
+            return None
         return best_pos
     
-    def _calculate_position_probability(self, row: int, col: int, board_size: int) -> float:
-        """Calculate probability that a ship occupies this position"""
-        if (row, col) in self.shot_history:
-            return 0.0
-        
-        probability = 0.0
-        
-        # Base probability for checkerboard pattern
-        if (row + col) % 2 == 0:
-            probability += 1.0
-        
-        # Bonus for positions that could complete ship patterns
-        for ship_size in self.ship_sizes:
-            # Check horizontal placement possibilities
-            for start_col in range(max(0, col - ship_size + 1), min(board_size - ship_size + 1, col + 1)):
-                if self._could_fit_ship_horizontal(row, start_col, ship_size, board_size):
-                    probability += 0.5
-            
-            # Check vertical placement possibilities
-            for start_row in range(max(0, row - ship_size + 1), min(board_size - ship_size + 1, row + 1)):
-                if self._could_fit_ship_vertical(start_row, col, ship_size, board_size):
-                    probability += 0.5
-        
-        return probability
-    
-    def _could_fit_ship_horizontal(self, row: int, start_col: int, ship_size: int, board_size: int) -> bool:
-        """Check if a ship could fit horizontally at this position"""
-        if start_col + ship_size > board_size:
-            return False
-        
-        for c in range(start_col, start_col + ship_size):
-            if (row, c) in self.shot_history:
-                # If we hit this position, it must be a hit (not a miss)
-                # This is a simplified check - in real implementation, we'd track hits vs misses
-                pass
-        
-        return True
-    
-    def _could_fit_ship_vertical(self, start_row: int, col: int, ship_size: int, board_size: int) -> bool:
-        """Check if a ship could fit vertically at this position"""
-        if start_row + ship_size > board_size:
-            return False
-        
-        for r in range(start_row, start_row + ship_size):
-            if (r, col) in self.shot_history:
-                # If we hit this position, it must be a hit (not a miss)
-                # This is a simplified check - in real implementation, we'd track hits vs misses
-                pass
-        
-        return True
-    
     def _get_checkerboard_shot(self, board_size: int) -> Optional[Tuple[int, int]]:
         """Get next shot using checkerboard pattern (most efficient for ship hunting)"""
-        for row in range(board_size):
-            for col in range(board_size):
-                # Checkerboard pattern: (row + col) % 2 == 0
-                if (row + col) % 2 == 0 and (row, col) not in self.shot_history:
-                    return row, col
+        # The cursor only moves forward, so the whole game costs one pass over PARITY_CELLS
+        while self.parity_cursor < len(PARITY_CELLS):
+            cell = PARITY_CELLS[self.parity_cursor]
+            if not self._was_shot(cell):
+                return cell
+            self.parity_cursor += 1
         return None
     
-    def notify_shot_result(self, row: int, col: int, hit: bool, ship_sunk: bool = False):
+    def notify_shot_result(self, row: int, col: int, hit: bool, ship_sunk: bool = False,
+                           sunk_ship_size: Optional[int] = None):
         """Notify AI of shot result to update strategy"""
+        self._mark_shot((row, col))
+        if self.density is not None:
+            cell = cell_index(row, col)
+            if not hit:
+                self.density.record_miss(cell)
+            elif ship_sunk:
+                self.density.record_sunk(cell, sunk_ship_size)
+            else:
+                self.density.record_hit(cell)
+        
         if hit:
             self.last_hit = (row, col)
-            self.hit_sequence.append((row, col))
+            self.hit_sequence.append(cell_index(row, col))
             
             if ship_sunk:
                 # Ship sunk, clear targets and reset hunt mode
-                self.target_queue.clear()
+                self._clear_targets()
                 self.hunt_mode = False
                 self.hunt_targets.clear()
                 # Keep hit sequence for expert mode analysis
@@ -215,7 +283,7 @@ class AIOpponent:
                 # Hit but not sunk, add adjacent cells to target queue
                 self._add_adjacent_targets(row, col)
                 
-                if self.difficulty in [AIDifficulty.HARD, AIDifficulty.EXPERT]:
+                if self.difficulty in [AIDifficulty.HARD, AIDifficulty.EXPERT, AIDifficulty.MONTE_CARLO]:
                     self.hunt_mode = True
                     
                 # For expert mode, analyze hit patterns
@@ -223,7 +291,7 @@ class AIOpponent:
                     self._analyze_hit_pattern()
         else:
             # Miss - no special action needed for easy/medium
-            if self.difficulty in [AIDifficulty.HARD, AIDifficulty.EXPERT] and not self.target_queue:
+            if self.difficulty in [AIDifficulty.HARD, AIDifficulty.EXPERT, AIDifficulty.MONTE_CARLO] and not self.target_queue:
                 # If no immediate targets, continue hunt mode
                 self.hunt_mode = True
     
@@ -233,8 +301,8 @@ class AIOpponent:
             return
         
         # Check if last two hits form a line (horizontal or vertical)
-        last_hit = self.hit_sequence[-1]
-        prev_hit = self.hit_sequence[-2]
+        last_hit = cell_position(self.hit_sequence[-1])
+        prev_hit = cell_position(self.hit_sequence[-2])
         
         row_diff = last_hit[0] - prev_hit[0]
         col_diff = last_hit[1] - prev_hit[1]
@@ -247,9 +315,9 @@ class AIOpponent:
             prev_col = prev_hit[1] - direction
             
             if 0 <= next_col <= 9:
-                self.target_queue.insert(0, (last_hit[0], next_col))
+                self._push_target((last_hit[0], next_col), front=True)
             if 0 <= prev_col <= 9:
-                self.target_queue.append((prev_hit[0], prev_col))
+                self._push_target((prev_hit[0], prev_col))
                 
         elif col_diff == 0 and abs(row_diff) == 1:
             # Vertical line - add targets at both ends
@@ -258,9 +326,9 @@ class AIOpponent:
             prev_row = prev_hit[0] - direction
             
             if 0 <= next_row <= 9:
-                self.target_queue.insert(0, (next_row, last_hit[1]))
+                self._push_target((next_row, last_hit[1]), front=True)
             if 0 <= prev_row <= 9:
-                self.target_queue.append((prev_row, prev_hit[1]))
+                self._push_target((prev_row, prev_hit[1]))
     
     def _add_adjacent_targets(self, row: int, col: int, board_size: int = 10):
         """Add adjacent cells to target queue for follow-up shots"""
@@ -270,20 +338,18 @@ class AIOpponent:
             new_row, new_col = row + dr, col + dc
             if (0 <= new_row < board_size and 
                 0 <= new_col < board_size and 
-                (new_row, new_col) not in self.shot_history):
+                not self._was_shot((new_row, new_col))):
                 
                 # For expert mode, use smarter targeting
                 if self.difficulty == AIDifficulty.EXPERT:
                     # Prioritize based on hit pattern analysis
                     priority = self._calculate_target_priority((new_row, new_col))
-                    if priority > 5.0:  # High priority targets go first
-                        self.target_queue.insert(0, (new_row, new_col))
-                    else:
-                        self.target_queue.append((new_row, new_col))
+                    # High priority targets go first
+                    self._push_target((new_row, new_col), front=priority > 5.0)
                 elif self.difficulty == AIDifficulty.HARD:
-                    self.target_queue.insert(0, (new_row, new_col))
+                    self._push_target((new_row, new_col), front=True)
                 else:
-                    self.target_queue.append((new_row, new_col))
+                    self._push_target((new_row, new_col))
     
     def get_strategy_description(self) -> str:
         """Get current AI strategy description"""
@@ -301,20 +367,21 @@ class AIOpponent:
         
         predicted_moves = []
         temp_queue = self.target_queue.copy()
-        temp_history = self.shot_history.copy()
+        temp_history = self.shot_mask
         
         for _ in range(min(num_moves, 10)):  # Limit to prevent infinite loops
             if temp_queue:
-                move = temp_queue.pop(0)
-                if move not in temp_history:
+                move = temp_queue.popleft()
+                bit = 1 << cell_index(*move)
+                if not temp_history & bit:
                     predicted_moves.append(move)
-                    temp_history.add(move)
+                    temp_history |= bit
             else:
                 # Use probability analysis for next move
                 best_shot = self._get_highest_probability_shot(10)
-                if best_shot and best_shot not in temp_history:
+                if best_shot and not temp_history >> cell_index(*best_shot) & 1:
                     predicted_moves.append(best_shot)
-                    temp_history.add(best_shot)
+                    temp_history |= 1 << cell_index(*best_shot)
                 else:
                     break
         
@@ -323,12 +390,13 @@ class AIOpponent:
     def reset(self):
         """Reset AI state for new game"""
         self.last_hit = None
-        self.target_queue.clear()
-        self.shot_history.clear()
+        self._clear_targets()
+        self.shot_mask = 0
         self.hunt_mode = False
         self.hunt_targets.clear()
         self.hit_sequence.clear()
-        self.probable_ship_positions.clear()
+        self.density = self._new_density()
+        self._reset_shot_pool()
     
     def get_difficulty_description(self) -> str:
         """Get human-readable description of AI difficulty"""
@@ -336,13 +404,14 @@ class AIOpponent:
             AIDifficulty.EASY: "Easy - Random shots only",
             AIDifficulty.MEDIUM: "Medium - Random shots with target tracking",
             AIDifficulty.HARD: "Hard - Strategic hunting with checkerboard pattern",
-            AIDifficulty.EXPERT: "Expert - Advanced probability analysis and pattern recognition"
+            AIDifficulty.EXPERT: "Expert - Exact ship placement probability analysis",
+            AIDifficulty.MONTE_CARLO: "Monte Carlo - Samples whole fleet layouts within a fixed think-time budget"
         }
         return descriptions[self.difficulty]
     
     def get_ai_stats(self) -> dict:
         """Get AI performance statistics"""
-        total_shots = len(self.shot_history)
+        total_shots = self.shot_mask.bit_count()
         hits = len(self.hit_sequence)
         
         return {
@@ -0,0 +1,209 @@
+"""Bitmask helpers for a 10x10 Battleship grid.
+
+A cell ``(row, col)`` maps to bit ``row * BOARD_SIZE + col`` of a plain Python
+int, so a set of cells (a ship, all hits, all misses) is a single integer and
+set operations become bitwise ``&``, ``|`` and ``~``.
+"""
+
+import random
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+BOARD_SIZE = 10
+CELL_COUNT = BOARD_SIZE * BOARD_SIZE
+FULL_MASK = (1 << CELL_COUNT) - 1
+
+
+def cell_index(row: int, col: int) -> int:
+    """Return the bit index of ``(row, col)``."""
+    return row * BOARD_SIZE + col
+
+
+def cell_bit(row: int, col: int) -> int:
+    """Return the single-bit mask of ``(row, col)``."""
+    return 1 << (row * BOARD_SIZE + col)
+
+
+def cell_position(index: int) -> Tuple[int, int]:
+    """Return ``(row, col)`` for a bit index."""
+    return divmod(index, BOARD_SIZE)
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the index of every set bit in ``mask`` (lowest first)."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_to_positions(mask: int) -> List[Tuple[int, int]]:
+    """Return the ``(row, col)`` tuples of every set bit in ``mask``."""
+    return [divmod(index, BOARD_SIZE) for index in iter_bits(mask)]
+
+
+def positions_to_mask(positions) -> int:
+    """Fold an iterable of ``(row, col)`` tuples into a mask."""
+    mask = 0
+    for row, col in positions:
+        mask |= 1 << (row * BOARD_SIZE + col)
+    return mask
+
+
+def ship_mask(start_row: int, start_col: int, size: int, direction: str) -> int:
+    """
+    Return the mask of a ship, or 0 if it does not fit on the board.
+
+    ``direction`` is ``'horizontal'``/``'H'`` or ``'vertical'``/``'V'``.
+    """
+    if start_row < 0 or start_col < 0:
+        return 0
+    if direction in ('horizontal', 'H'):
+        if start_row >= BOARD_SIZE or start_col + size > BOARD_SIZE:
+            return 0
+        return ((1 << size) - 1) << (start_row * BOARD_SIZE + start_col)
+
+    if start_col >= BOARD_SIZE or start_row + size > BOARD_SIZE:
+        return 0
+    mask = 0
+    index = start_row * BOARD_SIZE + start_col
+    for _ in range(size):
+        mask |= 1 << index
+        index += BOARD_SIZE
+    return mask
+
+
+class PlacementTable:
+    """
+    Every legal placement of one ship size on an empty board.
+
+    ``masks[i]`` is the cell mask of placement ``i`` and ``cover[cell]`` is a
+    bitset over placement indices: bit ``i`` is set when placement ``i``
+    covers ``cell``. ``by_position`` maps ``(start_row, start_col, 'H'|'V')``
+    to a placement index. Counting the placements through a cell that survive a
+    filter is then ``(cover[cell] & alive).bit_count()``.
+    """
+
+    __slots__ = ('size', 'masks', 'cells', 'cover', 'all_bits', 'by_position')
+
+    def __init__(self, size: int):
+        masks = []
+        by_position = {}
+        for row in range(BOARD_SIZE):
+            for col in range(BOARD_SIZE - size + 1):
+                by_position[(row, col, 'H')] = len(masks)
+                masks.append(ship_mask(row, col, size, 'H'))
+        if size > 1:
+            for row in range(BOARD_SIZE - size + 1):
+                for col in range(BOARD_SIZE):
+                    by_position[(row, col, 'V')] = len(masks)
+                    masks.append(ship_mask(row, col, size, 'V'))
+        elif size == 1:
+            # A one-cell ship looks the same either way round
+            for row in range(BOARD_SIZE):
+                for col in range(BOARD_SIZE):
+                    by_position[(row, col, 'V')] = by_position[(row, col, 'H')]
+
+        cover = [0] * CELL_COUNT
+        for index, mask in enumerate(masks):
+            for cell in iter_bits(mask):
+                cover[cell] |= 1 << index
+
+        self.size = size
+        self.masks = tuple(masks)
+        self.cells = tuple(tuple(iter_bits(mask)) for mask in masks)
+        self.cover = tuple(cover)
+        self.all_bits = (1 << len(masks)) - 1
+        self.by_position = by_position
+
+    def lookup(self, start_row: int, start_col: int, direction: str) -> Optional[int]:
+        """Return the placement index of a ship, or ``None`` if it does not fit on the board."""
+        return self.by_position.get((start_row, start_col, 'H' if direction in ('horizontal', 'H') else 'V'))
+
+    def blocked_by(self, mask: int) -> int:
+        """Return the placement bitset of every placement overlapping ``mask``."""
+        blocked = 0
+        cover = self.cover
+        for cell in iter_bits(mask):
+            blocked |= cover[cell]
+        return blocked
+
+
+@lru_cache(maxsize=None)
+def placement_table(size: int) -> PlacementTable:
+    """Return the (process-wide, cached) placement table for ``size``."""
+    return PlacementTable(size)
+
+
+# Whole-layout attempts before random_fleet gives up on a fleet that cannot fit
+_MAX_FLEET_ATTEMPTS = 10_000
+# Blind draws per ship before falling back to filtering the free placements
+_QUICK_DRAWS = 8
+
+
+def _fleet_by_candidates(sizes: List[int], order: List[int]) -> Optional[List[int]]:
+    """Place ships largest first, each on a random placement that is still free."""
+    masks = [0] * len(sizes)
+    occupied = 0
+    for position in order:
+        table = placement_table(sizes[position])
+        table_masks = table.masks
+        # A blind draw that lands on a free placement is a uniform pick among the free
+        # ones; only a crowded board pays for building the candidate bitset
+        for _ in range(_QUICK_DRAWS):
+            mask = table_masks[random.randrange(len(table_masks))]
+            if not mask & occupied:
+                break
+        else:
+            candidates = table.all_bits & ~table.blocked_by(occupied)
+            if not candidates:
+                return None
+            pick = random.randrange(candidates.bit_count())
+            for index in iter_bits(candidates):
+                if not pick:
+                    break
+                pick -= 1
+            mask = table_masks[index]
+        masks[position] = mask
+        occupied |= mask
+    return masks
+
+
+def _fleet_by_rejection(sizes: List[int], order: List[int]) -> Optional[List[int]]:
+    """Draw every ship uniformly and independently; reject the layout on the first overlap."""
+    masks = [0] * len(sizes)
+    occupied = 0
+    for position in order:
+        table_masks = placement_table(sizes[position]).masks
+        mask = table_masks[random.randrange(len(table_masks))]
+        if mask & occupied:
+            return None
+        masks[position] = mask
+        occupied |= mask
+    return masks
+
+
+def random_fleet(sizes: Iterable[int], uniform: bool = False) -> List[int]:
+    """
+    Return one random non-overlapping mask per ship size, in the order given.
+
+    The default draws each ship (largest first) straight from the placements
+    that are still free, so a layout costs one pass over the fleet. It is not
+    uniform over whole layouts: a ship placed early constrains the rest.
+    ``uniform=True`` instead draws every ship from its full placement table and
+    restarts on any overlap, which yields every layout with exactly the same
+    probability (about 3.5 tries on average for the standard fleet).
+
+    Raises:
+        ValueError: if the fleet cannot be laid out on the board
+    """
+    sizes = list(sizes)
+    if any(not placement_table(size).masks for size in sizes):
+        raise ValueError(f"ship sizes {sizes} do not fit on a {BOARD_SIZE}x{BOARD_SIZE} board")
+    order = sorted(range(len(sizes)), key=lambda position: -sizes[position])
+    attempt = _fleet_by_rejection if uniform else _fleet_by_candidates
+    for _ in range(_MAX_FLEET_ATTEMPTS):
+        masks = attempt(sizes, order)
+        if masks is not None:
+            return masks
+    raise ValueError(f"could not lay out ship sizes {sizes} on a {BOARD_SIZE}x{BOARD_SIZE} board")
@@ -0,0 +1,135 @@
+"""Exhaustive endgame solver used by the AI once only a few ships are afloat."""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+from app.core.bitboard import CELL_COUNT, FULL_MASK, iter_bits
+from app.core.probability import PlacementDensity
+
+
+class EndgameSolver:
+    """
+    Enumerates every joint placement of the remaining ships that fits the shots seen.
+
+    A joint placement is consistent when its ships do not overlap, none of them
+    covers a miss or a sunk ship, and together they cover every open hit. The
+    solver runs a DFS over the ships (largest first) on placement bitsets, prunes
+    branches that can no longer cover the open hits, memoizes sub-results on
+    ``(ship, occupied, uncovered)`` and only orders identical ships one way.
+    The per-cell occupancy over all consistent joint placements is the exact
+    hit probability (up to a common factor); with two or more ships it is only
+    filled in for unshot cells.
+    """
+
+    def __init__(self, density: PlacementDensity):
+        self.density = density
+        self.sizes = sorted(
+            (size for size, count in density.remaining.items() for _ in range(count)),
+            reverse=True,
+        )
+        self._memo: Dict[Tuple[int, int, int, int], Tuple[int, List[int]]] = {}
+
+    def _last_candidates(self, occupied: int, uncovered: int, floor: int) -> int:
+        """Placement bitset of the last ship: no overlap, and it covers every hit left over."""
+        table = self.density.tables[self.sizes[-1]]
+        candidates = self.density.alive(self.sizes[-1]) & ~table.blocked_by(occupied) & ~floor
+        for cell in iter_bits(uncovered):
+            candidates &= table.cover[cell]
+        return candidates
+
+    def _solve(self, depth: int, occupied: int, uncovered: int, floor: int) -> Tuple[int, List[int]]:
+        key = (depth, occupied, uncovered, floor)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+
+        density = self.density
+        size = self.sizes[depth]
+        table = density.tables[size]
+        candidates = density.alive(size) & ~table.blocked_by(occupied) & ~floor
+        room = sum(self.sizes[depth + 1:])
+        same_size_next = self.sizes[depth + 1] == size
+        pair_level = depth == len(self.sizes) - 2
+        total = 0
+        counts = [0] * CELL_COUNT
+        # Bit-sliced counter: bit j of planes[k] is bit k of how many joint
+        # placements use last-ship placement j, so the last ship costs a few
+        # big-int ops per placement of this ship instead of one per pair
+        planes: List[int] = []
+
+        for index in iter_bits(candidates):
+            mask = table.masks[index]
+            left = uncovered & ~mask
+            if left.bit_count() > room:
+                continue
+            next_floor = (1 << (index + 1)) - 1 if same_size_next else 0
+
+            if pair_level:
+                completions = self._last_candidates(occupied | mask, left, next_floor)
+                sub_total = completions.bit_count()
+                if not sub_total:
+                    continue
+                carry = completions
+                level = 0
+                while carry:
+                    if level == len(planes):
+                        planes.append(carry)
+                        break
+                    plane = planes[level]
+                    planes[level] = plane ^ carry
+                    carry &= plane
+                    level += 1
+            else:
+                sub_total, sub_counts = self._solve(depth + 1, occupied | mask, left, next_floor)
+                if not sub_total:
+                    continue
+                for cell, count in enumerate(sub_counts):
+                    if count:
+                        counts[cell] += count
+
+            total += sub_total
+            for cell in table.cells[index]:
+                counts[cell] += sub_total
+
+        if planes:
+            # Shot cells are never picked, so only unshot cells need the last ship's share
+            cover = density.tables[self.sizes[-1]].cover
+            reachable = 0
+            for plane in planes:
+                reachable |= plane
+            for cell in iter_bits(~density.shot_mask & FULL_MASK):
+                cell_cover = cover[cell]
+                if not cell_cover & reachable:
+                    continue
+                for level, plane in enumerate(planes):
+                    counts[cell] += (plane & cell_cover).bit_count() << level
+
+        result = (total, counts)
+        self._memo[key] = result
+        return result
+
+    def occupancy(self) -> Tuple[int, List[int]]:
+        """Return ``(number of consistent joint placements, per-cell occupancy)``."""
+        if not self.sizes:
+            return 0, [0] * CELL_COUNT
+        if len(self.sizes) == 1:
+            candidates = self._last_candidates(0, self.density.open_hits, 0)
+            counts = [0] * CELL_COUNT
+            cells = self.density.tables[self.sizes[0]].cells
+            for index in iter_bits(candidates):
+                for cell in cells[index]:
+                    counts[cell] += 1
+            return candidates.bit_count(), counts
+        return self._solve(0, 0, self.density.open_hits, 0)
+
+    def best_cell(self) -> Optional[int]:
+        """Return the unshot cell most likely to hold a ship, or ``None`` if nothing fits."""
+        total, counts = self.occupancy()
+        if not total:
+            return None
+        shot = self.density.shot_mask
+        best = max(count for cell, count in enumerate(counts) if not (shot >> cell) & 1)
+        if best <= 0:
+            return None
+        return random.choice([cell for cell, count in enumerate(counts)
+                              if count == best and not (shot >> cell) & 1])
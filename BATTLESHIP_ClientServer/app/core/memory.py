@@ -0,0 +1,84 @@
+"""
+Memory accounting for live game objects.
+
+``deep_sizeof`` walks an object graph (containers, ``__dict__`` and
+``__slots__``) and adds up ``sys.getsizeof`` of every object reached once.
+Objects shared by every game (classes, enums, cached placement tables,
+interned constants, small ints) are not the game's own memory, so they are
+skipped: anything reachable from ``shared_roots`` is left out of the total.
+"""
+
+import sys
+from array import array
+from collections import deque
+from enum import Enum
+from types import FunctionType, MappingProxyType, MethodType, ModuleType
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+_ATOMIC = (int, float, complex, str, bytes, bytearray, bool, type(None), array, range)
+_SKIP = (type, ModuleType, FunctionType, MethodType, Enum)
+
+
+def _referents(obj) -> Iterator:
+    if isinstance(obj, (dict, MappingProxyType)):
+        for key, value in obj.items():
+            yield key
+            yield value
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        yield from obj
+    elif not isinstance(obj, _ATOMIC):
+        attributes = getattr(obj, '__dict__', None)
+        if attributes is not None:
+            yield attributes
+        for klass in type(obj).__mro__:
+            for slot in getattr(klass, '__slots__', ()):
+                if hasattr(obj, slot):
+                    yield getattr(obj, slot)
+
+
+def _walk(obj, seen: Set[int]) -> int:
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIP):
+            continue
+        seen.add(id(item))
+        if isinstance(item, int) and -5 <= item <= 256:
+            continue  # cached by the interpreter
+        total += sys.getsizeof(item)
+        stack.extend(_referents(item))
+    return total
+
+
+def shared_ids(shared_roots: Iterable) -> Set[int]:
+    """
+    Ids of every object reachable from ``shared_roots``.
+
+    Ids are only meaningful while the objects live, so the caller must keep
+    the roots alive for as long as it uses the result.
+    """
+    seen: Set[int] = set()
+    for root in shared_roots:
+        _walk(root, seen)
+    return seen
+
+
+def deep_sizeof(obj, shared: Optional[Set[int]] = None) -> int:
+    """Bytes owned by ``obj``: every object it reaches, minus the ``shared`` ids."""
+    return _walk(obj, set(shared) if shared else set())
+
+
+def bytes_per_object(objects: Iterable, shared_roots: Iterable = (), sample: int = 100) -> Dict:
+    """Average ``deep_sizeof`` over up to ``sample`` of ``objects``."""
+    shared = shared_ids(shared_roots)
+    sizes = []
+    for obj in objects:
+        if len(sizes) >= sample:
+            break
+        sizes.append(deep_sizeof(obj, shared))
+    return {
+        'sampled': len(sizes),
+        'bytes_per_object': round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+        'max_bytes': max(sizes) if sizes else 0,
+    }
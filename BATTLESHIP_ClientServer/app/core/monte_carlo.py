@@ -0,0 +1,133 @@
+"""Anytime Monte Carlo fleet sampler for the MONTE_CARLO AI."""
+
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.bitboard import CELL_COUNT, iter_bits
+from app.core.probability import PlacementDensity
+
+# Re-check the clock every this many samples; perf_counter is not free
+_CLOCK_STRIDE = 8
+# Random draws per ship before a sample is abandoned
+_PLACEMENT_TRIES = 12
+# Without a time budget, give up after this many attempts per wanted sample
+_MAX_ATTEMPTS_PER_SAMPLE = 50
+
+
+class FleetSampler:
+    """
+    Samples complete layouts of the ships still afloat that agree with every shot seen.
+
+    Each sample first covers the open hits (hits on ships not sunk yet) with
+    placements through them, then drops the rest of the fleet on random alive
+    placements. A sample survives when no two ships overlap and every open hit
+    is covered. Sampling stops when the time budget or the sample budget runs
+    out, whichever comes first, so the caller always gets the best answer found
+    within its latency cap.
+    """
+
+    def __init__(self, density: PlacementDensity):
+        self.density = density
+
+    def _alive_placements(self) -> Dict[int, List[int]]:
+        density = self.density
+        placements = {}
+        for size, count in density.remaining.items():
+            if count:
+                masks = density.tables[size].masks
+                placements[size] = [masks[index] for index in iter_bits(density.alive(size))]
+        return placements
+
+    def _sample(self, sizes: List[int], alive: Dict[int, List[int]], open_hits: int) -> int:
+        """Return the occupied mask of one consistent layout, or 0 on rejection."""
+        density = self.density
+        unplaced = sizes[:]
+        random.shuffle(unplaced)
+        occupied = 0
+
+        uncovered = open_hits
+        while uncovered:
+            if not unplaced:
+                return 0
+            hit = (uncovered & -uncovered).bit_length() - 1
+            size = unplaced.pop()
+            table = density.tables[size]
+            through_hit = table.cover[hit] & density.alive(size)
+            choices = [table.masks[index] for index in iter_bits(through_hit)
+                       if not table.masks[index] & occupied]
+            if not choices:
+                return 0
+            mask = random.choice(choices)
+            occupied |= mask
+            uncovered &= ~mask
+
+        for size in unplaced:
+            candidates = alive[size]
+            for _ in range(_PLACEMENT_TRIES):
+                mask = random.choice(candidates)
+                if not mask & occupied:
+                    occupied |= mask
+                    break
+            else:
+                return 0
+        return occupied
+
+    def occupancy(self, time_budget: Optional[float], sample_budget: Optional[int]) -> Tuple[List[int], int]:
+        """
+        Count how often each cell is occupied across accepted samples.
+
+        Args:
+            time_budget: seconds to spend at most (None = no time limit)
+            sample_budget: accepted samples to collect at most (None = no limit)
+
+        Returns:
+            (per-cell counts, number of accepted samples)
+        """
+        counts = [0] * CELL_COUNT
+        alive = self._alive_placements()
+        sizes = [size for size, count in self.density.remaining.items() for _ in range(count)]
+        if not sizes or any(not placements for placements in alive.values()):
+            return counts, 0
+        if time_budget is None and sample_budget is None:
+            sample_budget = 1000
+
+        open_hits = self.density.open_hits
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        max_attempts = None if deadline is not None else sample_budget * _MAX_ATTEMPTS_PER_SAMPLE
+        accepted = 0
+        attempts = 0
+        while sample_budget is None or accepted < sample_budget:
+            attempts += 1
+            if deadline is not None:
+                if attempts % _CLOCK_STRIDE == 0 and time.perf_counter() >= deadline:
+                    break
+            elif attempts > max_attempts:
+                break
+            occupied = self._sample(sizes, alive, open_hits)
+            if not occupied:
+                continue
+            accepted += 1
+            for cell in iter_bits(occupied):
+                counts[cell] += 1
+        return counts, accepted
+
+    def best_cell(self, time_budget: Optional[float], sample_budget: Optional[int]) -> Optional[int]:
+        """Return the unshot cell occupied most often, or ``None`` if no sample was accepted."""
+        counts, accepted = self.occupancy(time_budget, sample_budget)
+        if not accepted:
+            return None
+        shot = self.density.shot_mask
+        best = 0
+        best_cells = []
+        for cell, count in enumerate(counts):
+            if count < best or (shot >> cell) & 1:
+                continue
+            if count > best:
+                best = count
+                best_cells = [cell]
+            else:
+                best_cells.append(cell)
+        if not best_cells or best == 0:
+            return None
+        return random.choice(best_cells)
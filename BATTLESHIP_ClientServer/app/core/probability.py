@@ -0,0 +1,165 @@
+"""Exact placement-enumeration probability map for the EXPERT AI."""
+
+import random
+from array import array
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from app.core.bitboard import CELL_COUNT, PlacementTable, iter_bits, placement_table
+
+
+@lru_cache(maxsize=None)
+def _initial_counts(fleet: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
+    """Per-cell placement counts on an empty board for a ``((size, count), ...)`` fleet."""
+    counts = [0] * CELL_COUNT
+    for size, count in fleet:
+        cover = placement_table(size).cover
+        for cell in range(CELL_COUNT):
+            counts[cell] += count * cover[cell].bit_count()
+    return tuple(counts)
+
+
+@lru_cache(maxsize=None)
+def _fleet_tables(sizes: Tuple[int, ...]) -> Mapping[int, PlacementTable]:
+    """Read-only ``{size: PlacementTable}`` shared by every density over the same ship sizes."""
+    return MappingProxyType({size: placement_table(size) for size in sizes})
+
+
+class PlacementDensity:
+    """
+    Counts, for every cell, the ship placements still consistent with the shots seen so far.
+
+    A placement of a ship still afloat is consistent when it covers no miss and
+    no cell of a sunk ship. While there are hits on ships that are not sunk yet
+    ("open" hits) only placements through those hits are counted, weighted by
+    how many open hits they explain, which turns the map into a target finder.
+
+    The hunt-mode map is kept live in ``counts``: a miss or a sunk ship only
+    subtracts the placements it rules out, so picking the next shot is an
+    argmax instead of a recount. Shot cells are pinned below zero.
+    """
+
+    def __init__(self, ship_sizes: Iterable[int]):
+        self.remaining = Counter(ship_sizes)
+        self.tables = _fleet_tables(tuple(sorted(self.remaining)))
+        self.miss_mask = 0
+        self.hit_mask = 0
+        self.sunk_mask = 0
+        # placement bitset (per size) of placements ruled out by misses and sunk ships
+        self.blocked = {size: 0 for size in self.tables}
+        # A cell is covered by at most 2 * size placements per ship and the fleet fits in
+        # 100 cells, so every count stays within +-200 and fits a 16-bit array
+        self.counts = array('h', _initial_counts(tuple(sorted(self.remaining.items()))))
+
+    def __getstate__(self):
+        # tables are the shared lru-cached placement tables: pickle only their sizes
+        state = dict(self.__dict__)
+        state['tables'] = tuple(self.tables)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.tables = _fleet_tables(state['tables'])
+
+    @property
+    def shot_mask(self) -> int:
+        return self.hit_mask | self.miss_mask
+
+    @property
+    def open_hits(self) -> int:
+        return self.hit_mask & ~self.sunk_mask
+
+    def alive(self, size: int) -> int:
+        """Placement bitset of every still-consistent placement of ``size``."""
+        return self.tables[size].all_bits & ~self.blocked[size]
+
+    def _rule_out(self, size: int, placements: int) -> None:
+        """Drop still-alive ``placements`` of ``size`` from the live counts."""
+        placements &= self.alive(size)
+        if not placements:
+            return
+        self.blocked[size] |= placements
+        weight = self.remaining[size]
+        if weight:
+            counts = self.counts
+            cells = self.tables[size].cells
+            for index in iter_bits(placements):
+                for cell in cells[index]:
+                    counts[cell] -= weight
+
+    def _mark_shot(self, cell: int) -> None:
+        self.counts[cell] = -1
+
+    def record_miss(self, cell: int) -> None:
+        self.miss_mask |= 1 << cell
+        for size, table in self.tables.items():
+            self._rule_out(size, table.cover[cell])
+        self._mark_shot(cell)
+
+    def record_hit(self, cell: int) -> None:
+        self.hit_mask |= 1 << cell
+        self._mark_shot(cell)
+
+    def record_sunk(self, cell: int, size: Optional[int] = None) -> int:
+        """Mark the ship through ``cell`` as sunk and return the cells it occupied."""
+        self.record_hit(cell)
+        mask = self._sunk_ship_mask(cell, size)
+        if size is None:
+            size = mask.bit_count()
+        if self.remaining[size] > 0:
+            # One ship of this size fewer: every alive placement of it counts once less
+            self.remaining[size] -= 1
+            counts = self.counts
+            cells = self.tables[size].cells
+            for index in iter_bits(self.alive(size)):
+                for ship_cell in cells[index]:
+                    counts[ship_cell] -= 1
+
+        self.sunk_mask |= mask
+        for table_size, table in self.tables.items():
+            self._rule_out(table_size, table.blocked_by(mask))
+        return mask
+
+    def _sunk_ship_mask(self, cell: int, size: Optional[int]) -> int:
+        """Find a straight run of open hits through ``cell`` that can be the sunk ship."""
+        open_hits = self.open_hits
+        sizes = [size] if size else sorted((s for s, n in self.remaining.items() if n), reverse=True)
+        for candidate_size in sizes:
+            table = self.tables.get(candidate_size) or placement_table(candidate_size)
+            for index in iter_bits(table.cover[cell]):
+                mask = table.masks[index]
+                if mask & open_hits == mask:
+                    return mask
+        return 1 << cell
+
+    def cell_scores(self) -> List[int]:
+        """Return the consistent-placement count of every cell (0 for shot cells)."""
+        scores = [0] * CELL_COUNT
+        shot = self.shot_mask
+        open_hits = self.open_hits
+
+        if open_hits:
+            for size, count in self.remaining.items():
+                if not count:
+                    continue
+                table = self.tables[size]
+                touching = self.alive(size) & table.blocked_by(open_hits)
+                for index in iter_bits(touching):
+                    mask = table.masks[index]
+                    weight = count * (mask & open_hits).bit_count()
+                    for cell in iter_bits(mask & ~shot):
+                        scores[cell] += weight
+            if any(scores):
+                return scores
+
+        return [count if count > 0 else 0 for count in self.counts]
+
+    def best_cell(self) -> Optional[int]:
+        """Return an unshot cell with the highest score, or ``None`` if nothing is consistent."""
+        scores = self.cell_scores() if self.open_hits else self.counts
+        best = max(scores)
+        if best <= 0:
+            return None
+        return random.choice([cell for cell, score in enumerate(scores) if score == best])
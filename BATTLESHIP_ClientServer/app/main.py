@@ -1,11 +1,42 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import json
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Literal, Optional, Union
+from app.responses import FastJSONResponse, encode_response, wants_msgpack
 from app.services.game_service import GameService
+from app.sharding import GAME_ID_HEADER, SHARD_AUTH_HEADER, internal_signature
 from app.core.utils import GameUtils
 
-app = FastAPI(title="Battleship Game API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background workers (pool, store sweeper, persistence, snapshots) and stop them on shutdown"""
+    if GameService.journal:
+        # โหลดเกมจาก snapshot + journal ก่อนรับ request แรก
+        GameService.journal.restore(GameService)
+        GameService.journal.start(GameService.games, GameService.locks)
+    GameService.pool.start()
+    GameService.games.start()
+    if GameService.persistence:
+        GameService.persistence.start()
+    try:
+        yield
+    finally:
+        GameService.pool.stop()
+        GameService.games.stop()
+        if GameService.persistence:
+            GameService.persistence.stop()
+        if GameService.journal:
+            await GameService.journal.stop(GameService.games, GameService.locks)
+
+app = FastAPI(title="Battleship Game API", version="1.0.0", default_response_class=FastJSONResponse,
+              lifespan=lifespan)
 
 # Enable CORS for all origins
 app.add_middleware(
@@ -16,13 +47,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ชื่อ shard เมื่อรันหลัง router ของ app.sharding (ไม่ตั้ง = server เดี่ยว)
+SHARD_NAME = os.getenv("BATTLESHIP_SHARD_NAME")
+
+# บีบอัด response ที่ใหญ่กว่า BATTLESHIP_GZIP_MIN_SIZE byte (เช่น ประวัติของเกมยาว ๆ)
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("BATTLESHIP_GZIP_MIN_SIZE", "1024")))
+
 class ShotRequest(BaseModel):
     position: str
 
 class CreateGameRequest(BaseModel):
     with_ai: bool = False
-    ai_difficulty: str = "medium"  # easy, medium, hard
+    ai_difficulty: str = "medium"  # easy, medium, hard, expert, monte_carlo
     custom_ships: Optional[list] = None
+    ai_delay: Optional[float] = None  # วินาทีที่ AI "คิด" ก่อนยิง (ค่าเริ่มต้นของ server ถ้าไม่ระบุ)
 
 class ShipPlacement(BaseModel):
     ship_name: str
@@ -33,55 +71,193 @@ class ShipPlacement(BaseModel):
 class ValidateShipsRequest(BaseModel):
     ship_placements: list[ShipPlacement]
 
+# board_format=compact: กระดานเป็น string 100 ตัวอักษร (O/H/M ทีละแถว) และตำแหน่งเรือเป็น index ของช่อง
+BoardFormat = Literal["grid", "compact"]
+BoardState = Union[List[List[str]], str]
+ShipsPositions = Optional[Dict[str, Union[List[List[int]], List[int]]]]
+
+# response model ใช้สำหรับเอกสาร OpenAPI: endpoint หลักสร้าง Response เองด้วย encode_response
+# (ไม่ผ่าน jsonable_encoder/validation ทุก request) tests ตรวจว่า response ตรงกับ model เสมอ
+class CreateGameResponse(BaseModel):
+    game_id: str
+    player_board_state: BoardState
+    ai_board_state: Optional[BoardState]
+    player_ships_positions: ShipsPositions
+    ai_ships_positions: ShipsPositions
+    has_ai: bool
+    ai_difficulty: Optional[str]
+    ai_delay: Optional[float]
+    current_turn: str
+    game_status: str
+
+class ShotResponse(BaseModel):
+    status: str
+    message: str
+    position: str
+    ship_sunk: bool
+    sunk_ship_name: Optional[str] = None
+    all_ships_sunk: bool
+    ships_remaining: List[str]
+    board_state: BoardState
+    current_turn: Optional[str]
+    game_status: str
+    target_type: Optional[str] = None
+    version: int
+
+class ShotEvent(BaseModel):
+    shot_number: int
+    timestamp: str
+    position: str
+    result: str
+    player: str
+    is_hit: bool
+    ship_sunk: bool
+    sunk_ship_name: Optional[str]
+
+class HistoryResponse(BaseModel):
+    game_id: str
+    shots: List[ShotEvent]
+    statistics: dict
+    since_shot: Optional[int] = None
+    next_shot: Optional[int] = None
+    has_more: Optional[bool] = None
+
+class GameStateResponse(BaseModel):
+    game_id: str
+    player_board_state: BoardState
+    player_ships_positions: ShipsPositions
+    ai_board_state: Optional[BoardState]
+    ai_ships_positions: ShipsPositions
+    player_ships_remaining: List[str]
+    ai_ships_remaining: List[str]
+    has_ai: bool
+    ai_difficulty: str
+    current_turn: Optional[str]
+    game_status: str
+    history: Optional[HistoryResponse] = None
+    debug_mode: bool
+    version: int
+
+class CellChange(BaseModel):
+    board: str
+    position: str
+    row: int
+    col: int
+    value: str
+
+class GameChangesResponse(BaseModel):
+    game_id: str
+    since_version: int
+    version: int
+    changes: List[CellChange]
+    events: List[ShotEvent]
+    player_ships_remaining: List[str]
+    ai_ships_remaining: List[str]
+    current_turn: Optional[str]
+    game_status: str
+
 @app.get("/")
 async def root():
     return {"message": "Battleship Game API"}
 
-@app.post("/games")
-async def create_game(request: CreateGameRequest = CreateGameRequest()):
+@app.post("/games", response_model=CreateGameResponse)
+async def create_game(http_request: Request, request: CreateGameRequest = CreateGameRequest(),
+                      board_format: BoardFormat = "grid"):
     """Create a new battleship game with optional AI opponent and difficulty"""
     try:
         # Validate AI difficulty
-        valid_difficulties = ["easy", "medium", "hard", "expert"]
+        valid_difficulties = ["easy", "medium", "hard", "expert", "monte_carlo"]
         if request.with_ai and request.ai_difficulty not in valid_difficulties:
             raise HTTPException(status_code=400, detail=f"Invalid AI difficulty. Must be one of: {valid_difficulties}")
+        if request.ai_delay is not None and not 0 <= request.ai_delay <= 10:
+            raise HTTPException(status_code=400, detail="ai_delay must be between 0 and 10 seconds")
         
         custom_ships = None
         if request.custom_ships:
             # แปลง custom_ships เป็น format ที่ backend ต้องการ
             custom_ships = [ship.dict() if hasattr(ship, 'dict') else ship for ship in request.custom_ships]
         
-        game_data = GameService.create_new_game(
+        game_data = await GameService.create_new_game_async(
             with_ai=request.with_ai,
             ai_difficulty=request.ai_difficulty,
-            custom_ships=custom_ships
+            custom_ships=custom_ships,
+            ai_delay=request.ai_delay,
+            compact=board_format == "compact",
+            # router เลือก id ที่ hash มาที่ shard นี้ให้ (เชื่อ header นี้เฉพาะตอนรันเป็น shard)
+            game_id=http_request.headers.get(GAME_ID_HEADER) if SHARD_NAME else None
         )
         
         if "error" in game_data:
             raise HTTPException(status_code=400, detail=game_data["error"])
         
-        return game_data
+        return encode_response(http_request, game_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/games/{game_id}")
-async def get_game_state(game_id: str, debug_mode: bool = False):
-    """Get the current state of a game"""
-    game_state = GameService.get_game_state(game_id, debug_mode=debug_mode)
+def game_etag(game_id: str, version: int, representation: str) -> str:
+    return f'"{game_id}.{version}.{representation}"'
+
+def game_representation(request: Request, debug_mode: bool, include_history: bool,
+                        since_version: Optional[int], board_format: str) -> str:
+    """ส่วนของ ETag ที่บอกรูปแบบ response (query ที่เปลี่ยนเนื้อหา + media type) แต่ละแบบจึงได้ ETag ของตัวเอง"""
+    if since_version is not None:
+        content = f"since{since_version}"
+    else:
+        content = f"{board_format}.h{int(include_history)}.d{int(debug_mode)}"
+    return f"{content}.{'msgpack' if wants_msgpack(request) else 'json'}"
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True ถ้า If-None-Match มี etag นี้ (รองรับหลายค่าคั่นด้วย comma, weak ETag และ *)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+@app.get("/games/{game_id}", response_model=Union[GameStateResponse, GameChangesResponse])
+async def get_game_state(
+    game_id: str,
+    request: Request,
+    debug_mode: bool = False,
+    include_history: bool = True,
+    since_version: Optional[int] = Query(None, ge=0),
+    board_format: BoardFormat = "grid",
+):
+    """
+    Get the current state of a game (include_history=false leaves out the shot history).
+
+    Responses carry an ETag of the game version and the representation (query parameters and
+    media type); If-None-Match with the current ETag returns 304. since_version returns only
+    the cells and shots that changed after that version.
+    """
+    version = await GameService.get_game_version_async(game_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    representation = game_representation(request, debug_mode, include_history, since_version, board_format)
+    if etag_matches(request, game_etag(game_id, version, representation)):
+        return Response(status_code=304, headers={"ETag": game_etag(game_id, version, representation),
+                                                  "Vary": "Accept"})
+
+    if since_version is not None:
+        game_state = await GameService.get_game_changes_async(game_id, since_version)
+    else:
+        game_state = await GameService.get_game_state_async(game_id, debug_mode=debug_mode,
+                                                            include_history=include_history,
+                                                            compact=board_format == "compact")
     if game_state is None:
         raise HTTPException(status_code=404, detail="Game not found")
-    return game_state
+    return encode_response(request, game_state, headers={"ETag": game_etag(game_id, game_state["version"], representation)})
 
 @app.get("/games/{game_id}/debug")
 async def get_game_state_debug(game_id: str):
     """Get the current state of a game with ship positions (for debug mode)"""
-    game_state = GameService.get_game_state_with_debug(game_id)
+    game_state = await GameService.get_game_state_with_debug_async(game_id)
     if game_state is None:
         raise HTTPException(status_code=404, detail="Game not found")
     return game_state
 
-@app.post("/games/{game_id}/fire")
-async def fire_shot(game_id: str, shot_request: ShotRequest):
+@app.post("/games/{game_id}/fire", response_model=ShotResponse)
+async def fire_shot(game_id: str, shot_request: ShotRequest, request: Request, board_format: BoardFormat = "grid"):
     """Fire a shot at the target board (AI's board if playing with AI)"""
     try:
         # Parse position (e.g., "A1" -> row=0, col=0)
@@ -89,46 +265,171 @@ async def fire_shot(game_id: str, shot_request: ShotRequest):
         row, col = GameUtils.parse_position(position)
 
         
-        result = GameService.take_shot(game_id, row, col)
+        result = await GameService.take_shot_async(game_id, row, col, compact=board_format == "compact")
         if result is None:
             raise HTTPException(status_code=404, detail="Game not found")
         
         if result.get('status') == 'error':
             raise HTTPException(status_code=400, detail=result.get('message', 'Unknown error'))
         
-        return result
+        return encode_response(request, result)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/games/{game_id}/ai-shot")
-async def ai_fire_shot(game_id: str):
+@app.post("/games/{game_id}/ai-shot", response_model=ShotResponse)
+async def ai_fire_shot(game_id: str, request: Request, board_format: BoardFormat = "grid"):
     """Let AI fire a shot at player's board"""
     try:
-        shot_result = GameService.ai_take_shot(game_id)
+        # รอเวลา "คิด" ของ AI แบบไม่ block event loop
+        wait = await GameService.get_ai_wait_async(game_id)
+        if wait:
+            await asyncio.sleep(wait)
+
+        shot_result = await GameService.ai_take_shot_async(game_id, compact=board_format == "compact")
         if shot_result is None:
             raise HTTPException(status_code=404, detail="Game not found")
         
         if shot_result.get('status') == 'error':
             raise HTTPException(status_code=400, detail=shot_result.get('message', 'Unknown error'))
         
-        return shot_result
+        return encode_response(request, shot_result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/games/{game_id}/history")
-async def get_game_history(game_id: str):
-    """Get game history"""
-    history = GameService.get_game_history(game_id)
+async def play_turn(game_id: str, position: str) -> list:
+    """ผู้เล่นยิง 1 นัด แล้วให้ AI ยิงตอบ (ถ้าถึงเทิร์น AI) คืน event ตามลำดับที่เกิด"""
+    try:
+        row, col = GameUtils.parse_position(position)
+    except ValueError as e:
+        return [{"type": "error", "message": str(e)}]
+
+    result = await GameService.take_shot_async(game_id, row, col)
+    if result is None:
+        return [{"type": "error", "message": "Game not found"}]
+    if result.get("status") == "error":
+        return [{"type": "error", **result}]
+    events = [GameService.shot_event("shot", result)]
+
+    if result["current_turn"] == "ai":
+        wait = await GameService.get_ai_wait_async(game_id)
+        if wait:
+            await asyncio.sleep(wait)
+        ai_result = await GameService.ai_take_shot_async(game_id)
+        if ai_result is None:
+            return events + [{"type": "error", "message": "Game not found"}]
+        if ai_result.get("status") == "error":
+            return events + [{"type": "error", **ai_result}]
+        result = ai_result
+        events.append(GameService.shot_event("ai_shot", ai_result))
+
+    if result["game_status"] != "active":
+        events.append(GameService.status_event(result))
+    return events
+
+async def sync_event(game_id: str, since_version) -> dict:
+    """ส่วนที่เปลี่ยนหลัง since_version (เหมือน GET /games/{game_id}?since_version=)"""
+    if not isinstance(since_version, int) or isinstance(since_version, bool) or since_version < 0:
+        return {"type": "error", "message": "since_version must be a non-negative integer"}
+    changes = await GameService.get_game_changes_async(game_id, since_version)
+    if changes is None:
+        return {"type": "error", "message": "Game not found"}
+    return {"type": "changes", **changes}
+
+@app.websocket("/games/{game_id}/ws")
+async def game_websocket(websocket: WebSocket, game_id: str):
+    """
+    Play a game over one connection.
+
+    Client messages: {"type": "fire", "position": "A1"} and {"type": "sync", "since_version": N}.
+    Server events: "state" on connect, "shot", "ai_shot", "status", "changes" and "error".
+    """
+    await websocket.accept()
+    state = await GameService.get_game_state_async(game_id, include_history=False)
+    if state is None:
+        await websocket.close(code=4404, reason="Game not found")
+        return
+    await websocket.send_json({"type": "state", **state})
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                message_type = message.get("type")
+            except (ValueError, AttributeError):
+                await websocket.send_json({"type": "error", "message": "Messages must be JSON objects"})
+                continue
+
+            if message_type == "fire":
+                events = await play_turn(game_id, str(message.get("position", "")))
+            elif message_type == "sync":
+                events = [await sync_event(game_id, message.get("since_version"))]
+            else:
+                events = [{"type": "error", "message": f"Unknown message type: {message_type}"}]
+
+            for event in events:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+@app.websocket("/games/{game_id}/spectate")
+async def spectate_game(websocket: WebSocket, game_id: str):
+    """
+    Watch a game live: a "state" snapshot (no ship positions), then every "shot", "ai_shot"
+    and "status" event. Spectators that fall too far behind are closed with code 4408.
+    """
+    await websocket.accept()
+    state = await GameService.get_spectator_state_async(game_id)
+    if state is None:
+        await websocket.close(code=4404, reason="Game not found")
+        return
+
+    subscription = GameService.spectators.subscribe(game_id)
+
+    async def forward_events():
+        await websocket.send_json({"type": "state", **state})
+        while True:
+            payload = await subscription.get()
+            if payload is None:
+                await websocket.close(code=4408, reason="Spectator fell behind")
+                return
+            await websocket.send_text(payload)
+
+    async def wait_for_disconnect():
+        # ผู้ชมไม่ส่งอะไรมา ข้อความที่ได้รับจึงมีแค่ตอนตัดการเชื่อมต่อ
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(forward_events()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        GameService.spectators.unsubscribe(subscription)
+
+@app.get("/games/{game_id}/history", response_model=HistoryResponse)
+async def get_game_history(
+    game_id: str,
+    request: Request,
+    since_shot: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+):
+    """Get game history, or only the shots after since_shot (at most limit) with a next_shot cursor"""
+    history = await GameService.get_game_history_async(game_id, since_shot=since_shot, limit=limit)
     if history is None:
         raise HTTPException(status_code=404, detail="Game not found")
-    return history
+    return encode_response(request, history)
 
 @app.get("/games/{game_id}/statistics")
 async def get_game_statistics(game_id: str):
     """Get game statistics"""
-    stats = GameService.get_game_statistics(game_id)
+    stats = await GameService.get_game_statistics_async(game_id)
     if stats is None:
         raise HTTPException(status_code=404, detail="Game not found")
     return stats
@@ -136,11 +437,65 @@ async def get_game_statistics(game_id: str):
 @app.get("/games/{game_id}/ai-stats")
 async def get_ai_statistics(game_id: str):
     """Get AI performance statistics"""
-    stats = GameService.get_ai_statistics(game_id)
+    stats = await GameService.get_ai_statistics_async(game_id)
     if stats is None:
         raise HTTPException(status_code=404, detail="Game not found or no AI opponent")
     return stats
 
+@app.get("/metrics")
+async def get_metrics():
+    """Get server-side counters (game pool hits/misses, live/expired/evicted games, bytes per game, spectators, persistence queue, snapshot/journal, per-game locks)"""
+    return {
+        "game_pool": GameService.get_pool_stats(),
+        "game_store": await GameService.get_store_stats_async(),
+        "memory": await GameService.get_memory_stats_async(max_age=GameService.memory_stats_ttl),
+        "spectators": GameService.get_spectator_stats(),
+        "persistence": GameService.get_persistence_stats(),
+        "snapshot": GameService.get_snapshot_stats(),
+        "locks": GameService.get_lock_stats(),
+        "shard": SHARD_NAME,
+    }
+
+def require_shard_auth(request: Request) -> None:
+    """รับเฉพาะ request ที่ router เซ็นด้วย BATTLESHIP_SHARD_SECRET"""
+    secret = GameService.shard_secret
+    signature = request.headers.get(SHARD_AUTH_HEADER, "")
+    if not secret or not hmac.compare_digest(
+            signature, internal_signature(secret, request.method, request.scope.get("raw_path", b"").decode())):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+if SHARD_NAME:
+    # ใช้โดย router ของ app.sharding ตอนย้ายเกมระหว่าง shard เท่านั้น (router ไม่ส่ง /internal จาก client มา
+    # ทุก request ต้องเซ็นด้วย secret ร่วม และ shard ฟังแค่ 127.0.0.1)
+    @app.get("/internal/games", dependencies=[Depends(require_shard_auth)])
+    async def list_shard_games():
+        """List the ids of every game on this shard"""
+        return {"shard": SHARD_NAME, "game_ids": await GameService.list_game_ids_async()}
+
+    @app.get("/internal/games/{game_id}", dependencies=[Depends(require_shard_auth)])
+    async def export_shard_game(game_id: str):
+        """Export a whole game (signed, pickled) so the router can move it to another shard"""
+        data = await GameService.export_game_async(game_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return Response(data, media_type="application/octet-stream")
+
+    @app.put("/internal/games/{game_id}", dependencies=[Depends(require_shard_auth)])
+    async def import_shard_game(game_id: str, request: Request):
+        """Import a game exported by another shard (its signature is checked before it is loaded)"""
+        try:
+            await GameService.import_game_async(game_id, await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"game_id": game_id, "shard": SHARD_NAME}
+
+    @app.delete("/internal/games/{game_id}", dependencies=[Depends(require_shard_auth)])
+    async def delete_shard_game(game_id: str):
+        """Drop a game that has moved to another shard"""
+        if not await GameService.remove_game_async(game_id):
+            raise HTTPException(status_code=404, detail="Game not found")
+        return {"game_id": game_id, "shard": SHARD_NAME}
+
 @app.get("/ships")
 async def get_ship_info():
     """Get information about all ships"""
@@ -1,33 +1,86 @@
 
-import random
+import sys
+from types import MappingProxyType
+
+from app.core.bitboard import BOARD_SIZE, CELL_COUNT, cell_bit, iter_bits, mask_to_positions, placement_table, positions_to_mask, random_fleet
+
+# ชื่อเรือเป็นค่าคงที่ (intern ไว้) และกองเรือมาตรฐานใช้ร่วมกันทุกกระดานแบบอ่านอย่างเดียว
+SUBMARINE = sys.intern("submarine")
+PATROL_BOAT = sys.intern("patrol_boat")
+CARRIER = sys.intern("Carrier")
+BATTLESHIP = sys.intern("Battleship")
+CRUISER = sys.intern("Cruiser")
+DESTROYER = sys.intern("Destroyer")
+
+FLEET = MappingProxyType({
+    SUBMARINE: 3,
+    PATROL_BOAT: 2,
+    CARRIER: 5,
+    BATTLESHIP: 4,
+    CRUISER: 3,
+    DESTROYER: 2
+})
+SHIP_NAMES = tuple(FLEET)
+SHIP_INDEX = MappingProxyType({name: index for index, name in enumerate(SHIP_NAMES)})
+FLEET_SIZES = tuple(sorted(FLEET.values(), reverse=True))
 
 class Board:
+    # เก็บแค่ bitmask: ตำแหน่งเรือแต่ละลำ (เรียงตาม SHIP_NAMES) ช่องที่มีเรือ และช่องที่ยิงแล้ว
+    # ตาราง ships_board, ships_position ฯลฯ สร้างจาก bitmask เมื่อถูกเรียกใช้
+    __slots__ = ('fleet_masks', 'occupied_mask', 'hit_mask', 'miss_mask')
+
+    ships = FLEET
+
     def __init__(self):
-        self.ships_board = [['O'] * 10 for _ in range(10)]
-        self.ships = {
-            "submarine": 3,
-            "patrol_boat": 2,
-            "Carrier": 5,
-            "Battleship": 4,
-            "Cruiser": 3,
-            "Destroyer": 2
-        }
+        # ช่องที่ยิงแล้วเก็บเป็น bitmask (bit ที่ row * 10 + col)
+        self.hit_mask = 0
+        self.miss_mask = 0
         self._initialize_ship_tracking()
 
+    @classmethod
+    def from_fleet_masks(cls, fleet_masks) -> 'Board':
+        """กระดานใหม่ (ยังไม่ถูกยิง) ที่วางเรือตาม bitmask ของแต่ละลำ (เรียงตาม SHIP_NAMES)"""
+        board = cls()
+        for ship_name, mask in zip(SHIP_NAMES, fleet_masks):
+            board._set_ship(ship_name, mask)
+        return board
+
     def _initialize_ship_tracking(self) -> None:
-        """รีเซ็ตข้อมูลตำแหน่งเรือและสถานะที่ยังไม่ถูกยิง"""
-        self.ships_position = {
-            "submarine": [],
-            "patrol_boat": [],
-            "Carrier": [],
-            "Battleship": [],
-            "Cruiser": [],
-            "Destroyer": []
-        }
-        self.remaining_ship_positions = {
-            ship: set()
-            for ship in self.ships.keys()
-        }
+        """รีเซ็ตข้อมูลตำแหน่งเรือ"""
+        self.fleet_masks = [0] * len(SHIP_NAMES)
+        self.occupied_mask = 0
+
+    def _set_ship(self, ship_name: str, mask: int) -> None:
+        """บันทึกเรือหนึ่งลำจาก bitmask"""
+        index = SHIP_INDEX[ship_name]
+        self.occupied_mask = (self.occupied_mask & ~self.fleet_masks[index]) | mask
+        self.fleet_masks[index] = mask
+
+    @property
+    def ship_masks(self) -> dict:
+        """bitmask ของเรือแต่ละลำ"""
+        return dict(zip(SHIP_NAMES, self.fleet_masks))
+
+    @property
+    def afloat_masks(self) -> dict:
+        """bitmask ส่วนของเรือแต่ละลำที่ยังไม่ถูกยิง"""
+        hits = self.hit_mask
+        return {name: mask & ~hits for name, mask in zip(SHIP_NAMES, self.fleet_masks)}
+
+    @property
+    def ships_position(self) -> dict:
+        """ตำแหน่ง (row, col) ของเรือแต่ละลำ"""
+        return {name: mask_to_positions(mask) for name, mask in zip(SHIP_NAMES, self.fleet_masks)}
+
+    @property
+    def ships_board(self) -> list[list[str]]:
+        """ตาราง 10x10 ('O' ยังไม่ยิง, 'H' โดน, 'M' พลาด)"""
+        board = [['O'] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        for cell in iter_bits(self.hit_mask):
+            board[cell // BOARD_SIZE][cell % BOARD_SIZE] = 'H'
+        for cell in iter_bits(self.miss_mask):
+            board[cell // BOARD_SIZE][cell % BOARD_SIZE] = 'M'
+        return board
 
     def print_board(self, Debug=False) -> None:
         """
@@ -45,39 +98,21 @@ class Board:
             }
             print(readable_positions)
 
-    def place_ships_randomly(self) -> None:
+    def place_ships_randomly(self, uniform: bool = False) -> None:
         """
             random place ship in board
+
+            เลือกจากตารางตำแหน่งที่วางได้ทั้งหมดที่คำนวณไว้ล่วงหน้า (ไม่มี loop สุ่มซ้ำไม่จำกัด)
+            uniform=True จะสุ่มทั้งกองเรือแบบ uniform ทุก layout มีโอกาสเท่ากัน
         """
         self._initialize_ship_tracking()
 
-        for ship_name, size in self.ships.items():
-            placed = False
-            while not placed:
-                orientation = random.choice(['H', 'V'])
-                if orientation == 'H':
-                    row = random.randint(0, 9)
-                    col = random.randint(0, 10 - size)
-                    location = [(row, c) for c in range(col, col + size)]
-                    if self.is_valid_placement(location):
-                        self.ships_position[ship_name] = location
-                        self.remaining_ship_positions[ship_name] = set(location)
-                        placed = True
-                else:
-                    row = random.randint(0, 10 - size)
-                    col = random.randint(0, 9)
-                    location = [(r, col) for r in range(row, row + size)]
-                    if self.is_valid_placement(location):
-                        self.ships_position[ship_name] = location
-                        self.remaining_ship_positions[ship_name] = set(location)
-                        placed = True
+        masks = random_fleet(self.ships.values(), uniform=uniform)
+        for ship_name, mask in zip(self.ships, masks):
+            self._set_ship(ship_name, mask)
 
     def is_valid_placement(self, location: list) -> bool:
-        for ship_positions in self.ships_position.values():
-            for loc in location:
-                if loc in ship_positions:
-                    return False
-        return True
+        return not positions_to_mask(location) & self.occupied_mask
 
     def take_shot(self, row: int, col: int) -> dict:
         """
@@ -90,27 +125,23 @@ class Board:
         Returns:
             dict: A dictionary containing shot result (hit/miss) and updated board state.
         """
-        if self.ships_board[row][col] == 'H' or self.ships_board[row][col] == 'M':
+        bit = cell_bit(row, col)
+        if (self.hit_mask | self.miss_mask) & bit:
             return {
-                "status": "already_shot", 
+                "status": "already_shot",
                 "message": "You already shot at this position.",
                 "ship_sunk": False,
                 "all_ships_sunk": self.all_ships_sunk()
             }
 
-        for ship_name, positions in self.ships_position.items():
-            if (row, col) in positions:
-                self.ships_board[row][col] = 'H'  # Mark only the hit part
-
-                if ship_name in self.remaining_ship_positions:
-                    self.remaining_ship_positions[ship_name].discard((row, col))
+        if self.occupied_mask & bit:
+            for ship_name, mask in zip(SHIP_NAMES, self.fleet_masks):
+                if not mask & bit:
+                    continue
+                self.hit_mask |= bit  # Mark only the hit part
 
                 # Check if the entire ship is sunk
-                is_sunk = len(self.remaining_ship_positions.get(ship_name, set())) == 0
-
-                if is_sunk:
-                    # รีเซ็ตตำแหน่งที่เหลือให้ว่างแต่ยังคงข้อมูลสำหรับ debug/display
-                    self.remaining_ship_positions[ship_name] = set()
+                if not mask & ~self.hit_mask:
                     return {
                         "status": "hit",
                         "message": f"Hit! You sunk {ship_name}.",
@@ -120,16 +151,16 @@ class Board:
                     }
                 else:
                     return {
-                        "status": "hit", 
-                        "message": "Hit!", 
+                        "status": "hit",
+                        "message": "Hit!",
                         "ship_sunk": False,
-                        "all_ships_sunk": self.all_ships_sunk()
+                        "all_ships_sunk": False
                     }
 
-        self.ships_board[row][col] = 'M'
+        self.miss_mask |= bit
         return {
-            "status": "miss", 
-            "message": "Miss!", 
+            "status": "miss",
+            "message": "Miss!",
             "ship_sunk": False,
             "all_ships_sunk": self.all_ships_sunk()
         }
@@ -141,83 +172,100 @@ class Board:
         Returns:
             bool: True if there are no ship left on the board, False otherwise.
         """
-        return all(len(positions) == 0 for positions in self.remaining_ship_positions.values())
+        return not self.occupied_mask & ~self.hit_mask
+
+    def cell_state(self, row: int, col: int) -> str:
+        """ค่าของช่องเดียวแบบเดียวกับ ships_board ('O', 'H' หรือ 'M')"""
+        bit = cell_bit(row, col)
+        if self.hit_mask & bit:
+            return 'H'
+        if self.miss_mask & bit:
+            return 'M'
+        return 'O'
 
-    def get_board_state(self) -> list[list[str]]:
+    def get_board_state(self, compact: bool = False):
         """
         Returns the current state of the board.
+
+        compact=True returns one 100-character string (row by row) instead of a 10x10 grid.
         """
-        return self.ships_board
+        if not compact:
+            return self.ships_board
+        cells = bytearray(b'O' * CELL_COUNT)
+        for cell in iter_bits(self.hit_mask):
+            cells[cell] = 72  # 'H'
+        for cell in iter_bits(self.miss_mask):
+            cells[cell] = 77  # 'M'
+        return cells.decode('ascii')
+
+    def get_ships_position(self, compact: bool = False) -> dict:
+        """ตำแหน่งเรือแต่ละลำ: (row, col) หรือ index ของช่อง (row * 10 + col) เมื่อ compact=True"""
+        if not compact:
+            return self.ships_position
+        return {name: list(iter_bits(mask)) for name, mask in zip(SHIP_NAMES, self.fleet_masks)}
 
     def get_ships_remaining(self) -> dict:
         """
         Returns the names of the ships that are still afloat.
         """
+        hits = self.hit_mask
         return [
             ship_name
-            for ship_name, positions in self.remaining_ship_positions.items()
-            if len(positions) > 0
+            for ship_name, mask in zip(SHIP_NAMES, self.fleet_masks)
+            if mask & ~hits
         ]
-    
+
+    def _placement_mask(self, start_row: int, start_col: int, size: int, direction: str) -> int:
+        """bitmask ของเรือจากตารางตำแหน่งที่คำนวณไว้ล่วงหน้า (0 ถ้าออกนอกกระดาน)"""
+        table = placement_table(size)
+        index = table.lookup(start_row, start_col, direction)
+        return 0 if index is None else table.masks[index]
+
     def can_place_ship(self, start_row: int, start_col: int, size: int, direction: str) -> bool:
         """ตรวจสอบว่าสามารถวางเรือได้หรือไม่"""
-        if direction == 'horizontal':
-            if start_col + size > 10:
-                return False
-            location = [(start_row, start_col + i) for i in range(size)]
-        else:  # vertical
-            if start_row + size > 10:
-                return False
-            location = [(start_row + i, start_col) for i in range(size)]
-        
-        return self.is_valid_placement(location)
-    
+        mask = self._placement_mask(start_row, start_col, size, direction)
+        return bool(mask) and not mask & self.occupied_mask
+
     def place_ship_at_position(self, ship_name: str, start_row: int, start_col: int, size: int, direction: str) -> bool:
         """วางเรือในตำแหน่งที่กำหนด"""
-        if not self.can_place_ship(start_row, start_col, size, direction):
+        mask = self._placement_mask(start_row, start_col, size, direction)
+        if not mask or mask & self.occupied_mask:
             return False
-        
-        if direction == 'horizontal':
-            location = [(start_row, start_col + i) for i in range(size)]
-        else:  # vertical
-            location = [(start_row + i, start_col) for i in range(size)]
-        
-        self.ships_position[ship_name] = location
-        self.remaining_ship_positions[ship_name] = set(location)
+
+        self._set_ship(ship_name, mask)
         return True
 
     def clear_ships(self):
         """ล้างเรือทั้งหมด"""
         self._initialize_ship_tracking()
-    
+
     def place_ships_custom(self, ship_placements: list) -> dict:
         """
         วางเรือตามที่ผู้เล่นกำหนด
-        
+
         Args:
             ship_placements: list ของ dict ที่มี ship_name, start_row, start_col, direction
-        
+
         Returns:
             dict ที่มี success และ message
         """
         self.clear_ships()
-        
+
         # ตรวจสอบว่ามีเรือครบ
         expected_ships = set(self.ships.keys())
         provided_ships = set([ship["ship_name"] for ship in ship_placements])
-        
+
         if expected_ships != provided_ships:
             return {"success": False, "message": f"ต้องมีเรือ: {list(expected_ships)}"}
-        
+
         # วางเรือทีละลำ
         for ship in ship_placements:
             ship_name = ship["ship_name"]
             size = self.ships[ship_name]
-            
+
             if not self.place_ship_at_position(ship_name, ship["start_row"], ship["start_col"], size, ship["direction"]):
                 self.clear_ships()
                 return {"success": False, "message": f"ไม่สามารถวางเรือ {ship_name} ที่ตำแหน่ง ({ship['start_row']}, {ship['start_col']}) ได้"}
-        
-        return {"success": True, "message": "วางเรือสำเร็จ"}
 
+        return {"success": True, "message": "วางเรือสำเร็จ"}
 
@@ -0,0 +1,105 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.models.board import Board
+from app.models.game_history import GameHistory, decode_shot
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class ArchivedHistory(NamedTuple):
+    """
+    ประวัติของเกมที่จบแล้วแบบอัดแน่น (อ่านอย่างเดียว)
+
+    แต่ละนัดใช้ 2 byte ใน ``log`` (ช่อง + flag) และเวลาเก็บเป็น microsecond
+    นับจาก ``start_time`` ใน ``offsets`` สถิติคำนวณไว้ครั้งเดียวตอนเก็บ (คืนเป็นสำเนาเสมอ)
+    ``to_dict`` / ``get_statistics`` คืนค่าเหมือน GameHistory เดิมทุกตัวอักษร
+    """
+    game_id: str
+    start_time: datetime
+    end_time: Optional[datetime]
+    winner: Optional[str]
+    log: bytes
+    offsets: array
+    statistics: Dict[str, Any]
+
+    @classmethod
+    def pack(cls, history: GameHistory) -> 'ArchivedHistory':
+        """อัด GameHistory (คัดลอก array ของช่อง/flag และแปลงเวลาเป็น microsecond)"""
+        log = bytearray(2 * len(history.cells))
+        log[0::2] = history.cells
+        log[1::2] = history.flags
+        # ปัดเศษแบบเดียวกับ GameHistory.timestamp จึงได้ ISO string ตรงกันทุกตัวอักษร
+        offsets = array('q', (timedelta(seconds=seconds) // _MICROSECOND for seconds in history.times))
+        return cls(history.game_id, history.start_time, history.end_time, history.winner, bytes(log), offsets,
+                   history.get_statistics())
+
+    @property
+    def shots(self) -> List[Dict[str, Any]]:
+        """นัดทั้งหมดในรูป dict เดียวกับ GameHistory.shots (สร้างใหม่ทุกครั้ง)"""
+        return self.get_shot_history()
+
+    @property
+    def shot_count(self) -> int:
+        return len(self.offsets)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return dict(self.statistics)
+
+    def get_shot_history(self, since_shot: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        log, offsets = self.log, self.offsets
+        start_time = self.start_time
+        stop = len(offsets) if limit is None else min(len(offsets), since_shot + limit)
+        return [
+            decode_shot(number + 1, log[2 * number], log[2 * number + 1],
+                        start_time + timedelta(microseconds=offsets[number]))
+            for number in range(since_shot, stop)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "game_id": self.game_id,
+            "shots": self.shots,
+            "statistics": self.get_statistics()
+        }
+
+
+class AIStatsSnapshot(NamedTuple):
+    """ค่า get_ai_stats() ของ AI ตอนจบเกม (แทน AIOpponent ทั้งก้อน คืนเป็นสำเนาเสมอ)"""
+    stats: Dict[str, Any]
+
+    def get_ai_stats(self) -> dict:
+        return {key: list(value) if isinstance(value, list) else value for key, value in self.stats.items()}
+
+
+class ArchivedGame(NamedTuple):
+    """
+    เกมที่จบแล้วใน GameService.games: field ชื่อเดียวกับ GameRecord แต่แก้ไขไม่ได้
+
+    กระดานเหลือแค่ bitmask (Board), ประวัติอัดแน่น และสถิติ AI ที่คำนวณไว้แล้ว
+    """
+    game_id: str
+    player_board: Board
+    ai_board: Optional[Board]
+    ai_opponent: Optional[AIStatsSnapshot]
+    ai_difficulty: str
+    has_ai: bool
+    current_turn: Optional[str]
+    game_status: str
+    history: ArchivedHistory
+    created_at: float
+    ai_delay: float
+    ai_ready_at: Optional[float] = None
+
+    @classmethod
+    def from_record(cls, game) -> 'ArchivedGame':
+        """สร้างจาก GameRecord ที่จบแล้ว"""
+        snapshot = None
+        if game.ai_opponent is not None:
+            snapshot = AIStatsSnapshot(game.ai_opponent.get_ai_stats())
+        return cls(
+            game.game_id, game.player_board, game.ai_board, snapshot, game.ai_difficulty, game.has_ai,
+            game.current_turn, game.game_status, ArchivedHistory.pack(game.history),
+            game.created_at, game.ai_delay,
+        )
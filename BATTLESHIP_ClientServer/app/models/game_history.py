@@ -1,76 +1,196 @@
+import time
+from array import array
+from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+
+from app.core.bitboard import BOARD_SIZE, CELL_COUNT
+from app.models.board import SHIP_INDEX, SHIP_NAMES
+
+# ชื่อช่องแบบที่ GameService บันทึก ("A1" ... "J10") เรียงตาม index ของช่อง
+POSITION_NAMES = tuple(f"{chr(65 + cell % BOARD_SIZE)}{cell // BOARD_SIZE + 1}" for cell in range(CELL_COUNT))
+POSITION_INDEX = MappingProxyType({name: cell for cell, name in enumerate(POSITION_NAMES)})
+RESULTS = ('miss', 'hit', 'already_shot')
+RESULT_INDEX = MappingProxyType({result: index for index, result in enumerate(RESULTS)})
+SHOOTERS = ('player', 'ai')
+
+# flag byte ของแต่ละนัด: bit 0 ผู้ยิง, bit 1-2 ผล, bit 3 is_hit, bit 4 ship_sunk,
+# bit 5-7 ลำดับเรือที่จมใน SHIP_NAMES + 1 (0 = ไม่มี)
+AI_BIT = 0x01
+RESULT_SHIFT = 1
+HIT_BIT = 0x08
+SUNK_BIT = 0x10
+SHIP_SHIFT = 5
+
+
+def encode_shot(position: str, result: str, player: str, is_hit: bool, ship_sunk: bool,
+                sunk_ship_name: Optional[str]) -> tuple:
+    """แปลงนัดหนึ่งเป็น (index ของช่อง, flag byte) หรือ ValueError ถ้าค่าไม่อยู่ในชุดที่รู้จัก"""
+    cell = POSITION_INDEX.get(position)
+    result_index = RESULT_INDEX.get(result)
+    ship = SHIP_INDEX.get(sunk_ship_name) if sunk_ship_name is not None else -1
+    if cell is None or result_index is None or ship is None or player not in SHOOTERS:
+        raise ValueError(f"Cannot record shot {position!r} {result!r} {player!r} {sunk_ship_name!r}")
+    flags = (result_index << RESULT_SHIFT) | ((ship + 1) << SHIP_SHIFT)
+    if player == 'ai':
+        flags |= AI_BIT
+    if is_hit:
+        flags |= HIT_BIT
+    if ship_sunk:
+        flags |= SUNK_BIT
+    return cell, flags
+
+
+def decode_shot(number: int, cell: int, flags: int, timestamp: datetime) -> Dict[str, Any]:
+    """สร้าง dict แบบเต็มของนัดที่ ``number`` (นับจาก 1)"""
+    ship = flags >> SHIP_SHIFT
+    return {
+        "shot_number": number,
+        "timestamp": timestamp.isoformat(),
+        "position": POSITION_NAMES[cell],
+        "result": RESULTS[(flags >> RESULT_SHIFT) & 0x03],
+        "player": SHOOTERS[flags & AI_BIT],
+        "is_hit": bool(flags & HIT_BIT),
+        "ship_sunk": bool(flags & SUNK_BIT),
+        "sunk_ship_name": SHIP_NAMES[ship - 1] if ship else None
+    }
+
 
 class GameHistory:
-    """เก็บประวัติการเล่นเกม"""
-    
-    def __init__(self, game_id: str):
+    """
+    เก็บประวัติการเล่นเกม
+
+    แต่ละนัดเก็บเป็นค่าใน array คู่ขนาน: index ของช่อง, flag byte (ผู้ยิง/ผล/จม)
+    และเวลาเป็นวินาทีจาก monotonic clock นับจากเริ่มเกม ตัวนับสถิติอัปเดตทุกครั้งที่
+    เพิ่มนัด ``get_statistics`` จึงเป็น O(1) ส่วน dict ต่อนัดสร้างเมื่อถูกขอเท่านั้น (``shots``)
+    """
+
+    __slots__ = ('game_id', 'start_time', 'end_time', 'winner', 'cells', 'flags', 'times',
+                 '_start_clock', '_end_clock', 'player_shots', 'ai_shots', 'player_hits', 'ai_hits',
+                 'player_ships_sunk', 'ai_ships_sunk')
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, game_id: str, start_time: Optional[datetime] = None):
         self.game_id = game_id
-        self.shots: List[Dict[str, Any]] = []
-        self.start_time = datetime.now()
+        if start_time is None:
+            self.start_time = datetime.now()
+            self._start_clock = self.clock()
+        else:
+            self.start_time = start_time
+            self._rebase_clock()
+        self._end_clock = None
         self.end_time = None
         self.winner = None  # "player", "ai", หรือ None
-        
-    def add_shot(self, position: str, result: str, player: str = "player", 
-                 is_hit: bool = False, ship_sunk: bool = False, sunk_ship_name: Optional[str] = None):
+        self.cells = array('B')
+        self.flags = array('B')
+        self.times = array('d')  # วินาทีนับจาก _start_clock
+        self.player_shots = 0
+        self.ai_shots = 0
+        self.player_hits = 0
+        self.ai_hits = 0
+        self.player_ships_sunk = 0
+        self.ai_ships_sunk = 0
+
+    def add_shot(self, position: str, result: str, player: str = "player",
+                 is_hit: bool = False, ship_sunk: bool = False, sunk_ship_name: Optional[str] = None,
+                 elapsed: Optional[float] = None):
         """
         เพิ่มการยิงในประวัติ
-        
+
         Args:
             position: ตำแหน่งที่ยิง (เช่น "A1")
             result: ผลการยิง ("hit", "miss", "already_shot")
             player: ผู้ยิง ("player" หรือ "ai")
             is_hit: โดนเป้าหรือไม่
             ship_sunk: เรือจมหรือไม่
+            elapsed: วินาทีนับจากเริ่มเกม (ใช้ตอนเล่นซ้ำจาก journal ไม่ระบุ = ตอนนี้)
         """
-        shot_data = {
-            "shot_number": len(self.shots) + 1,
-            "timestamp": datetime.now().isoformat(),
-            "position": position,
-            "result": result,
-            "player": player,
-            "is_hit": is_hit,
-            "ship_sunk": ship_sunk,
-            "sunk_ship_name": sunk_ship_name
-        }
-        self.shots.append(shot_data)
-    
-    def end_game(self, winner: str = None):
-        """จบเกม"""
-        self.end_time = datetime.now()
+        cell, flags = encode_shot(position, result, player, is_hit, ship_sunk, sunk_ship_name)
+        self.cells.append(cell)
+        self.flags.append(flags)
+        self.times.append(self.clock() - self._start_clock if elapsed is None else elapsed)
+
+        if player == "ai":
+            self.ai_shots += 1
+            self.ai_hits += bool(is_hit)
+            self.ai_ships_sunk += bool(ship_sunk)
+        else:
+            self.player_shots += 1
+            self.player_hits += bool(is_hit)
+            self.player_ships_sunk += bool(ship_sunk)
+
+    def end_game(self, winner: str = None, elapsed: Optional[float] = None):
+        """จบเกม (elapsed: วินาทีนับจากเริ่มเกม ไม่ระบุ = ตอนนี้)"""
+        self._end_clock = self.clock() if elapsed is None else self._start_clock + elapsed
+        self.end_time = self.start_time + timedelta(seconds=self._end_clock - self._start_clock)
         self.winner = winner
-    
+
+    def __getstate__(self):
+        # ค่า monotonic clock ใช้ข้าม process ไม่ได้ จึงเก็บเป็นระยะเวลาของเกมแทน
+        state = {slot: getattr(self, slot) for slot in self.__slots__ if slot not in ('_start_clock', '_end_clock')}
+        state['duration'] = None if self._end_clock is None else self._end_clock - self._start_clock
+        return state
+
+    def __setstate__(self, state):
+        duration = state.pop('duration')
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._rebase_clock()
+        self._end_clock = None if duration is None else self._start_clock + duration
+
+    def _rebase_clock(self) -> None:
+        """ตั้ง monotonic clock ตอนเริ่มเกมจาก wall clock ที่ผ่านไปตั้งแต่ start_time (เช่น หลัง restart)"""
+        self._start_clock = self.clock() - max(0.0, (datetime.now() - self.start_time).total_seconds())
+
+    @property
+    def shot_count(self) -> int:
+        return len(self.cells)
+
+    def timestamp(self, index: int) -> datetime:
+        """เวลา (wall clock) ของนัดที่ index (นับจาก 0)"""
+        return self.start_time + timedelta(seconds=self.times[index])
+
+    @property
+    def shots(self) -> List[Dict[str, Any]]:
+        """นัดทั้งหมดในรูป dict แบบเต็ม (สร้างใหม่ทุกครั้ง)"""
+        return self.get_shot_history()
+
     def get_statistics(self) -> Dict[str, Any]:
         """ได้สถิติของเกม"""
-        player_shots = [shot for shot in self.shots if shot["player"] == "player"]
-        ai_shots = [shot for shot in self.shots if shot["player"] == "ai"]
-        
-        player_hits = len([shot for shot in player_shots if shot["is_hit"]])
-        ai_hits = len([shot for shot in ai_shots if shot["is_hit"]])
-        
+        player_shots = self.player_shots
+        ai_shots = self.ai_shots
+        player_hits = self.player_hits
+        ai_hits = self.ai_hits
+
         duration = None
-        if self.end_time:
-            duration = (self.end_time - self.start_time).total_seconds()
-        
+        if self._end_clock is not None:
+            duration = self._end_clock - self._start_clock
+
         return {
             "game_id": self.game_id,
-            "total_shots": len(self.shots),
-            "player_shots": len(player_shots),
-            "ai_shots": len(ai_shots),
+            "total_shots": len(self.cells),
+            "player_shots": player_shots,
+            "ai_shots": ai_shots,
             "player_hits": player_hits,
             "ai_hits": ai_hits,
-            "player_hit_rate": (player_hits / len(player_shots) * 100) if player_shots else 0,
-            "ai_hit_rate": (ai_hits / len(ai_shots) * 100) if ai_shots else 0,
+            "player_hit_rate": (player_hits / player_shots * 100) if player_shots else 0,
+            "ai_hit_rate": (ai_hits / ai_shots * 100) if ai_shots else 0,
+            "player_ships_sunk": self.player_ships_sunk,
+            "ai_ships_sunk": self.ai_ships_sunk,
             "duration_seconds": duration,
             "winner": self.winner,
             "start_time": self.start_time.isoformat(),
             "end_time": self.end_time.isoformat() if self.end_time else None
         }
-    
-    def get_shot_history(self) -> List[Dict[str, Any]]:
-        """ได้ประวัติการยิงทั้งหมด"""
-        return self.shots.copy()
-    
+
+    def get_shot_history(self, since_shot: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """ได้ประวัติการยิงหลังนัดที่ ``since_shot`` (ไม่เกิน ``limit`` นัด) แปลงเป็น dict เฉพาะช่วงนั้น"""
+        cells, flags = self.cells, self.flags
+        stop = len(cells) if limit is None else min(len(cells), since_shot + limit)
+        return [decode_shot(index + 1, cells[index], flags[index], self.timestamp(index))
+                for index in range(since_shot, stop)]
+
     def to_dict(self) -> Dict[str, Any]:
         """แปลงเป็น dictionary"""
         return {
@@ -78,4 +198,3 @@ class GameHistory:
             "shots": self.shots,
             "statistics": self.get_statistics()
         }
-
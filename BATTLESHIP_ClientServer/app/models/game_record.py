@@ -0,0 +1,70 @@
+import time
+from typing import Optional
+
+from app.core.ai_opponent import AIOpponent
+from app.models.board import Board
+from app.models.game_history import GameHistory
+
+
+class GameRecord:
+    """
+    สถานะของเกมหนึ่งเกมใน GameService.games
+
+    ใช้ __slots__ แทน dict ต่อเกม (ไม่มี dict ของ key ซ้ำ ๆ ทุกเกม)
+    ค่า current_turn / game_status เป็น string literal ที่ Python intern ไว้แล้ว
+    """
+
+    __slots__ = (
+        'game_id',
+        'player_board',
+        'ai_board',
+        'ai_opponent',
+        'ai_difficulty',
+        'has_ai',
+        'current_turn',  # player, ai หรือ None เมื่อจบเกม
+        'game_status',   # active, player_won, ai_won, completed
+        'history',
+        'created_at',
+        'ai_delay',
+        'ai_ready_at',   # เวลา (ตาม clock) ที่ AI ยิงได้
+    )
+
+    # นาฬิกาเดียวกับ GameService.clock (GameService.set_clock เปลี่ยนทั้งคู่)
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, game_id: str, player_board: Board, ai_board: Optional[Board],
+                 ai_opponent: Optional[AIOpponent], ai_difficulty: str, has_ai: bool,
+                 history: GameHistory, created_at: float, ai_delay: float):
+        self.game_id = game_id
+        self.player_board = player_board
+        self.ai_board = ai_board
+        self.ai_opponent = ai_opponent
+        self.ai_difficulty = ai_difficulty
+        self.has_ai = has_ai
+        self.current_turn = 'player'
+        self.game_status = 'active'
+        self.history = history
+        self.created_at = created_at
+        self.ai_delay = ai_delay
+        self.ai_ready_at = None
+
+    def __getstate__(self):
+        # ค่า monotonic clock ใช้ข้าม process/เครื่องไม่ได้ (snapshot, SQLite store, ย้าย shard)
+        # จึงเก็บเวลาที่ AI ยังต้องรอ และเวลา wall clock ตอน pickle แทน
+        state = {slot: getattr(self, slot) for slot in self.__slots__ if slot != 'ai_ready_at'}
+        ready_at = self.ai_ready_at
+        state['ai_wait'] = None if ready_at is None else max(0.0, ready_at - self.clock())
+        state['pickled_at'] = time.time()
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):  # pickle ก่อนมี __getstate__: (None, slots) ที่ ai_ready_at เป็นค่าดิบ
+            state = dict(state[1], ai_wait=None, pickled_at=None)
+            state.pop('ai_ready_at', None)
+        wait = state.pop('ai_wait')
+        pickled_at = state.pop('pickled_at')
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        if wait is not None:
+            wait = max(0.0, wait - max(0.0, time.time() - pickled_at))
+        self.ai_ready_at = None if wait is None else self.clock() + wait
@@ -0,0 +1,108 @@
+"""
+Response encoding for the API.
+
+Endpoints that return plain dicts go through ``jsonable_encoder`` (a
+recursive Python walk) before ``json.dumps``. The hot endpoints instead
+build their ``Response`` here: the dict is already JSON-ready, so it is
+encoded in one call with ``orjson`` when it is installed (the standard
+``json`` module otherwise). A client whose ``Accept``
+header prefers ``application/msgpack`` (by q-value, then by order) gets
+MessagePack when ``msgpack`` is installed; JSON stays the default.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Mapping, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: clients asking for msgpack get JSON
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _preference(ranges: Tuple[Tuple[str, float], ...], media_type: str) -> Tuple[float, int, int]:
+    """(q, explicitly named, -position) of the most specific range in ``ranges`` that matches ``media_type``."""
+    best = (-1, 0.0, 0)  # (specificity, q, position)
+    for position, (media_range, quality) in enumerate(ranges):
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == media_type.split("/")[0] + "/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if specificity > best[0]:
+            best = (specificity, quality, position)
+    specificity, quality, position = best
+    return quality, int(specificity == 2), -position
+
+
+@lru_cache(maxsize=256)
+def prefers_msgpack(accept: str) -> bool:
+    """
+    True if the ``Accept`` header ranks MessagePack above JSON.
+
+    Higher q wins; on equal q a type named explicitly beats a wildcard, then the
+    one listed first wins. ``q=0`` rules a type out, and ties with ``*/*`` stay JSON.
+    """
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range.strip().lower(), quality))
+    ranges = tuple(ranges)
+    msgpack_preference = _preference(ranges, MSGPACK_MEDIA_TYPE)
+    return msgpack_preference[0] > 0 and msgpack_preference > _preference(ranges, JSON_MEDIA_TYPE)
+
+
+def wants_msgpack(request: Request) -> bool:
+    return msgpack is not None and prefers_msgpack(request.headers.get("accept", ""))
+
+
+class FastJSONResponse(Response):
+    """``JSONResponse`` that renders with :func:`dumps_json`."""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+def encode_response(request: Request, content: Any, status_code: int = 200,
+                    headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Encode ``content`` in the format the client accepts (MessagePack or JSON)."""
+    if wants_msgpack(request):
+        body = msgpack.packb(content, use_bin_type=True)
+        media_type = MSGPACK_MEDIA_TYPE
+    else:
+        body = dumps_json(content)
+        media_type = JSON_MEDIA_TYPE
+    response = Response(body, status_code=status_code, headers=headers, media_type=media_type)
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+
+class GameLocks:
+    """
+    asyncio.Lock ต่อเกม: request ของเกมเดียวกันทำทีละ request ส่วนเกมอื่นไม่ต้องรอ
+
+    lock ถูกสร้างตอนมีคนขอและลบทิ้งเมื่อไม่มีใครถือ/รอแล้ว (ไม่ค้างตามจำนวนเกมทั้งหมด)
+    ใช้ใน event loop เท่านั้น (งานที่ย้ายไป thread ทำภายใต้ lock ที่ถือไว้ใน loop)
+    """
+
+    def __init__(self):
+        # game_id -> [lock, จำนวนคนที่ถือหรือรออยู่]
+        self._locks: Dict[str, List] = {}
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @asynccontextmanager
+    async def hold(self, game_id: str) -> AsyncIterator[None]:
+        entry = self._locks.get(game_id)
+        if entry is None:
+            entry = self._locks[game_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        lock = entry[0]
+        try:
+            if lock.locked():
+                self.contended += 1
+                started = time.perf_counter()
+                await lock.acquire()
+                waited = time.perf_counter() - started
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            else:
+                await lock.acquire()
+            self.acquired += 1
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[game_id]
+
+    def clear(self) -> None:
+        """ลบ lock ทั้งหมดและรีเซ็ตตัวนับ"""
+        self._locks.clear()
+        self.acquired = self.contended = 0
+        self.wait_seconds_total = self.wait_seconds_max = 0.0
+
+    def stats(self) -> Dict:
+        """จำนวน lock ที่ใช้อยู่ จำนวนครั้งที่ต้องรอ และเวลารอ"""
+        contended = self.contended
+        return {
+            'held': sum(1 for lock, _ in self._locks.values() if lock.locked()),
+            'waiting': sum(users - lock.locked() for lock, users in self._locks.values()),
+            'acquired': self.acquired,
+            'contended': contended,
+            'wait_ms_avg': round(self.wait_seconds_total / contended * 1e3, 3) if contended else 0.0,
+            'wait_ms_max': round(self.wait_seconds_max * 1e3, 3),
+        }
@@ -0,0 +1,109 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from app.core.ai_opponent import AIDifficulty
+
+PoolKey = Tuple[bool, Optional[str]]
+
+# ชุด key ที่อุ่นไว้โดยค่าเริ่มต้น: เล่นคนเดียว + เล่นกับ AI ทุกระดับ
+DEFAULT_POOL_KEYS: Tuple[PoolKey, ...] = ((False, None),) + tuple((True, level.value) for level in AIDifficulty)
+
+
+def pool_key(with_ai: bool, ai_difficulty: Optional[str]) -> PoolKey:
+    """key ของ pool: เกมที่ไม่มี AI ใช้ key เดียวกันไม่ว่าระดับความยากจะเป็นอะไร"""
+    return (True, ai_difficulty) if with_ai else (False, None)
+
+
+class GamePool:
+    """
+    Pool ของส่วนประกอบเกมที่สร้างไว้ล่วงหน้า (กระดาน, AI) แยกตาม key (with_ai, ai_difficulty)
+
+    ``acquire`` หยิบของที่พร้อมแล้วออกจาก deque แบบ O(1) ส่วนการสร้างใหม่ให้ถึง
+    watermark ทำใน background thread (``start``) หรือเรียก ``fill`` เอง
+    """
+
+    def __init__(self, factory: Callable[[bool, Optional[str]], object], watermark: int = 0,
+                 keys: Iterable[PoolKey] = DEFAULT_POOL_KEYS):
+        self.factory = factory
+        self.watermark = watermark
+        self._ready: Dict[PoolKey, Deque] = {key: deque() for key in keys}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.built = 0
+
+    def acquire(self, with_ai: bool, ai_difficulty: Optional[str]) -> Optional[object]:
+        """หยิบเกมที่สร้างไว้แล้ว หรือคืน None ถ้า pool ของ key นี้ว่าง (ผู้เรียกต้องสร้างเอง)"""
+        ready = self._ready.get(pool_key(with_ai, ai_difficulty))
+        with self._lock:
+            if ready:
+                self.hits += 1
+                item = ready.popleft()
+            else:
+                self.misses += 1
+                item = None
+        if self.watermark:
+            self._wakeup.set()
+        return item
+
+    def fill(self) -> int:
+        """สร้างของเติมทุก key จนถึง watermark คืนจำนวนที่สร้าง"""
+        built = 0
+        for key, ready in self._ready.items():
+            while len(ready) < self.watermark and not self._stop.is_set():
+                # สร้างนอก lock เพื่อไม่ให้ acquire ต้องรอ
+                item = self.factory(*key)
+                with self._lock:
+                    ready.append(item)
+                    self.built += 1
+                built += 1
+        return built
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.fill()
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """เริ่ม background thread ที่เติม pool ทุกครั้งที่มีการหยิบออก"""
+        if self.watermark <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='game-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """หยุด background thread"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def clear(self) -> None:
+        """ทิ้งของใน pool และรีเซ็ตตัวนับ"""
+        with self._lock:
+            for ready in self._ready.values():
+                ready.clear()
+            self.hits = self.misses = self.built = 0
+
+    def stats(self) -> Dict:
+        """ตัวนับ hit/miss และจำนวนที่พร้อมใช้ต่อ key"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'watermark': self.watermark,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / requests, 4) if requests else None,
+                'built': self.built,
+                'ready': {
+                    ('ai:' + key[1]) if key[0] else 'solo': len(ready)
+                    for key, ready in self._ready.items()
+                },
+            }
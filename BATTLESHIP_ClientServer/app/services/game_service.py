@@ -1,116 +1,447 @@
-from typing import Dict, Optional, List, Tuple
-from app.models.board import Board
-from app.core.ai_opponent import AIOpponent, AIDifficulty
-from app.models.game_history import GameHistory
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, NamedTuple, Optional, List, Tuple, Union
+from app.core.bitboard import BOARD_SIZE
+from app.models.board import FLEET, FLEET_SIZES, Board
+from app.models.game_archive import ArchivedGame
+from app.models.game_record import GameRecord
+from app.core.ai_opponent import DEFAULT_SHIP_SIZES, PARITY_CELLS, AIOpponent, AIDifficulty
+from app.core.memory import bytes_per_object
+from app.core.probability import PlacementDensity
+from app.models.game_history import POSITION_INDEX, GameHistory
 from app.core.utils import GameUtils
+from app.services.game_locks import GameLocks
+from app.services.game_pool import GamePool
+from app.services.game_store import GameStore
+from app.services.persistence import GamePersistence
+from app.services.snapshot import GameSnapshots
+from app.services.spectator_hub import SpectatorHub
+from app.services.sqlite_game_store import SQLiteGameStore
+import asyncio
+import hashlib
+import hmac
+import os
+import pickle
+import sys
 import uuid
 import time
 
+
+class PrebuiltGame(NamedTuple):
+    """ส่วนของเกมที่สร้างล่วงหน้าได้ (ไม่ขึ้นกับเวลาเริ่มเกม)"""
+    game_id: str
+    player_board: Board
+    ai_board: Optional[Board]
+    ai_opponent: Optional[AIOpponent]
+
+
 class GameService:
-    games: Dict[str, Dict] = {}
-    
+    # เกมที่ยังอยู่ในหน่วยความจำ หมดอายุเมื่อไม่ถูกใช้นาน BATTLESHIP_GAME_TTL วินาที และเก็บได้ไม่เกิน
+    # BATTLESHIP_MAX_GAMES เกม (เกินแล้วไล่เกมที่ไม่ถูกใช้นานที่สุดออก, 0 = ไม่จำกัด)
+    # ตั้ง BATTLESHIP_GAME_STORE_PATH เพื่อเก็บเกมในไฟล์ SQLite ที่ทุก worker process ใช้ร่วมกันแทน
+    # (รัน uvicorn --workers N ได้) แก้เกมผ่าน ``with games.edit(game_id) as game:`` เสมอ
+    games: Union[GameStore, SQLiteGameStore] = (
+        SQLiteGameStore(
+            os.environ['BATTLESHIP_GAME_STORE_PATH'],
+            ttl=float(os.environ.get('BATTLESHIP_GAME_TTL', '1800')),
+            max_games=int(os.environ.get('BATTLESHIP_MAX_GAMES', '10000')),
+            version_of=lambda game: GameService._version(game),
+        ) if os.environ.get('BATTLESHIP_GAME_STORE_PATH') else GameStore(
+            ttl=float(os.environ.get('BATTLESHIP_GAME_TTL', '1800')),
+            max_games=int(os.environ.get('BATTLESHIP_MAX_GAMES', '10000')),
+        )
+    )
+    # เกมที่จบแล้วถูกอัดเป็น ArchivedGame ทันที (อ่านได้แค่ประวัติ/สถิติอยู่แล้ว)
+    archive_finished_games: bool = True
+    # เวลา "คิด" ของ AI (วินาที) ค่าเริ่มต้นของแต่ละเกม ไม่มีการ sleep ใน service
+    default_ai_delay: float = 2.0
+    # นาฬิกาที่ใช้คำนวณเวลารอของ AI (เปลี่ยนได้ใน tests/simulation)
+    clock: Callable[[], float] = staticmethod(time.monotonic)
+    # เกมที่สร้างล่วงหน้าแยกตาม (with_ai, ai_difficulty) จำนวนต่อ key ตั้งได้ด้วย
+    # BATTLESHIP_GAME_POOL_SIZE (0 = ปิด) background thread เริ่มตอน app startup ใน app.main
+    pool: GamePool = GamePool(
+        lambda with_ai, ai_difficulty: GameService.build_game_parts(with_ai, ai_difficulty),
+        watermark=int(os.environ.get('BATTLESHIP_GAME_POOL_SIZE', '8')),
+    )
+
+    # ผู้ชมเกม (pub/sub ต่อเกม) queue ต่อผู้ชมยาวได้ BATTLESHIP_SPECTATOR_QUEUE ข้อความ
+    spectators: SpectatorHub = SpectatorHub(max_queue=int(os.environ.get('BATTLESHIP_SPECTATOR_QUEUE', '64')))
+
+    # บันทึกเกมลง SQLite แบบ write-behind เมื่อตั้ง BATTLESHIP_DB_PATH (ไม่ตั้ง = ไม่บันทึก)
+    # thread ที่เขียนลงดิสก์เริ่มตอน app startup ใน app.main
+    persistence: Optional[GamePersistence] = (
+        GamePersistence(os.environ['BATTLESHIP_DB_PATH']) if os.environ.get('BATTLESHIP_DB_PATH') else None
+    )
+
+    # snapshot + journal ของเกมที่ยังเล่นอยู่ใน BATTLESHIP_SNAPSHOT_DIR (ไม่ตั้ง = restart แล้วเกมหาย)
+    # snapshot ทุก BATTLESHIP_SNAPSHOT_INTERVAL วินาที หรือเมื่อ journal ยาวเกิน BATTLESHIP_JOURNAL_MAX_ENTRIES
+    # restore / งานเบื้องหลังเริ่มตอน app startup ใน app.main
+    # lock ต่อเกมสำหรับเมธอด *_async (เกมเดียวกันทำทีละ request, เกมอื่นทำต่อได้)
+    locks: GameLocks = GameLocks()
+    # AI ระดับที่ใช้เวลาหลาย ms ต่อนัด ยิงใน thread เพื่อไม่ให้ event loop (และเกมอื่น) ค้าง
+    # ใช้ thread แยกไม่กี่ตัว (BATTLESHIP_AI_THREADS, ค่าเริ่มต้น 1): งาน AI เป็น Python ล้วนซึ่งแย่ง GIL กัน
+    # thread ยิ่งมาก event loop ยิ่งได้ GIL ช้า
+    offload_ai_difficulties: FrozenSet[str] = frozenset({'expert', 'monte_carlo'})
+    ai_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=int(os.environ.get('BATTLESHIP_AI_THREADS', '1')), thread_name_prefix='game-ai',
+    )
+
+    # ผลของ get_memory_stats ล่าสุด (deep_sizeof หลายเกมใช้เวลา) /metrics ใช้ค่าเดิมได้ไม่เกิน
+    # BATTLESHIP_MEMORY_STATS_TTL วินาที
+    memory_stats_ttl: float = float(os.environ.get('BATTLESHIP_MEMORY_STATS_TTL', '30'))
+    _memory_stats: Optional[Tuple[float, Dict]] = None
+
+    # กุญแจร่วมของ router และทุก shard (BATTLESHIP_SHARD_SECRET ที่ app.sharding สร้างให้) ใช้เซ็นเกมที่ย้าย
+    # ระหว่าง shard ไม่ตั้ง = export/import ไม่ได้
+    shard_secret: Optional[bytes] = os.environ.get('BATTLESHIP_SHARD_SECRET', '').encode() or None
+
+    journal: Optional[GameSnapshots] = (
+        GameSnapshots(
+            os.environ['BATTLESHIP_SNAPSHOT_DIR'],
+            interval=float(os.environ.get('BATTLESHIP_SNAPSHOT_INTERVAL', '60')),
+            max_journal_entries=int(os.environ.get('BATTLESHIP_JOURNAL_MAX_ENTRIES', '100000')),
+        ) if os.environ.get('BATTLESHIP_SNAPSHOT_DIR') else None
+    )
+
+    @classmethod
+    def set_clock(cls, clock: Callable[[], float]) -> None:
+        """เปลี่ยนนาฬิกาของ service (เช่น นาฬิกาปลอมใน tests)"""
+        cls.clock = staticmethod(clock)
+        cls.games.clock = clock
+        GameRecord.clock = staticmethod(clock)
+
     @classmethod
-    def create_new_game(cls, with_ai: bool = False, ai_difficulty: str = "medium", custom_ships: Optional[List] = None) -> Dict:
-        """สร้างเกมใหม่พร้อมรองรับสองกระดาน"""
+    def build_game_parts(cls, with_ai: bool, ai_difficulty: Optional[str],
+                         player_board: Optional[Board] = None) -> PrebuiltGame:
+        """สร้างกระดานและ AI ของเกมหนึ่งเกม (ใช้ทั้งบน request path และใน game pool)"""
         game_id = str(uuid.uuid4())[:8]
-        
-        # สร้างกระดานผู้เล่น
-        player_board = Board()
-        if custom_ships:
-            # ใช้เรือที่ผู้เล่นวางเอง
-            result = player_board.place_ships_custom(custom_ships)
-            if not result["success"]:
-                return {"error": result["message"]}
-        else:
+
+        if player_board is None:
             # วางเรือแบบสุ่ม
+            player_board = Board()
             player_board.place_ships_randomly()
-        
+
         # สร้างกระดาน AI (ถ้ามี)
         ai_board = None
         ai_opponent = None
         if with_ai:
             ai_board = Board()
             ai_board.place_ships_randomly()  # AI ใช้การวางเรือแบบสุ่มเสมอ
-            
-            # สร้าง AI Opponent ตามระดับความยาก
-            difficulty_map = {
-                "easy": AIDifficulty.EASY,
-                "medium": AIDifficulty.MEDIUM,
-                "hard": AIDifficulty.HARD,
-                "expert": AIDifficulty.EXPERT
-            }
-            ai_difficulty_enum = difficulty_map.get(ai_difficulty, AIDifficulty.MEDIUM)
-            ai_opponent = AIOpponent(ai_difficulty_enum)
+            ai_opponent = cls._new_ai_opponent(ai_difficulty, player_board)
+
+        return PrebuiltGame(game_id, player_board, ai_board, ai_opponent)
+
+    @staticmethod
+    def _new_ai_opponent(ai_difficulty: Optional[str], player_board: Board) -> AIOpponent:
+        """สร้าง AI Opponent ตามระดับความยาก"""
+        difficulty_map = {
+            "easy": AIDifficulty.EASY,
+            "medium": AIDifficulty.MEDIUM,
+            "hard": AIDifficulty.HARD,
+            "expert": AIDifficulty.EXPERT,
+            "monte_carlo": AIDifficulty.MONTE_CARLO
+        }
+        ai_difficulty_enum = difficulty_map.get(ai_difficulty, AIDifficulty.MEDIUM)
+        # AI ใช้ขนาดกองเรือเดียวกับกระดานที่ต้องยิง
+        return AIOpponent(ai_difficulty_enum, ship_sizes=sorted(player_board.ships.values(), reverse=True))
+
+    @classmethod
+    def create_new_game(cls, with_ai: bool = False, ai_difficulty: str = "medium", custom_ships: Optional[List] = None,
+                        ai_delay: Optional[float] = None, compact: bool = False, game_id: Optional[str] = None) -> Dict:
+        """
+        สร้างเกมใหม่พร้อมรองรับสองกระดาน (compact=True ส่งกระดานเป็น string 100 ตัวอักษร)
+
+        game_id: ใช้ id ที่กำหนดมาแทนการสุ่ม (router ของ app.sharding เลือก id ให้ตรงกับ shard)
+        """
+        if game_id is not None and game_id in cls.games:
+            return {"error": f"Game {game_id} already exists"}
+        if ai_delay is None:
+            ai_delay = cls.default_ai_delay
+
+        if custom_ships:
+            # ใช้เรือที่ผู้เล่นวางเอง (สร้างล่วงหน้าไม่ได้ จึงไม่ผ่าน pool)
+            player_board = Board()
+            result = player_board.place_ships_custom(custom_ships)
+            if not result["success"]:
+                return {"error": result["message"]}
+            parts = cls.build_game_parts(with_ai, ai_difficulty, player_board)
+        else:
+            # หยิบเกมที่สร้างไว้แล้วจาก pool ถ้ามี ไม่งั้นสร้างใหม่ตรงนี้
+            parts = cls.pool.acquire(with_ai, ai_difficulty) or cls.build_game_parts(with_ai, ai_difficulty)
+        prebuilt_id, player_board, ai_board, ai_opponent = parts
+        game_id = game_id or prebuilt_id
         
+        # ระดับความยากมาจาก request: intern ไว้ให้ทุกเกมใช้ string เดียวกัน
+        ai_difficulty = sys.intern(ai_difficulty)
+
         # สร้าง Game History
         game_history = GameHistory(game_id)
         
         # เก็บข้อมูลเกม
-        cls.games[game_id] = {
-            'player_board': player_board,
-            'ai_board': ai_board,
-            'ai_opponent': ai_opponent,
-            'ai_difficulty': ai_difficulty,
-            'has_ai': with_ai,
-            'current_turn': 'player',  # player หรือ ai
-            'game_status': 'active',   # active, player_won, ai_won
-            'history': game_history,
-            'created_at': time.time()
-        }
+        game = cls.games[game_id] = GameRecord(
+            game_id, player_board, ai_board, ai_opponent,
+            ai_difficulty=ai_difficulty,
+            has_ai=with_ai,
+            history=game_history,
+            created_at=time.time(),
+            ai_delay=ai_delay,
+        )
+        cls._record_new_game(game)
         
         return {
             'game_id': game_id,
-            'player_board_state': player_board.get_board_state(),
-            'ai_board_state': ai_board.get_board_state() if ai_board else None,
-            'player_ships_positions': player_board.ships_position,
-            'ai_ships_positions': ai_board.ships_position if ai_board else None,
+            'player_board_state': player_board.get_board_state(compact),
+            'ai_board_state': ai_board.get_board_state(compact) if ai_board else None,
+            'player_ships_positions': player_board.get_ships_position(compact),
+            'ai_ships_positions': ai_board.get_ships_position(compact) if ai_board else None,
             'has_ai': with_ai,
             'ai_difficulty': ai_difficulty if with_ai else None,
+            'ai_delay': ai_delay if with_ai else None,
             'current_turn': 'player',
             'game_status': 'active'
         }
     
     @classmethod
-    def take_shot(cls, game_id: str, row: int, col: int) -> Optional[Dict]:
+    def take_shot(cls, game_id: str, row: int, col: int, compact: bool = False) -> Optional[Dict]:
         """ผู้เล่นยิงใส่กระดาน AI หรือกระดานตัวเองในโหมดเล่นคนเดียว"""
-        if game_id not in cls.games:
-            return None
-        
-        game = cls.games[game_id]
-        
-        # ตรวจสอบว่าเกมยังดำเนินอยู่หรือไม่
-        if game['game_status'] != 'active':
-            return {
-                'status': 'error',
-                'message': 'Game is already finished.',
-                'game_status': game['game_status']
-            }
+        # ทั้งตาอยู่ใน edit: store ที่แชร์ข้าม process ล็อกเกมนี้ไว้และบันทึกกลับตอนจบ block
+        with cls.games.edit(game_id) as game:
+            if game is None:
+                return None
+
         
-        # สำหรับเกมกับ AI - ตรวจสอบเทิร์น
-        if game['has_ai'] and game['current_turn'] != 'player':
-            return {
-                'status': 'error',
-                'message': 'Not your turn! Wait for AI to shoot.',
-                'current_turn': game['current_turn']
+            # ตรวจสอบว่าเกมยังดำเนินอยู่หรือไม่
+            if game.game_status != 'active':
+                return {
+                    'status': 'error',
+                    'message': 'Game is already finished.',
+                    'game_status': game.game_status
+                }
+        
+            # สำหรับเกมกับ AI - ตรวจสอบเทิร์น
+            if game.has_ai and game.current_turn != 'player':
+                return {
+                    'status': 'error',
+                    'message': 'Not your turn! Wait for AI to shoot.',
+                    'current_turn': game.current_turn
+                }
+        
+            # เลือกกระดานเป้าหมาย
+            if game.has_ai:
+                # เกมกับ AI - ยิงใส่กระดาน AI
+                target_board = game.ai_board
+                target_type = "ai"
+            else:
+                # โหมดเล่นคนเดียว - ยิงใส่กระดานตัวเอง
+                target_board = game.player_board
+                target_type = "player"
+
+            if not target_board:
+                return {
+                    "status": "error",
+                    "message": "No target board available."
+                }
+        
+            # ยิง
+            result = cls._apply_player_shot(game, target_board, row, col)
+            cls._record_shot(game, 'player', row, col)
+            if game.game_status != 'active':
+                cls._archive(game)
+
+            position_str = f"{chr(65 + col)}{row + 1}"
+            ship_sunk = result.get('ship_sunk', False)
+            sunk_ship_name = result.get('sunk_ship_name', None)
+            response = {
+                "status": result["status"],
+                "message": result["message"],
+                "position": position_str,
+                "ship_sunk": ship_sunk,
+                "sunk_ship_name": sunk_ship_name,
+                "all_ships_sunk": result["all_ships_sunk"],
+                "ships_remaining": target_board.get_ships_remaining(),
+                "board_state": target_board.get_board_state(compact),
+                "current_turn": game.current_turn,
+                "game_status": game.game_status,
+                "target_type": target_type,
+                "version": cls._version(game)
             }
-        
-        # เลือกกระดานเป้าหมาย
-        if game["has_ai"]:
-            # เกมกับ AI - ยิงใส่กระดาน AI
-            target_board = game["ai_board"]
-            target_type = "ai"
-        else:
-            # โหมดเล่นคนเดียว - ยิงใส่กระดานตัวเอง
-            target_board = game["player_board"]
-            target_type = "player"
-
-        if not target_board:
-            return {
-                "status": "error",
-                "message": "No target board available."
+        cls._publish_shot(game_id, 'shot', response)
+        return response
+    
+    @classmethod
+    def ai_take_shot(cls, game_id: str, compact: bool = False) -> Optional[Dict]:
+        """AI ยิงใส่กระดานผู้เล่น"""
+        with cls.games.edit(game_id) as game:
+            if game is None:
+                return None
+        
+            # ตรวจสอบว่ามี AI หรือไม่
+            if not game.has_ai or not game.ai_opponent:
+                return {
+                    'status': 'error',
+                    'message': 'No AI opponent in this game.'
+                }
+        
+            # ตรวจสอบว่าเป็นเทิร์นของ AI หรือไม่
+            if game.current_turn != 'ai':
+                return {
+                    'status': 'error',
+                    'message': 'Not AI turn! Player needs to shoot first.',
+                    'current_turn': game.current_turn
+                }
+        
+            # ตรวจสอบว่าเกมยังดำเนินอยู่หรือไม่
+            if game.game_status != 'active':
+                return {
+                    'status': 'error',
+                    'message': 'Game is already finished.',
+                    'game_status': game.game_status
+                }
+        
+            # AI เลือกตำแหน่งยิง
+            player_board = game.player_board
+            row, col = game.ai_opponent.get_next_shot()
+        
+            # AI ยิง
+            result = cls._apply_ai_shot(game, row, col)
+            cls._record_shot(game, 'ai', row, col)
+            if game.game_status != 'active':
+                cls._archive(game)
+
+            position_str = f"{chr(65 + col)}{row + 1}"
+            response = {
+                'status': result['status'],
+                'message': result['message'],
+                'position': position_str,
+                'ship_sunk': result.get('ship_sunk', False),
+                'all_ships_sunk': result['all_ships_sunk'],
+                'ships_remaining': player_board.get_ships_remaining(),
+                'board_state': player_board.get_board_state(compact),
+                'current_turn': game.current_turn,
+                'game_status': game.game_status,
+                'version': cls._version(game)
             }
-        
-        # ยิง
+        cls._publish_shot(game_id, 'ai_shot', response)
+        return response
+
+    # ---- async API: ใช้จาก route handler ใน event loop ----
+
+    @classmethod
+    async def _run_locked(cls, game_id: str, method: Callable[..., Any], *args) -> Any:
+        """
+        เรียก method ขณะถือ lock ของเกม (store อยู่บนดิสก์ = ทำใน thread เพราะรอ I/O)
+        lock ถือไว้จนงานใน thread เสร็จ request อื่นของเกมนี้จึงไม่เห็นเกมที่แก้ไปครึ่งทาง
+        """
+        async with cls.locks.hold(game_id):
+            return await cls._run_off_loop(method, *args)
+
+    @classmethod
+    async def _run_off_loop(cls, method: Callable[..., Any], *args, **kwargs) -> Any:
+        """เรียก method โดยไม่ถือ lock (store อยู่บนดิสก์ = ทำใน thread: BEGIN IMMEDIATE อาจรอถึง busy_timeout)"""
+        if cls._store_on_disk():
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    @classmethod
+    def _store_on_disk(cls) -> bool:
+        return isinstance(cls.games, SQLiteGameStore)
+
+    @classmethod
+    async def create_new_game_async(cls, **kwargs) -> Dict:
+        return await cls._run_off_loop(cls.create_new_game, **kwargs)
+
+    @classmethod
+    async def get_game_version_async(cls, game_id: str) -> Optional[int]:
+        return await cls._run_off_loop(cls.get_game_version, game_id)
+
+    @classmethod
+    async def get_ai_wait_async(cls, game_id: str) -> Optional[float]:
+        return await cls._run_off_loop(cls.get_ai_wait, game_id)
+
+    @classmethod
+    async def take_shot_async(cls, game_id: str, row: int, col: int, compact: bool = False) -> Optional[Dict]:
+        """take_shot ภายใต้ lock ของเกม"""
+        return await cls._run_locked(game_id, cls.take_shot, game_id, row, col, compact)
+
+    @classmethod
+    async def ai_take_shot_async(cls, game_id: str, compact: bool = False) -> Optional[Dict]:
+        """ai_take_shot ภายใต้ lock ของเกม (AI ระดับใน offload_ai_difficulties ยิงใน ai_executor)"""
+        async with cls.locks.hold(game_id):
+            if cls._store_on_disk():
+                # ทำใน thread เสมอ (ไม่ต้องโหลดเกมมาดูระดับ AI ก่อน)
+                return await asyncio.to_thread(cls.ai_take_shot, game_id, compact)
+            game = cls.games.get(game_id)
+            if game is not None and game.ai_difficulty in cls.offload_ai_difficulties:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(cls.ai_executor, cls.ai_take_shot, game_id, compact)
+            return cls.ai_take_shot(game_id, compact)
+
+    @classmethod
+    async def get_game_state_async(cls, game_id: str, debug_mode: bool = False, include_history: bool = True,
+                                   compact: bool = False) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_game_state, game_id, debug_mode, include_history, compact)
+
+    @classmethod
+    async def get_game_changes_async(cls, game_id: str, since_version: int) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_game_changes, game_id, since_version)
+
+    @classmethod
+    async def get_game_history_async(cls, game_id: str, since_shot: Optional[int] = None,
+                                     limit: Optional[int] = None) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_game_history, game_id, since_shot, limit)
+
+    @classmethod
+    async def get_spectator_state_async(cls, game_id: str) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_spectator_state, game_id)
+
+    @classmethod
+    async def get_ai_statistics_async(cls, game_id: str) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_ai_statistics, game_id)
+
+    @classmethod
+    async def get_game_statistics_async(cls, game_id: str) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_game_statistics, game_id)
+
+    @classmethod
+    async def get_game_state_with_debug_async(cls, game_id: str) -> Optional[Dict]:
+        return await cls._run_locked(game_id, cls.get_game_state_with_debug, game_id)
+
+    @classmethod
+    async def export_game_async(cls, game_id: str) -> Optional[bytes]:
+        return await cls._run_locked(game_id, cls.export_game, game_id)
+
+    @classmethod
+    async def import_game_async(cls, game_id: str, data: bytes) -> None:
+        return await cls._run_locked(game_id, cls.import_game, game_id, data)
+
+    @classmethod
+    async def remove_game_async(cls, game_id: str) -> bool:
+        return await cls._run_locked(game_id, cls.remove_game, game_id)
+
+    @classmethod
+    async def list_game_ids_async(cls) -> List[str]:
+        return await cls._run_off_loop(cls.list_game_ids)
+
+    @classmethod
+    async def get_store_stats_async(cls) -> Dict:
+        return await cls._run_off_loop(cls.get_store_stats)
+
+    @classmethod
+    async def get_memory_stats_async(cls, sample: int = 100, max_age: float = 0.0) -> Dict:
+        """get_memory_stats (store บนดิสก์ต้อง unpickle เกมตัวอย่าง จึงทำใน thread)"""
+        return await cls._run_off_loop(cls.get_memory_stats, sample, max_age)
+
+    @classmethod
+    def get_lock_stats(cls) -> Dict:
+        """จำนวน lock ต่อเกมที่ใช้อยู่ และเวลาที่ request ต้องรอ lock"""
+        return cls.locks.stats()
+
+    @classmethod
+    def _apply_player_shot(cls, game: GameRecord, target_board: Board, row: int, col: int,
+                           elapsed: Optional[float] = None) -> Dict:
+        """
+        ผู้เล่นยิง: ยิงกระดานเป้าหมาย บันทึกประวัติ และเปลี่ยนเทิร์น/สถานะเกม
+        (ใช้ทั้งตอนเล่นจริงและตอนเล่นซ้ำจาก journal ซึ่งส่ง elapsed ของนัดเดิมมา)
+        """
         result = target_board.take_shot(row, col)
         
         # บันทึกประวัติ
@@ -118,129 +449,279 @@ class GameService:
         is_hit = result['status'] == 'hit'
         ship_sunk = result.get('ship_sunk', False)
         sunk_ship_name = result.get('sunk_ship_name', None)
-        game['history'].add_shot(position_str, result['status'], 'player', is_hit, ship_sunk, sunk_ship_name=sunk_ship_name)
+        game.history.add_shot(position_str, result['status'], 'player', is_hit, ship_sunk,
+                              sunk_ship_name=sunk_ship_name, elapsed=elapsed)
         
         # ตรวจสอบการชนะ
         if result['all_ships_sunk']:
-            if game['has_ai']:
-                game['game_status'] = 'player_won'
+            if game.has_ai:
+                game.game_status = 'player_won'
             else:
-                game['game_status'] = 'completed'  # สำหรับโหมดเล่นคนเดียว
-            game['current_turn'] = None
-            game['history'].end_game('player')
-        elif game['has_ai']:
+                game.game_status = 'completed'  # สำหรับโหมดเล่นคนเดียว
+            game.current_turn = None
+            game.history.end_game('player', game.history.times[-1])  # เกมจบพร้อมนัดสุดท้าย
+        elif game.has_ai:
             # เปลี่ยนเทิร์นเป็น AI (เฉพาะเกมกับ AI)
-            game["current_turn"] = "ai"
-        
-        return {
-            "status": result["status"],
-            "message": result["message"],
-            "position": position_str,
-            "ship_sunk": ship_sunk,
-            "sunk_ship_name": sunk_ship_name,
-            "all_ships_sunk": result["all_ships_sunk"],
-            "ships_remaining": target_board.get_ships_remaining(),
-            "board_state": target_board.get_board_state(),
-            "current_turn": game["current_turn"],
-            "game_status": game["game_status"],
-            "target_type": target_type
-        }
-    
+            game.current_turn = "ai"
+            game.ai_ready_at = cls.clock() + game.ai_delay
+        return result
+
     @classmethod
-    def ai_take_shot(cls, game_id: str) -> Optional[Dict]:
-        """AI ยิงใส่กระดานผู้เล่น"""
-        if game_id not in cls.games:
-            return None
-        time.sleep(2)  # Simulate thinking time for AI
-        game = cls.games[game_id]
-        
-        # ตรวจสอบว่ามี AI หรือไม่
-        if not game['has_ai'] or not game['ai_opponent']:
-            return {
-                'status': 'error',
-                'message': 'No AI opponent in this game.'
-            }
-        
-        # ตรวจสอบว่าเป็นเทิร์นของ AI หรือไม่
-        if game['current_turn'] != 'ai':
-            return {
-                'status': 'error',
-                'message': 'Not AI turn! Player needs to shoot first.',
-                'current_turn': game['current_turn']
-            }
-        
-        # ตรวจสอบว่าเกมยังดำเนินอยู่หรือไม่
-        if game['game_status'] != 'active':
-            return {
-                'status': 'error',
-                'message': 'Game is already finished.',
-                'game_status': game['game_status']
-            }
-        
-        # AI เลือกตำแหน่งยิง
-        ai_opponent = game['ai_opponent']
-        player_board = game['player_board']
-        
-        row, col = ai_opponent.get_next_shot()
-        
-        # AI ยิง
+    def _apply_ai_shot(cls, game: GameRecord, row: int, col: int, elapsed: Optional[float] = None) -> Dict:
+        """AI ยิงช่อง (row, col): ยิงกระดานผู้เล่น แจ้งผลให้ AI บันทึกประวัติ และเปลี่ยนเทิร์น/สถานะเกม"""
+        player_board = game.player_board
         result = player_board.take_shot(row, col)
         
-        # แจ้ง AI ผลการยิง
-        ai_opponent.notify_shot_result(row, col, result['status'] == 'hit', result.get('ship_sunk', False))
+        # แจ้ง AI ผลการยิง (รวมขนาดเรือที่จม เพื่อให้ AI ตัดเรือลำนั้นออกจากการคำนวณ)
+        sunk_ship_size = player_board.ships.get(result.get('sunk_ship_name'))
+        game.ai_opponent.notify_shot_result(row, col, result['status'] == 'hit', result.get('ship_sunk', False),
+                                            sunk_ship_size=sunk_ship_size)
         
         # บันทึกประวัติ
         position_str = f"{chr(65 + col)}{row + 1}"
         is_hit = result['status'] == 'hit'
         ship_sunk = result.get('ship_sunk', False)
         sunk_ship_name = result.get("sunk_ship_name", None)
-        game["history"].add_shot(position_str, result["status"], "ai", is_hit, ship_sunk, sunk_ship_name=sunk_ship_name)
-        
+        game.history.add_shot(position_str, result["status"], "ai", is_hit, ship_sunk,
+                              sunk_ship_name=sunk_ship_name, elapsed=elapsed)
         
         # ตรวจสอบการชนะ
         if result['all_ships_sunk']:
-            game['game_status'] = 'ai_won'
-            game['current_turn'] = None
-            game['history'].end_game('ai')
+            game.game_status = 'ai_won'
+            game.current_turn = None
+            game.history.end_game('ai', game.history.times[-1])  # เกมจบพร้อมนัดสุดท้าย
         else:
             # เปลี่ยนเทิร์นกลับเป็นผู้เล่น
-            game['current_turn'] = 'player'
-        
-        return {
-            'status': result['status'],
-            'message': result['message'],
-            'position': position_str,
-            'ship_sunk': result.get('ship_sunk', False),
-            'all_ships_sunk': result['all_ships_sunk'],
-            'ships_remaining': player_board.get_ships_remaining(),
-            'board_state': player_board.get_board_state(),
-            'current_turn': game['current_turn'],
-            'game_status': game['game_status']
-        }
+            game.current_turn = 'player'
+        game.ai_ready_at = None
+        return result
+
+    @classmethod
+    def _record_new_game(cls, game: GameRecord) -> None:
+        """ส่งเกมใหม่ให้ persistence / journal (แค่ต่อท้าย queue ในหน่วยความจำ)"""
+        if cls.persistence:
+            cls.persistence.record_game(game)
+        if cls.journal:
+            cls.journal.record_game(game)
+
+    @classmethod
+    def _record_shot(cls, game: GameRecord, shooter: str, row: int, col: int) -> None:
+        """ส่งนัดล่าสุด (และสถานะถ้าเกมจบ) ให้ persistence / journal"""
+        if cls.persistence:
+            cls.persistence.record_shot(game)
+            if game.game_status != 'active':
+                cls.persistence.record_status(game)
+        if cls.journal:
+            cls.journal.record_shot(game, shooter, row, col)
+
+    @classmethod
+    def restore_game(cls, game_id: str, player_fleet: Tuple[int, ...], ai_fleet: Optional[Tuple[int, ...]],
+                     has_ai: bool, ai_difficulty: str, created_at: float, ai_delay: float, start_time) -> bool:
+        """สร้างเกมจาก journal ขึ้นมาใหม่ (ข้ามถ้ามีเกมนี้อยู่แล้ว เช่น อยู่ใน snapshot)"""
+        if game_id in cls.games:
+            return False
+        player_board = Board.from_fleet_masks(player_fleet)
+        cls.games[game_id] = GameRecord(
+            game_id, player_board,
+            Board.from_fleet_masks(ai_fleet) if ai_fleet is not None else None,
+            cls._new_ai_opponent(ai_difficulty, player_board) if has_ai else None,
+            ai_difficulty=sys.intern(ai_difficulty),
+            has_ai=has_ai,
+            history=GameHistory(game_id, start_time),
+            created_at=created_at,
+            ai_delay=ai_delay,
+        )
+        return True
+
+    @classmethod
+    def replay_shot(cls, game_id: str, shot_number: int, shooter: str, row: int, col: int, elapsed: float) -> bool:
+        """เล่นนัดจาก journal ซ้ำ ถ้าเป็นนัดถัดไปของเกมพอดี (นัดที่มีอยู่แล้วใน snapshot จะถูกข้าม)"""
+        with cls.games.edit(game_id) as game:
+            if game is None or game.game_status != 'active' or cls._version(game) != shot_number - 1:
+                return False
+            if shooter == 'ai':
+                cls._apply_ai_shot(game, row, col, elapsed)
+            else:
+                cls._apply_player_shot(game, game.ai_board if game.has_ai else game.player_board, row, col, elapsed)
+            if game.game_status != 'active':
+                cls._archive(game)
+            return True
+
+    @staticmethod
+    def shot_event(event_type: str, result: Dict) -> Dict:
+        """ผลการยิงแบบย่อสำหรับส่งเป็น event (ไม่มี board_state ทั้งกระดาน)"""
+        event = {'type': event_type}
+        event.update((key, value) for key, value in result.items() if key != 'board_state')
+        return event
+
+    @staticmethod
+    def status_event(result: Dict) -> Dict:
+        """event ตอนเกมจบ"""
+        return {'type': 'status', 'game_status': result['game_status'], 'version': result['version']}
+
+    @classmethod
+    def _publish_shot(cls, game_id: str, event_type: str, result: Dict) -> None:
+        """ส่งผลการยิง (และสถานะเมื่อเกมจบ) ให้ผู้ชมของเกม"""
+        if not cls.spectators.has_subscribers(game_id):
+            return
+        cls.spectators.publish(game_id, cls.shot_event(event_type, result))
+        if result['game_status'] != 'active':
+            cls.spectators.publish(game_id, cls.status_event(result))
+
+    @classmethod
+    def get_spectator_state(cls, game_id: str) -> Optional[Dict]:
+        """สถานะเกมสำหรับผู้ชม: ไม่มีประวัติ และไม่เปิดเผยตำแหน่งเรือของทั้งสองฝ่าย"""
+        state = cls.get_game_state(game_id, include_history=False)
+        if state is not None:
+            state['player_ships_positions'] = None
+        return state
+
+    @classmethod
+    def list_game_ids(cls) -> List[str]:
+        """id ของทุกเกมใน store (ใช้ตอนย้ายเกมระหว่าง shard)"""
+        return list(cls.games)
+
+    @classmethod
+    def _migration_digest(cls, game_id: str, data: bytes) -> bytes:
+        if not cls.shard_secret:
+            raise PermissionError("BATTLESHIP_SHARD_SECRET is not set")
+        return hmac.new(cls.shard_secret, game_id.encode() + b'\0' + data, hashlib.sha256).digest()
+
+    @classmethod
+    def export_game(cls, game_id: str) -> Optional[bytes]:
+        """
+        เกมทั้งเกมสำหรับย้ายไป shard อื่น (None ถ้าไม่มี)
+
+        รูปแบบ: HMAC-SHA256 (ด้วย shard_secret ของ game_id + ข้อมูล) 32 byte ตามด้วย pickle ของเกม
+        """
+        game = cls.games.get(game_id)
+        if game is None:
+            return None
+        data = pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+        return cls._migration_digest(game_id, data) + data
+
+    @classmethod
+    def import_game(cls, game_id: str, data: bytes) -> None:
+        """
+        รับเกมที่ export_game ของ shard อื่นส่งมา
+
+        unpickle เฉพาะข้อมูลที่ลายเซ็นตรงกับ game_id นี้ (ValueError ถ้าไม่ตรง) pickle จากที่อื่นจึงรันโค้ดไม่ได้
+        """
+        digest, data = data[:32], data[32:]
+        if not hmac.compare_digest(digest, cls._migration_digest(game_id, data)):
+            raise ValueError(f"Game {game_id} has an invalid signature")
+        cls.games[game_id] = pickle.loads(data)
+
+    @classmethod
+    def remove_game(cls, game_id: str) -> bool:
+        """ลบเกมออกจาก store คืน False ถ้าไม่มี"""
+        try:
+            del cls.games[game_id]
+        except KeyError:
+            return False
+        return True
+
+    @classmethod
+    def get_persistence_stats(cls) -> Optional[Dict]:
+        """ความยาว queue และเวลาเขียนของ persistence (None ถ้าไม่ได้เปิดใช้)"""
+        return cls.persistence.stats() if cls.persistence else None
+
+    @classmethod
+    def get_snapshot_stats(cls) -> Optional[Dict]:
+        """ขนาด/เวลาของ snapshot ล่าสุด ความยาว journal และผลการ restore (None ถ้าไม่ได้เปิดใช้)"""
+        return cls.journal.stats() if cls.journal else None
+
+    @classmethod
+    def get_spectator_stats(cls) -> Dict:
+        """จำนวนผู้ชม ข้อความที่ส่ง/ตัดทิ้ง และเวลา fan-out"""
+        return cls.spectators.stats()
     
     @classmethod
-    def get_game_state(cls, game_id: str, debug_mode: bool = False) -> Optional[Dict]:
-        """ดึงสถานะเกมปัจจุบัน"""
-        if game_id not in cls.games:
+    def _archive(cls, game: GameRecord) -> None:
+        """แทนเกมที่จบแล้วด้วยรูปแบบอัดแน่นอ่านอย่างเดียว (ทิ้ง AI และประวัติแบบ list of dict)"""
+        if cls.archive_finished_games and game.game_id in cls.games:
+            cls.games[game.game_id] = ArchivedGame.from_record(game)
+
+    @classmethod
+    def get_pool_stats(cls) -> Dict:
+        """ตัวนับ hit/miss ของ game pool"""
+        return cls.pool.stats()
+
+    @classmethod
+    def get_store_stats(cls) -> Dict:
+        """จำนวนเกม active / expired / evicted ของ game store"""
+        return cls.games.stats()
+
+    @classmethod
+    def get_memory_stats(cls, sample: int = 100, max_age: float = 0.0) -> Dict:
+        """
+        ขนาดหน่วยความจำเฉลี่ยต่อเกมที่ยังอยู่ (สุ่มดูไม่เกิน sample เกม ไม่นับของที่ทุกเกมใช้ร่วมกัน)
+
+        max_age: ใช้ผลที่วัดไว้ไม่เกินกี่วินาทีได้เลย (0 = วัดใหม่ทุกครั้ง)
+        """
+        now = time.monotonic()
+        cached = cls._memory_stats
+        if max_age > 0 and cached is not None and now - cached[0] < max_age:
+            return cached[1]
+
+        shared_roots = (
+            FLEET, PARITY_CELLS, DEFAULT_SHIP_SIZES, PlacementDensity(FLEET_SIZES).tables,
+            ('player', 'ai', 'active', 'player_won', 'ai_won', 'completed'),
+        )
+        stats = bytes_per_object(cls.games.peek_values(sample), shared_roots, sample)
+        result = {
+            'live_games': len(cls.games),
+            'sampled_games': stats['sampled'],
+            'bytes_per_game': stats['bytes_per_object'],
+            'max_bytes_per_game': stats['max_bytes'],
+        }
+        cls._memory_stats = (now, result)
+        return result
+
+    @classmethod
+    def get_ai_wait(cls, game_id: str) -> Optional[float]:
+        """
+        เวลาที่เหลือ (วินาที) ก่อน AI จะยิงได้ตาม ai_delay ของเกม
+
+        ผู้เรียกต้องรอเองแบบไม่ block (เช่น await asyncio.sleep) แทนการ sleep ใน service
+        """
+        game = cls.games.get(game_id)
+        if game is None:
             return None
-        
-        game = cls.games[game_id]
-        player_board = game['player_board']
-        ai_board = game['ai_board']
+
+        ready_at = game.ai_ready_at
+        if ready_at is None:
+            return 0.0
+        return max(0.0, ready_at - cls.clock())
+
+    @classmethod
+    def get_game_state(cls, game_id: str, debug_mode: bool = False, include_history: bool = True,
+                       compact: bool = False) -> Optional[Dict]:
+        """
+        ดึงสถานะเกมปัจจุบัน
+
+        include_history=False ไม่ส่งประวัติการยิงมาด้วย compact=True ส่งกระดานเป็น string
+        100 ตัวอักษร และตำแหน่งเรือเป็น index ของช่อง
+        """
+        game = cls.games.get(game_id)
+        if game is None:
+            return None
+        player_board = game.player_board
+        ai_board = game.ai_board
         
         # สำหรับกระดานผู้เล่น - แสดงเรือของตัวเองเสมอ
-        player_board_state = player_board.get_board_state()
-        player_ships_positions = player_board.ships_position
+        player_board_state = player_board.get_board_state(compact)
+        player_ships_positions = player_board.get_ships_position(compact)
         
         # สำหรับกระดาน AI - แสดงเรือเฉพาะใน debug mode
         ai_board_state = None
         ai_ships_positions = None
         if ai_board:
-            ai_board_state = ai_board.get_board_state()
+            ai_board_state = ai_board.get_board_state(compact)
             if debug_mode:
-                ai_ships_positions = ai_board.ships_position
+                ai_ships_positions = ai_board.get_ships_position(compact)
         
-        return {
+        state = {
             'game_id': game_id,
             'player_board_state': player_board_state,
             'player_ships_positions': player_ships_positions,
@@ -248,23 +729,92 @@ class GameService:
             'ai_ships_positions': ai_ships_positions,
             'player_ships_remaining': player_board.get_ships_remaining(),
             'ai_ships_remaining': ai_board.get_ships_remaining() if ai_board else [],
-            'has_ai': game['has_ai'],
-            'ai_difficulty': game.get('ai_difficulty'),
-            'current_turn': game['current_turn'],
-            'game_status': game['game_status'],
-            'history': game['history'].to_dict(),
-            'debug_mode': debug_mode
+            'has_ai': game.has_ai,
+            'ai_difficulty': game.ai_difficulty,
+            'current_turn': game.current_turn,
+            'game_status': game.game_status,
+            'history': game.history.to_dict(),
+            'debug_mode': debug_mode,
+            'version': cls._version(game)
         }
+        if not include_history:
+            del state['history']
+        return state
     
+    @staticmethod
+    def _version(game) -> int:
+        """
+        version ของสถานะเกม: ทุกการเปลี่ยนแปลงของเกม (ช่องบนกระดาน เทิร์น สถานะ)
+        เกิดพร้อมการยิงหนึ่งนัดที่บันทึกในประวัติเสมอ จำนวนนัดจึงเพิ่มขึ้นทุกครั้งที่สถานะเปลี่ยน
+        """
+        return game.history.shot_count
+
+    @classmethod
+    def get_game_version(cls, game_id: str) -> Optional[int]:
+        """version ปัจจุบันของเกม (ใช้ทำ ETag โดยไม่ต้องสร้างสถานะทั้งหมด store บนดิสก์อ่านจากคอลัมน์ version)"""
+        if cls._store_on_disk():
+            return cls.games.version(game_id)
+        game = cls.games.get(game_id)
+        if game is None:
+            return None
+        return cls._version(game)
+
+    @classmethod
+    def get_game_changes(cls, game_id: str, since_version: int) -> Optional[Dict]:
+        """
+        การเปลี่ยนแปลงของเกมหลัง version ``since_version``
+
+        คืนเฉพาะช่องที่เปลี่ยน (``changes``) และนัดที่ยิงหลัง version นั้น (``events``)
+        ถ้า since_version ใหม่กว่า version ของ server (เช่น client เก็บค่าจากเกมอื่น)
+        จะคืนสถานะเต็มจาก get_game_state แทน
+        """
+        game = cls.games.get(game_id)
+        if game is None:
+            return None
+        version = cls._version(game)
+        if since_version > version:
+            return cls.get_game_state(game_id)
+
+        player_board = game.player_board
+        ai_board = game.ai_board
+        events = game.history.get_shot_history(since_shot=since_version)
+        changed = {}
+        for event in events:
+            # ผู้เล่นยิงกระดาน AI (หรือกระดานตัวเองเมื่อเล่นคนเดียว) ส่วน AI ยิงกระดานผู้เล่น
+            board_name = 'ai' if event['player'] == 'player' and game.has_ai else 'player'
+            changed[board_name, event['position']] = None
+        changes = []
+        for board_name, position in changed:
+            row, col = divmod(POSITION_INDEX[position], BOARD_SIZE)
+            board = ai_board if board_name == 'ai' else player_board
+            changes.append({
+                'board': board_name,
+                'position': position,
+                'row': row,
+                'col': col,
+                'value': board.cell_state(row, col)
+            })
+
+        return {
+            'game_id': game_id,
+            'since_version': since_version,
+            'version': version,
+            'changes': changes,
+            'events': events,
+            'player_ships_remaining': player_board.get_ships_remaining(),
+            'ai_ships_remaining': ai_board.get_ships_remaining() if ai_board else [],
+            'current_turn': game.current_turn,
+            'game_status': game.game_status
+        }
+
     @classmethod
     def get_game_state_with_debug(cls, game_id: str) -> Optional[Dict]:
         """ดึงสถานะเกมพร้อมตำแหน่งเรือ (สำหรับ debug mode)"""
-        if game_id not in cls.games:
+        game = cls.games.get(game_id)
+        if game is None:
             return None
-        
-        game = cls.games[game_id]
-        player_board = game['player_board']
-        ai_board = game['ai_board']
+        player_board = game.player_board
+        ai_board = game.ai_board
         
         return {
             'game_id': game_id,
@@ -274,41 +824,58 @@ class GameService:
             'ai_board_debug': ai_board.ships_position if ai_board else None,
             'player_ships_remaining': player_board.get_ships_remaining(),
             'ai_ships_remaining': ai_board.get_ships_remaining() if ai_board else [],
-            'has_ai': game['has_ai'],
-            'ai_difficulty': game.get('ai_difficulty'),
-            'current_turn': game['current_turn'],
-            'game_status': game['game_status']
+            'has_ai': game.has_ai,
+            'ai_difficulty': game.ai_difficulty,
+            'current_turn': game.current_turn,
+            'game_status': game.game_status
         }
     
     @classmethod
-    def get_game_history(cls, game_id: str) -> Optional[Dict]:
-        """ได้ประวัติการเล่นเกม"""
-        if game_id not in cls.games:
+    def get_game_history(cls, game_id: str, since_shot: Optional[int] = None,
+                         limit: Optional[int] = None) -> Optional[Dict]:
+        """
+        ได้ประวัติการเล่นเกม
+
+        ถ้าระบุ since_shot หรือ limit จะคืนเฉพาะนัดหลังนัดที่ since_shot (ไม่เกิน limit นัด)
+        พร้อม cursor ``next_shot`` สำหรับเรียกครั้งถัดไป และ ``has_more`` ถ้ายังมีนัดเหลือ
+        """
+        game = cls.games.get(game_id)
+        if game is None:
             return None
-        
-        game = cls.games[game_id]
-        return game['history'].to_dict()
+        history = game.history
+        if since_shot is None and limit is None:
+            return history.to_dict()
+
+        since_shot = min(since_shot or 0, history.shot_count)
+        shots = history.get_shot_history(since_shot, limit)
+        next_shot = since_shot + len(shots)
+        return {
+            'game_id': history.game_id,
+            'shots': shots,
+            'statistics': history.get_statistics(),
+            'since_shot': since_shot,
+            'next_shot': next_shot,
+            'has_more': next_shot < history.shot_count
+        }
     
     @classmethod
     def get_game_statistics(cls, game_id: str) -> Optional[Dict]:
         """ได้สถิติของเกม"""
-        if game_id not in cls.games:
+        game = cls.games.get(game_id)
+        if game is None:
             return None
-        
-        game = cls.games[game_id]
-        return game['history'].get_statistics()
+        return game.history.get_statistics()
 
     @classmethod
     def get_ai_statistics(cls, game_id: str) -> Optional[Dict]:
         """ได้สถิติของ AI opponent"""
-        if game_id not in cls.games:
+        game = cls.games.get(game_id)
+        if game is None:
             return None
-        
-        game = cls.games[game_id]
-        if not game['has_ai'] or not game['ai_opponent']:
+        if not game.has_ai or not game.ai_opponent:
             return None
         
-        ai_stats = game['ai_opponent'].get_ai_stats()
+        ai_stats = game.ai_opponent.get_ai_stats()
         return ai_stats
 
     @classmethod
@@ -321,6 +888,4 @@ class GameService:
     @classmethod
     def get_ship_info(cls) -> dict:
         """ได้ข้อมูลเรือทั้งหมด"""
-        temp_board = Board()
-        return temp_board.ships
-
+        return dict(FLEET)
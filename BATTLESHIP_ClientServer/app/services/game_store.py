@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+
+class GameStore(MutableMapping):
+    """
+    ที่เก็บเกมแบบ dict ที่มีอายุ (idle TTL) และจำนวนสูงสุด (LRU cap)
+
+    - ทุกครั้งที่อ่าน/เขียนเกม เวลาหมดอายุจะถูกเลื่อนออกไปอีก ``ttl`` วินาที
+    - เกินจำนวน ``max_games`` เมื่อไร เกมที่ไม่ถูกใช้นานที่สุดจะถูกไล่ออก (evicted)
+    - เกมที่หมดอายุถูกลบโดย ``sweep`` ซึ่งดูเฉพาะ bucket เวลาที่ผ่านไปแล้ว
+      (expiry index แบ่งตามช่วงเวลา ``bucket_seconds``) ไม่ต้อง scan ทุกเกม
+      และเกมที่หมดอายุแต่ยังไม่ถูก sweep จะไม่ถูกมองเห็นอยู่แล้ว
+
+    ``ttl`` หรือ ``max_games`` เป็น 0 หมายถึงไม่จำกัด
+    """
+
+    def __init__(self, ttl: float = 0, max_games: int = 0, bucket_seconds: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_games = max_games
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self._games: "OrderedDict[str, Any]" = OrderedDict()  # เรียงจากใช้ล่าสุดน้อยที่สุด -> มากที่สุด
+        self._expires_at: Dict[str, float] = {}
+        self._bucket_of: Dict[str, int] = {}
+        self._buckets: Dict[int, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.expired = 0
+        self.evicted = 0
+
+    # ---- expiry index ----
+
+    def _touch(self, game_id: str) -> None:
+        """เลื่อนเกมไปท้าย LRU และย้าย bucket หมดอายุ"""
+        self._games.move_to_end(game_id)
+        if not self.ttl:
+            return
+        expires_at = self.clock() + self.ttl
+        self._expires_at[game_id] = expires_at
+        bucket = int(expires_at // self.bucket_seconds)
+        old_bucket = self._bucket_of.get(game_id)
+        if old_bucket == bucket:
+            return
+        if old_bucket is not None:
+            self._discard_from_bucket(game_id, old_bucket)
+        self._bucket_of[game_id] = bucket
+        self._buckets.setdefault(bucket, set()).add(game_id)
+
+    def _discard_from_bucket(self, game_id: str, bucket: int) -> None:
+        members = self._buckets.get(bucket)
+        if members is not None:
+            members.discard(game_id)
+            if not members:
+                del self._buckets[bucket]
+
+    def _remove(self, game_id: str) -> Any:
+        value = self._games.pop(game_id)
+        self._expires_at.pop(game_id, None)
+        bucket = self._bucket_of.pop(game_id, None)
+        if bucket is not None:
+            self._discard_from_bucket(game_id, bucket)
+        return value
+
+    def _is_expired(self, game_id: str, now: float) -> bool:
+        expires_at = self._expires_at.get(game_id)
+        return expires_at is not None and expires_at <= now
+
+    def _expire_if_stale(self, game_id: str) -> bool:
+        """ลบเกมทันทีถ้าหมดอายุแล้ว (ไม่ต้องรอ sweeper) คืน True ถ้าลบ"""
+        if self.ttl and self._is_expired(game_id, self.clock()):
+            self._remove(game_id)
+            self.expired += 1
+            return True
+        return False
+
+    # ---- MutableMapping ----
+
+    def __getitem__(self, game_id: str) -> Any:
+        with self._lock:
+            if game_id not in self._games or self._expire_if_stale(game_id):
+                raise KeyError(game_id)
+            self._touch(game_id)
+            return self._games[game_id]
+
+    def __setitem__(self, game_id: str, value: Any) -> None:
+        with self._lock:
+            self._games[game_id] = value
+            self._touch(game_id)
+            while self.max_games and len(self._games) > self.max_games:
+                oldest = next(iter(self._games))
+                self._remove(oldest)
+                self.evicted += 1
+
+    def __delitem__(self, game_id: str) -> None:
+        with self._lock:
+            self._remove(game_id)
+
+    def __contains__(self, game_id: object) -> bool:
+        with self._lock:
+            return game_id in self._games and not self._expire_if_stale(game_id)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._games))
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    @contextmanager
+    def edit(self, game_id: str) -> Iterator[Optional[Any]]:
+        """
+        เกมที่จะถูกแก้ไข (None ถ้าไม่มี) ใช้กับ ``with store.edit(game_id) as game:``
+
+        เกมอยู่ในหน่วยความจำของ process นี้ การแก้ไข object จึงมีผลทันที ไม่ต้องบันทึกกลับ
+        (store ที่แชร์ข้าม process เช่น SQLiteGameStore ล็อกและบันทึกเกมกลับตอนจบ block)
+        """
+        yield self.get(game_id)
+
+    def peek_values(self, limit: int) -> List[Any]:
+        """เกมไม่เกิน limit เกม (เก่าสุดก่อน) โดยไม่เลื่อนเวลาหมดอายุหรือลำดับ LRU"""
+        with self._lock:
+            return list(islice(self._games.values(), limit))
+
+    def clear(self) -> None:
+        """ลบทุกเกมและรีเซ็ตตัวนับ"""
+        with self._lock:
+            self._games.clear()
+            self._expires_at.clear()
+            self._bucket_of.clear()
+            self._buckets.clear()
+            self.expired = self.evicted = 0
+
+    # ---- sweeper ----
+
+    def sweep(self) -> int:
+        """ลบทุกเกมที่หมดอายุแล้ว โดยดูเฉพาะ bucket ที่เวลาผ่านไปแล้ว คืนจำนวนที่ลบ"""
+        if not self.ttl:
+            return 0
+        removed = 0
+        with self._lock:
+            now = self.clock()
+            current = int(now // self.bucket_seconds)
+            for bucket in sorted(bucket for bucket in self._buckets if bucket <= current):
+                for game_id in list(self._buckets.get(bucket, ())):
+                    # bucket ปัจจุบันอาจมีเกมที่ยังไม่หมดอายุปนอยู่
+                    if self._is_expired(game_id, now):
+                        self._remove(game_id)
+                        removed += 1
+            self.expired += removed
+        return removed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.bucket_seconds):
+            self.sweep()
+
+    def start(self) -> None:
+        """เริ่ม background thread ที่ sweep ทุก ``bucket_seconds`` วินาที"""
+        if not self.ttl or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='game-store-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """หยุด sweeper thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """จำนวนเกมที่ยังอยู่ หมดอายุ และถูกไล่ออก"""
+        with self._lock:
+            return {
+                'active': len(self._games),
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'ttl_seconds': self.ttl,
+                'max_games': self.max_games,
+                'expiry_buckets': len(self._buckets),
+            }
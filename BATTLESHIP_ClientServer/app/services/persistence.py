@@ -0,0 +1,189 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    has_ai INTEGER NOT NULL,
+    ai_difficulty TEXT,
+    created_at REAL NOT NULL,
+    start_time TEXT NOT NULL,
+    game_status TEXT NOT NULL,
+    winner TEXT,
+    end_time TEXT
+);
+CREATE TABLE IF NOT EXISTS shots (
+    game_id TEXT NOT NULL,
+    shot_number INTEGER NOT NULL,
+    cell INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    offset_seconds REAL NOT NULL,
+    PRIMARY KEY (game_id, shot_number)
+) WITHOUT ROWID;
+"""
+
+_INSERT_GAME = "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, NULL, NULL)"
+_INSERT_SHOT = "INSERT OR REPLACE INTO shots VALUES (?, ?, ?, ?, ?)"
+_UPDATE_STATUS = "UPDATE games SET game_status = ?, winner = ?, end_time = ? WHERE game_id = ?"
+
+# ชนิดของรายการใน queue (เขียนตามลำดับนี้ในแต่ละ transaction: เกมต้องมีก่อนนัดและสถานะ)
+_GAME, _SHOT, _STATUS = 0, 1, 2
+_STATEMENTS = (_INSERT_GAME, _INSERT_SHOT, _UPDATE_STATUS)
+
+
+class GamePersistence:
+    """
+    บันทึกเกมและประวัติการยิงลง SQLite (WAL) แบบ write-behind
+
+    ``record_*`` แค่ต่อท้าย deque (ไม่แตะดิสก์) ส่วน background thread ดึงรายการออกทุก
+    ``flush_interval`` วินาทีแล้วเขียนทีละไม่เกิน ``batch_size`` รายการใน transaction เดียว
+    response ของ /fire และ /ai-shot จึงไม่ต้องรอดิสก์เลย
+
+    ถ้าเขียนไม่สำเร็จ (เช่น ดิสก์เต็ม หรือ worker อื่นถือ lock) batch นั้นกลับไปอยู่หน้า queue ตามลำดับเดิม
+    แล้วลองใหม่หลังรอ ``flush_interval`` เพิ่มเป็นเท่าตัวทุกครั้งที่ล้มเหลว (ไม่เกิน ``max_backoff`` วินาที)
+    """
+
+    def __init__(self, path: str, batch_size: int = 512, flush_interval: float = 0.05, max_backoff: float = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._queue: Deque[Tuple] = deque()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self.batches = 0
+        self.written = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.batch_size_max = 0
+
+    # ---- ฝั่ง request (O(1) ไม่มี I/O) ----
+
+    def record_game(self, game) -> None:
+        """เกมใหม่"""
+        self._queue.append((_GAME, (
+            game.game_id, int(game.has_ai), game.ai_difficulty if game.has_ai else None,
+            game.created_at, game.history.start_time.isoformat(), game.game_status,
+        )))
+
+    def record_shot(self, game) -> None:
+        """นัดล่าสุดในประวัติของเกม"""
+        history = game.history
+        index = history.shot_count - 1
+        self._queue.append((_SHOT, (
+            game.game_id, index + 1, history.cells[index], history.flags[index], history.times[index],
+        )))
+
+    def record_status(self, game) -> None:
+        """สถานะเกมเปลี่ยน (เช่น จบเกม)"""
+        history = game.history
+        end_time = history.end_time.isoformat() if history.end_time else None
+        self._queue.append((_STATUS, (game.game_status, history.winner, end_time, game.game_id)))
+
+    # ---- writer ----
+
+    def flush(self, force: bool = False) -> int:
+        """
+        เขียนทุกรายการที่ค้างใน queue (เป็น batch ละไม่เกิน batch_size) คืนจำนวนที่เขียน
+
+        หยุดที่ batch แรกที่เขียนไม่สำเร็จ และไม่ลองใหม่จนกว่าจะพ้นช่วง backoff (ยกเว้น force)
+        """
+        written = 0
+        with self._write_lock:
+            if not force and time.monotonic() < self._retry_at:
+                return 0
+            while self._queue:
+                count = self._write_batch()
+                if count is None:
+                    break
+                written += count
+        return written
+
+    def _write_batch(self) -> Optional[int]:
+        batch: List[Tuple] = []
+        queue = self._queue
+        while queue and len(batch) < self.batch_size:
+            batch.append(queue.popleft())
+
+        rows: Tuple[List, List, List] = ([], [], [])
+        for kind, row in batch:
+            rows[kind].append(row)
+
+        started = time.perf_counter()
+        try:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                for statement, statement_rows in zip(_STATEMENTS, rows):
+                    if statement_rows:
+                        self._connection.executemany(statement, statement_rows)
+        except sqlite3.Error as e:
+            # ไม่ทิ้งข้อมูล: คืน batch ไว้หน้า queue ตามลำดับเดิม แล้วรอก่อนลองใหม่
+            queue.extendleft(reversed(batch))
+            self.errors += 1
+            self.last_error = str(e)
+            self._backoff = min(self.max_backoff, max(self.flush_interval, self._backoff * 2))
+            self._retry_at = time.monotonic() + self._backoff
+            return None
+        self._backoff = self._retry_at = 0.0
+        elapsed = time.perf_counter() - started
+
+        self.batches += 1
+        self.written += len(batch)
+        self.flush_seconds_total += elapsed
+        self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+        self.batch_size_max = max(self.batch_size_max, len(batch))
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def start(self) -> None:
+        """เริ่ม background thread ที่เขียนลงดิสก์ทุก ``flush_interval`` วินาที"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='game-persistence', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """หยุด thread (เขียนรายการที่ค้างให้หมดก่อน)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush(force=True)
+
+    def close(self) -> None:
+        self.stop()
+        self._connection.close()
+
+    def stats(self) -> Dict:
+        """ความยาว queue, จำนวน batch และเวลาที่ใช้เขียนแต่ละ batch"""
+        batches = self.batches
+        return {
+            'path': self.path,
+            'queue_depth': len(self._queue),
+            'batches': batches,
+            'written': self.written,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'retry_in_ms': round(max(0.0, self._retry_at - time.monotonic()) * 1e3, 3),
+            'batch_size_avg': round(self.written / batches, 1) if batches else 0.0,
+            'batch_size_max': self.batch_size_max,
+            'flush_ms_avg': round(self.flush_seconds_total / batches * 1e3, 3) if batches else 0.0,
+            'flush_ms_max': round(self.flush_seconds_max * 1e3, 3),
+        }
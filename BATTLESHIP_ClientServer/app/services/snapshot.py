@@ -0,0 +1,276 @@
+import asyncio
+import glob
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = 'games.snapshot'
+JOURNAL_PREFIX = 'journal.'
+
+# ชนิดของรายการใน journal
+_GAME, _SHOT, _ROTATE = 'game', 'shot', 'rotate'
+
+
+def _journal_generation(path: str) -> int:
+    return int(path.rsplit('.', 1)[1])
+
+
+def read_journal(path: str) -> Iterator[Tuple]:
+    """อ่านรายการใน journal ทีละรายการ (หยุดที่รายการสุดท้ายที่เขียนไม่ครบ เช่น process ตายกลางทาง)"""
+    with open(path, 'rb') as journal:
+        while True:
+            try:
+                yield pickle.load(journal)
+            except EOFError:
+                return
+            except (pickle.UnpicklingError, ValueError, TypeError, AttributeError, IndexError):
+                logger.warning("Journal %s ends with a torn record; replay stops there", path)
+                return
+
+
+class GameSnapshots:
+    """
+    snapshot ของเกมทั้งหมด + journal ของสิ่งที่เกิดหลัง snapshot สำหรับ restart แบบมีเกมครบ
+
+    - ``record_*`` (เรียกใน request) แค่ต่อท้าย deque ส่วน background thread เขียนลง
+      ``journal.<generation>`` ทุก ``flush_interval`` วินาที
+    - ``snapshot`` (ใน event loop) เปิด journal generation ใหม่ แล้ว pickle ทีละเกมเป็นช่วง ๆ
+      เกมแต่ละเกมจึงถูกเก็บแบบสอดคล้องกันเสมอ เขียนไฟล์ใน thread แบบ atomic (tmp + fsync + os.replace)
+      แล้วลบ journal generation เก่า (compaction)
+    - ``restore`` โหลด snapshot แล้วเล่น journal ที่ใหม่กว่าซ้ำ นัดที่อยู่ใน snapshot แล้ว
+      (เลขนัด <= version ของเกม) และเกมที่มีอยู่แล้วจะถูกข้าม
+
+    ทำ snapshot ทุก ``interval`` วินาที หรือเร็วกว่านั้นเมื่อ journal ยาวเกิน ``max_journal_entries``
+    """
+
+    def __init__(self, directory: str, interval: float = 60.0, max_journal_entries: int = 100_000,
+                 flush_interval: float = 0.1, chunk_size: int = 200):
+        self.directory = directory
+        self.interval = interval
+        self.max_journal_entries = max_journal_entries
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        self.generation = 0
+        self._queue: Deque[Tuple] = deque()
+        self._journal_entries = 0
+        self._file = None
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_lock = asyncio.Lock()
+        self._last_snapshot = time.monotonic()
+        self.snapshots = 0
+        self.last_snapshot_bytes = 0
+        self.last_snapshot_ms = 0.0
+        self.last_snapshot_games = 0
+        self.restore_stats: Dict = {}
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    def journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f'{JOURNAL_PREFIX}{generation}')
+
+    def _journal_files(self) -> List[str]:
+        paths = glob.glob(os.path.join(self.directory, JOURNAL_PREFIX + '*'))
+        return sorted((path for path in paths if path.rsplit('.', 1)[1].isdigit()), key=_journal_generation)
+
+    # ---- ฝั่ง request (O(1) ไม่มี I/O) ----
+
+    def record_game(self, game) -> None:
+        """เกมใหม่: เก็บแค่ตำแหน่งเรือและค่าตั้งต้น (AI เริ่มจากศูนย์เสมอ)"""
+        self._queue.append((
+            _GAME, game.game_id, tuple(game.player_board.fleet_masks),
+            tuple(game.ai_board.fleet_masks) if game.ai_board else None,
+            game.has_ai, game.ai_difficulty, game.created_at, game.ai_delay, game.history.start_time,
+        ))
+
+    def record_shot(self, game, shooter: str, row: int, col: int) -> None:
+        """นัดล่าสุดของเกม (เลขนัด = version ของเกมหลังยิง)"""
+        history = game.history
+        self._queue.append((_SHOT, game.game_id, history.shot_count, shooter, row, col, history.times[-1]))
+
+    # ---- journal writer ----
+
+    def _open_journal(self, generation: int) -> None:
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self._file = open(self.journal_path(generation), 'ab')
+        self._journal_entries = 0
+
+    def flush(self) -> int:
+        """เขียนรายการที่ค้างลง journal คืนจำนวนที่เขียน"""
+        written = 0
+        with self._write_lock:
+            if self._file is None:
+                self._open_journal(self.generation)
+            queue = self._queue
+            while queue:
+                entry = queue.popleft()
+                if entry[0] == _ROTATE:
+                    self._open_journal(entry[1])
+                    continue
+                pickle.dump(entry, self._file, pickle.HIGHEST_PROTOCOL)
+                self._journal_entries += 1
+                written += 1
+            self._file.flush()
+        return written
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    # ---- snapshot ----
+
+    async def snapshot(self, games, locks=None) -> int:
+        """
+        เขียน snapshot ของทุกเกมใน ``games`` แล้วลบ journal ที่ไม่ต้องใช้แล้ว คืนขนาดไฟล์ (byte)
+
+        locks: GameLocks ของ service ถ้ามี จะถือ lock ของแต่ละเกมขณะ pickle (เกมที่ AI กำลังยิงใน thread
+        จะถูกเก็บหลังยิงเสร็จ)
+        """
+        async with self._snapshot_lock:
+            started = time.perf_counter()
+            # รายการหลังจุดนี้ไปลง journal generation ใหม่ ซึ่งจะถูกเล่นซ้ำทับ snapshot นี้
+            self.generation += 1
+            generation = self.generation
+            self._queue.append((_ROTATE, generation))
+            self._last_snapshot = time.monotonic()
+
+            records = []
+            values = games.peek_values(len(games))
+            for start in range(0, len(values), self.chunk_size):
+                # pickle ใน event loop ทีละช่วง: ไม่มี request ไหนแก้เกมระหว่างที่ถูก pickle
+                for game in values[start:start + self.chunk_size]:
+                    if locks is None:
+                        records.append(pickle.dumps(game, pickle.HIGHEST_PROTOCOL))
+                        continue
+                    async with locks.hold(game.game_id):
+                        records.append(pickle.dumps(game, pickle.HIGHEST_PROTOCOL))
+                await asyncio.sleep(0)
+
+            size = await asyncio.to_thread(self._write_snapshot, generation, records)
+            self.snapshots += 1
+            self.last_snapshot_bytes = size
+            self.last_snapshot_games = len(records)
+            self.last_snapshot_ms = round((time.perf_counter() - started) * 1e3, 3)
+            return size
+
+    def _write_snapshot(self, generation: int, records: List[bytes]) -> int:
+        self.flush()  # ปิด journal generation เก่าให้เรียบร้อยก่อนลบ
+        path = self.snapshot_path
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as snapshot:
+            pickle.dump({'generation': generation, 'games': records}, snapshot, pickle.HIGHEST_PROTOCOL)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, path)
+        for journal in self._journal_files():
+            if _journal_generation(journal) < generation:
+                os.remove(journal)
+        return os.path.getsize(path)
+
+    def needs_snapshot(self) -> bool:
+        return (time.monotonic() - self._last_snapshot >= self.interval
+                or self._journal_entries + len(self._queue) >= self.max_journal_entries)
+
+    async def _snapshot_loop(self, games, locks) -> None:
+        while True:
+            await asyncio.sleep(min(1.0, self.interval))
+            if self.needs_snapshot():
+                try:
+                    await self.snapshot(games, locks)
+                except OSError:
+                    logger.exception("Game snapshot failed")
+
+    # ---- restore ----
+
+    def restore(self, service) -> Dict:
+        """โหลด snapshot และเล่น journal ซ้ำเข้า ``service`` (GameService) คืนสถิติการ restore"""
+        started = time.perf_counter()
+        snapshot_generation = 0
+        snapshot_bytes = 0
+        restored = 0
+        if os.path.exists(self.snapshot_path):
+            snapshot_bytes = os.path.getsize(self.snapshot_path)
+            with open(self.snapshot_path, 'rb') as snapshot:
+                data = pickle.load(snapshot)
+            snapshot_generation = data['generation']
+            for record in data['games']:
+                game = pickle.loads(record)
+                service.games[game.game_id] = game
+                restored += 1
+
+        replayed = 0
+        journals = [path for path in self._journal_files() if _journal_generation(path) >= snapshot_generation]
+        for path in journals:
+            for entry in read_journal(path):
+                if entry[0] == _GAME:
+                    replayed += service.restore_game(*entry[1:])
+                elif entry[0] == _SHOT:
+                    replayed += service.replay_shot(*entry[1:])
+
+        # เขียนต่อใน generation ใหม่เสมอ (ไม่ต่อท้าย journal ที่อาจมีรายการขาดอยู่ท้ายไฟล์)
+        generations = [_journal_generation(path) for path in self._journal_files()]
+        self.generation = max(generations + [snapshot_generation]) + 1
+        self.restore_stats = {
+            'restored_games': restored,
+            'replayed_entries': replayed,
+            'journals': len(journals),
+            'snapshot_bytes': snapshot_bytes,
+            'restore_ms': round((time.perf_counter() - started) * 1e3, 3),
+        }
+        logger.info("Restored %(restored_games)d games and %(replayed_entries)d journal entries "
+                    "from a %(snapshot_bytes)d-byte snapshot in %(restore_ms).1f ms", self.restore_stats)
+        return self.restore_stats
+
+    # ---- lifecycle ----
+
+    def start(self, games, locks=None) -> None:
+        """เริ่ม journal writer thread และ task ที่ทำ snapshot ตามรอบ (ต้องเรียกใน event loop)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='game-journal', daemon=True)
+            self._thread.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._snapshot_loop(games, locks))
+
+    async def stop(self, games, locks=None) -> None:
+        """หยุดงานเบื้องหลัง แล้วทำ snapshot สุดท้าย (restart ครั้งหน้าไม่ต้องเล่น journal)"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        await self.snapshot(games, locks)
+        with self._write_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict:
+        """ขนาด/เวลาของ snapshot ล่าสุด ความยาว journal และผลการ restore ตอนเริ่ม"""
+        return {
+            'directory': self.directory,
+            'generation': self.generation,
+            'snapshots': self.snapshots,
+            'last_snapshot_games': self.last_snapshot_games,
+            'last_snapshot_bytes': self.last_snapshot_bytes,
+            'last_snapshot_ms': self.last_snapshot_ms,
+            'journal_entries': self._journal_entries,
+            'journal_queue_depth': len(self._queue),
+            'restore': self.restore_stats,
+        }
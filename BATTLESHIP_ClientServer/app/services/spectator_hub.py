@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+
+class Subscription:
+    """ผู้ชมหนึ่งคนของเกมหนึ่งเกม: queue ของข้อความ (JSON string) ที่ยาวได้ไม่เกิน max_queue"""
+
+    __slots__ = ('game_id', 'queue', 'loop', 'dropped')
+
+    def __init__(self, game_id: str, max_queue: int, loop: asyncio.AbstractEventLoop):
+        self.game_id = game_id
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.loop = loop
+        self.dropped = False
+
+    async def get(self) -> Optional[str]:
+        """ข้อความถัดไป หรือ None ถ้าถูกตัดออกเพราะอ่านไม่ทัน"""
+        return await self.queue.get()
+
+
+class SpectatorHub:
+    """
+    pub/sub ต่อเกมสำหรับผู้ชม
+
+    ``publish`` แปลง event เป็น JSON ครั้งเดียวแล้วใส่ string เดียวกันลง queue ของผู้ชมทุกคน
+    ผู้ชมที่ queue เต็ม (อ่านไม่ทัน) จะถูกตัดออกทันที เกมจึงไม่ต้องรอผู้ชมที่ช้า
+    ``publish`` เรียกจาก thread อื่นได้ (ส่งต่อเข้า event loop ของผู้ชมด้วย call_soon_threadsafe)
+
+    เวลา fan-out วัดต่อข้อความ ตั้งแต่ publish จนข้อความเข้า queue ของผู้ชม (รวมเวลารอ event loop
+    ของผู้ชมเมื่อ publish จาก thread อื่น เช่น AI ที่ยิงใน ai_executor)
+    """
+
+    def __init__(self, max_queue: int = 64):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.fanout_seconds_total = 0.0
+        self.fanout_seconds_max = 0.0
+        self.max_queue_depth = 0
+
+    def has_subscribers(self, game_id: str) -> bool:
+        return game_id in self._subscribers
+
+    def subscribe(self, game_id: str) -> Subscription:
+        """ลงทะเบียนผู้ชม (ต้องเรียกใน event loop ที่จะอ่าน subscription)"""
+        subscription = Subscription(game_id, self.max_queue, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(game_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.game_id]
+
+    def publish(self, game_id: str, event: Dict[str, Any]) -> int:
+        """ส่ง event ให้ผู้ชมทุกคนของเกม คืนจำนวนผู้ชมที่ส่งถึง"""
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(game_id, ()))
+        if not subscribers:
+            return 0
+
+        published_at = time.perf_counter()
+        payload = json.dumps(event, separators=(',', ':'))
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        for subscription in subscribers:
+            if subscription.loop is running_loop:
+                self._deliver(subscription, payload, published_at)
+            else:
+                try:
+                    subscription.loop.call_soon_threadsafe(self._deliver, subscription, payload, published_at)
+                except RuntimeError:  # event loop ของผู้ชมปิดไปแล้ว
+                    self.unsubscribe(subscription)
+
+        with self._lock:
+            self.published += 1
+        return len(subscribers)
+
+    def _deliver(self, subscription: Subscription, payload: str, published_at: float) -> None:
+        if subscription.dropped:
+            return
+        queue = subscription.queue
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self._drop(subscription)
+            return
+        latency = time.perf_counter() - published_at
+        with self._lock:
+            self.delivered += 1
+            self.fanout_seconds_total += latency
+            self.fanout_seconds_max = max(self.fanout_seconds_max, latency)
+            self.max_queue_depth = max(self.max_queue_depth, queue.qsize())
+
+    def _drop(self, subscription: Subscription) -> None:
+        """ตัดผู้ชมที่อ่านไม่ทัน: ล้าง queue แล้วใส่ None ให้ฝั่งผู้อ่านรู้ว่าถูกตัด"""
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        with self._lock:
+            self.dropped += 1
+
+    def clear(self) -> None:
+        """ลบผู้ชมทั้งหมดและรีเซ็ตตัวนับ"""
+        with self._lock:
+            self._subscribers.clear()
+            self.published = self.delivered = self.dropped = 0
+            self.fanout_seconds_total = self.fanout_seconds_max = 0.0
+            self.max_queue_depth = 0
+
+    def stats(self) -> Dict:
+        """จำนวนผู้ชม ข้อความที่ส่ง/ตัดทิ้ง เวลา fan-out ต่อข้อความที่ส่งถึง และความยาว queue"""
+        with self._lock:
+            subscribers = [subscription for group in self._subscribers.values() for subscription in group]
+            published = self.published
+            delivered = self.delivered
+            return {
+                'games': len(self._subscribers),
+                'subscribers': len(subscribers),
+                'published': published,
+                'delivered': delivered,
+                'dropped': self.dropped,
+                'fanout_us_avg': round(self.fanout_seconds_total / delivered * 1e6, 1) if delivered else 0.0,
+                'fanout_us_max': round(self.fanout_seconds_max * 1e6, 1),
+                'queue_depth': max((subscription.queue.qsize() for subscription in subscribers), default=0),
+                'max_queue_depth': self.max_queue_depth,
+                'max_queue': self.max_queue,
+            }
@@ -0,0 +1,286 @@
+import pickle
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS live_games (
+    game_id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    touched_at REAL NOT NULL,
+    expires_at REAL,
+    version INTEGER
+);
+CREATE INDEX IF NOT EXISTS live_games_touched ON live_games (touched_at);
+CREATE INDEX IF NOT EXISTS live_games_expires ON live_games (expires_at);
+"""
+
+_UPSERT = ("INSERT INTO live_games (game_id, data, touched_at, expires_at, version) VALUES (?, ?, ?, ?, ?) "
+           "ON CONFLICT (game_id) DO UPDATE SET data = excluded.data, touched_at = excluded.touched_at, "
+           "expires_at = excluded.expires_at, version = excluded.version")
+_LIVE = "(expires_at IS NULL OR expires_at > ?)"
+
+
+class SQLiteGameStore(MutableMapping):
+    """
+    ที่เก็บเกมที่แชร์ระหว่าง worker process บนเครื่องเดียวกัน (ไฟล์ SQLite แบบ WAL)
+
+    ใช้แทน GameStore ได้ทันที (interface เดียวกัน: mapping + ``edit``/``peek_values``/``sweep``/``stats``)
+    แต่ละ operation โหลด/บันทึกเฉพาะแถวของเกมที่ใช้ (เกมถูก pickle เป็น BLOB หนึ่งแถว)
+
+    - อ่าน: SELECT แถวเดียว ไม่ล็อก (WAL ให้อ่านพร้อมกับการเขียนได้)
+    - ``edit``: ``BEGIN IMMEDIATE`` -> โหลด -> แก้ -> บันทึก -> ``COMMIT`` ตาเดียวกันจาก
+      worker อื่นจึงรอกันแทนที่จะเขียนทับกัน (SQLite ล็อกการเขียนทั้งไฟล์ ไม่ใช่ทีละแถว
+      แต่ transaction สั้นมาก: unpickle + ยิง + pickle ของเกมเดียว)
+    - หมดอายุ (``ttl``) และไล่เกมที่ไม่ถูกใช้นานที่สุดเมื่อเกิน ``max_games`` เหมือน GameStore
+      ใช้เวลา wall clock เพราะทุก process ต้องเห็นเวลาเดียวกัน
+
+    ตัวนับ expired/evicted ใน ``stats`` เป็นของ process นี้เท่านั้น
+
+    version_of: ฟังก์ชันที่คืน version ของเกม เก็บไว้ในคอลัมน์ ``version`` ทุกครั้งที่บันทึก
+    ``version(game_id)`` จึงอ่านได้โดยไม่ต้อง unpickle ทั้งเกม (เช่น เช็ก ETag)
+    """
+
+    def __init__(self, path: str, ttl: float = 0, max_games: int = 0, sweep_seconds: float = 10.0,
+                 busy_timeout: float = 10.0, clock: Callable[[], float] = time.time,
+                 version_of: Optional[Callable[[Any], int]] = None):
+        self.path = path
+        self.version_of = version_of
+        self.ttl = ttl
+        self.max_games = max_games
+        self.sweep_seconds = sweep_seconds
+        self.busy_timeout = busy_timeout
+        self.clock = clock
+        # เลื่อนเวลาหมดอายุตอนอ่านเมื่อผ่านไปเกิน 1/10 ของ ttl แล้วเท่านั้น (การอ่านส่วนใหญ่จึงไม่ต้องเขียน)
+        self.touch_after = ttl / 10
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+        self.edits = 0
+        self.lock_wait_seconds_total = 0.0
+        self.lock_wait_seconds_max = 0.0
+        self._add_version_column(self._connection())  # สร้างตารางตั้งแต่ตอนเริ่ม
+
+    # ---- connection (หนึ่ง connection ต่อ thread) ----
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.editing = {}
+        return connection
+
+    @staticmethod
+    def _add_version_column(connection: sqlite3.Connection) -> None:
+        """ไฟล์ที่สร้างก่อนมีคอลัมน์ version: เพิ่มคอลัมน์ (แถวเดิมได้ NULL = ต้องโหลดเกมมาดู)"""
+        columns = [name for _, name, *_ in connection.execute("PRAGMA table_info(live_games)")]
+        if 'version' not in columns:
+            try:
+                connection.execute("ALTER TABLE live_games ADD COLUMN version INTEGER")
+            except sqlite3.OperationalError:  # worker อื่นเพิ่มไปพร้อมกันแล้ว
+                pass
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """transaction สำหรับเขียน (ถ้าอยู่ใน ``edit`` แล้วใช้ transaction เดิม)"""
+        connection = self._connection()
+        if connection.in_transaction:
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return now + self.ttl if self.ttl else None
+
+    def _row(self, game_id: str, value: Any, now: float) -> tuple:
+        version = self.version_of(value) if self.version_of else None
+        return game_id, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now, self._expiry(now), version
+
+    def _touch(self, game_id: str, now: float, expires_at: Optional[float]) -> None:
+        """เลื่อนเวลาหมดอายุของเกมที่ถูกอ่าน"""
+        if expires_at is not None and expires_at - now < self.ttl - self.touch_after:
+            with self._write() as writer:
+                writer.execute("UPDATE live_games SET touched_at = ?, expires_at = ? WHERE game_id = ?",
+                               (now, self._expiry(now), game_id))
+
+    # ---- MutableMapping ----
+
+    def _load(self, connection: sqlite3.Connection, game_id: str) -> Any:
+        now = self.clock()
+        row = connection.execute("SELECT data, expires_at FROM live_games WHERE game_id = ?", (game_id,)).fetchone()
+        if row is None:
+            raise KeyError(game_id)
+        data, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            with self._write() as writer:
+                writer.execute("DELETE FROM live_games WHERE game_id = ? AND expires_at <= ?", (game_id, now))
+            with self._stats_lock:
+                self.expired += 1
+            raise KeyError(game_id)
+        self._touch(game_id, now, expires_at)
+        return pickle.loads(data)
+
+    def __getitem__(self, game_id: str) -> Any:
+        return self._load(self._connection(), game_id)
+
+    def __setitem__(self, game_id: str, value: Any) -> None:
+        row = self._row(game_id, value, self.clock())
+        with self._write() as connection:
+            connection.execute(_UPSERT, row)
+            if self.max_games:
+                (count,) = connection.execute("SELECT COUNT(*) FROM live_games").fetchone()
+                if count > self.max_games:
+                    connection.execute(
+                        "DELETE FROM live_games WHERE game_id IN "
+                        "(SELECT game_id FROM live_games ORDER BY touched_at LIMIT ?)", (count - self.max_games,))
+                    with self._stats_lock:
+                        self.evicted += count - self.max_games
+        editing = self._local.editing
+        if game_id in editing:
+            editing[game_id] = True  # ถูกแทนที่ระหว่าง edit (เช่น archive) ไม่ต้องบันทึกเกมเดิมทับ
+
+    def __delitem__(self, game_id: str) -> None:
+        with self._write() as connection:
+            if connection.execute("DELETE FROM live_games WHERE game_id = ?", (game_id,)).rowcount == 0:
+                raise KeyError(game_id)
+
+    def __contains__(self, game_id: object) -> bool:
+        row = self._connection().execute(
+            f"SELECT 1 FROM live_games WHERE game_id = ? AND {_LIVE}", (game_id, self.clock())).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection().execute(f"SELECT game_id FROM live_games WHERE {_LIVE}", (self.clock(),))
+        return iter([game_id for (game_id,) in rows.fetchall()])
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute(
+            f"SELECT COUNT(*) FROM live_games WHERE {_LIVE}", (self.clock(),)).fetchone()
+        return count
+
+    @contextmanager
+    def edit(self, game_id: str) -> Iterator[Optional[Any]]:
+        """
+        ล็อกการเขียน โหลดเกม (None ถ้าไม่มี) แล้วบันทึกกลับตอนจบ block ใน transaction เดียว
+        ถ้า block เกิด exception จะ rollback (เกมใน store ไม่เปลี่ยน)
+        """
+        connection = self._connection()
+        started = time.perf_counter()
+        connection.execute("BEGIN IMMEDIATE")
+        waited = time.perf_counter() - started
+        editing = self._local.editing
+        editing[game_id] = False
+        try:
+            try:
+                game = self._load(connection, game_id)
+            except KeyError:
+                game = None
+            yield game
+            if game is not None and not editing[game_id]:
+                connection.execute(_UPSERT, self._row(game_id, game, self.clock()))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            del editing[game_id]
+        connection.execute("COMMIT")
+        with self._stats_lock:
+            self.edits += 1
+            self.lock_wait_seconds_total += waited
+            self.lock_wait_seconds_max = max(self.lock_wait_seconds_max, waited)
+
+    def version(self, game_id: str) -> Optional[int]:
+        """version ของเกมจากคอลัมน์ version โดยไม่ unpickle (None ถ้าไม่มีเกม/หมดอายุ) เลื่อนเวลาหมดอายุเหมือนการอ่าน"""
+        now = self.clock()
+        row = self._connection().execute(
+            "SELECT version, expires_at FROM live_games WHERE game_id = ?", (game_id,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        version, expires_at = row
+        if version is None:  # แถวที่บันทึกก่อนมีคอลัมน์นี้
+            game = self.get(game_id)
+            return None if game is None or not self.version_of else self.version_of(game)
+        self._touch(game_id, now, expires_at)
+        return version
+
+    def peek_values(self, limit: int) -> List[Any]:
+        """เกมไม่เกิน limit เกม (เก่าสุดก่อน) โดยไม่เลื่อนเวลาหมดอายุ"""
+        rows = self._connection().execute(
+            f"SELECT data FROM live_games WHERE {_LIVE} ORDER BY touched_at LIMIT ?", (self.clock(), limit))
+        return [pickle.loads(data) for (data,) in rows.fetchall()]
+
+    def clear(self) -> None:
+        """ลบทุกเกมและรีเซ็ตตัวนับ"""
+        with self._write() as connection:
+            connection.execute("DELETE FROM live_games")
+        with self._stats_lock:
+            self.expired = self.evicted = self.edits = 0
+            self.lock_wait_seconds_total = self.lock_wait_seconds_max = 0.0
+
+    # ---- sweeper ----
+
+    def sweep(self) -> int:
+        """ลบทุกเกมที่หมดอายุแล้ว (ใช้ index ของ expires_at) คืนจำนวนที่ลบ"""
+        if not self.ttl:
+            return 0
+        with self._write() as connection:
+            removed = connection.execute("DELETE FROM live_games WHERE expires_at <= ?", (self.clock(),)).rowcount
+        with self._stats_lock:
+            self.expired += removed
+        return removed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                self.sweep()
+            except sqlite3.OperationalError:  # worker อื่นถือ lock นานเกิน busy_timeout: รอบหน้าค่อยลบ
+                pass
+
+    def start(self) -> None:
+        """เริ่ม background thread ที่ sweep ทุก ``sweep_seconds`` วินาที"""
+        if not self.ttl or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='game-store-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """หยุด sweeper thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """จำนวนเกมที่ยังอยู่ (ทุก worker) หมดอายุ/ถูกไล่ออก และเวลารอ lock ของ process นี้"""
+        with self._stats_lock:
+            edits = self.edits
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'active': len(self),
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'ttl_seconds': self.ttl,
+                'max_games': self.max_games,
+                'edits': edits,
+                'lock_wait_ms_avg': round(self.lock_wait_seconds_total / edits * 1e3, 3) if edits else 0.0,
+                'lock_wait_ms_max': round(self.lock_wait_seconds_max * 1e3, 3),
+            }
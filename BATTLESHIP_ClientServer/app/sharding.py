@@ -0,0 +1,613 @@
+"""
+Game-id sharding across worker processes.
+
+``python -m app.sharding --workers 4`` starts N uvicorn workers of
+``app.main`` on local ports. Each worker keeps its own in-memory
+``GameService`` shard. A small front router is served on ``--port``.
+The router hashes the ``game_id`` in the request path onto a
+consistent-hash ring, so every request for a game reaches the worker
+that holds it. Requests and responses are forwarded as raw bytes, so no
+game state is serialized per request. ``POST /games`` gets its id from
+the router (sent to the shard in ``X-Battleship-Game-Id``), so a new
+game is created directly on its shard.
+
+Adding or removing a shard (``POST /shards``, ``DELETE /shards/{name}``)
+moves only the games whose owner changes on the ring. Games move through
+the shard-only ``/internal/games`` endpoints while new requests are
+held back. Those endpoints only answer requests signed with the shared
+``BATTLESHIP_SHARD_SECRET`` (see :func:`internal_signature`), and the
+games themselves are signed by the exporting shard.
+
+``POST``/``DELETE /shards`` need ``Authorization: Bearer <token>`` with
+``BATTLESHIP_ROUTER_ADMIN_TOKEN`` (unset = disabled), and a new shard's
+URL must be on an allowed host (loopback, plus ``BATTLESHIP_SHARD_HOSTS``).
+``GET /shards`` reports each shard's live games, routed and in-flight
+requests, and share of the ring.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import hmac
+import itertools
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, WebSocket
+from pydantic import BaseModel
+
+try:
+    import websockets
+except ImportError:  # optional: without it the router cannot proxy /ws and /spectate
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+GAME_ID_HEADER = "x-battleship-game-id"
+# HMAC of the method and path of a router-to-shard ``/internal`` request.
+SHARD_AUTH_HEADER = "x-battleship-shard-auth"
+LOOPBACK_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+
+# Headers that describe one hop and must not be copied between connections.
+_HOP_BY_HOP = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "content-length", "host",
+})
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def internal_signature(secret: bytes, method: str, path: str) -> str:
+    """Value of ``SHARD_AUTH_HEADER`` for a request to a shard's ``/internal`` endpoints."""
+    return hmac.new(secret, f"{method} {path}".encode(), hashlib.sha256).hexdigest()
+
+
+def _upstream_path(request: Request) -> str:
+    """
+    The path to send to the shard, rebuilt from the request's own segments.
+
+    Paths with ``.``/``..`` or empty segments, backslashes or encoded slashes
+    are refused: the HTTP client would resolve them into another path on the
+    shard (such as ``/internal``) after the router has checked it.
+    """
+    raw_path = (request.scope.get("raw_path") or b"").split(b"?", 1)[0].lower()
+    path = request.url.path
+    parts = path.strip("/").split("/")
+    if (b"%2f" in raw_path or b"%5c" in raw_path or "\\" in path
+            or (parts != [""] and any(part in ("", ".", "..") for part in parts))):
+        raise HTTPException(status_code=400, detail="Invalid path")
+    if parts[0] == "internal":
+        raise HTTPException(status_code=404, detail="Not Found")
+    return "/" + "/".join(quote(part, safe="") for part in parts)
+
+
+class HashRing:
+    """Consistent-hash ring with ``replicas`` virtual points per node."""
+
+    SPACE = 1 << 64
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas
+        self.nodes: List[str] = []
+        self._points: List[Tuple[int, str]] = []
+        self._keys: List[int] = []
+        for node in nodes:
+            self.add(node)
+
+    def _rebuild(self) -> None:
+        self._points = sorted((_hash(f"{node}#{replica}"), node)
+                              for node in self.nodes for replica in range(self.replicas))
+        self._keys = [point for point, _ in self._points]
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            raise ValueError(f"Node {node} is already on the ring")
+        self.nodes.append(node)
+        self._rebuild()
+
+    def remove(self, node: str) -> None:
+        self.nodes.remove(node)
+        self._rebuild()
+
+    def copy(self) -> "HashRing":
+        ring = HashRing(replicas=self.replicas)
+        ring.nodes = list(self.nodes)
+        ring._points = list(self._points)
+        ring._keys = list(self._keys)
+        return ring
+
+    def node_for(self, key: str) -> str:
+        """The node that owns ``key``: the first point clockwise from its hash."""
+        if not self._points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+    def shares(self) -> Dict[str, float]:
+        """Fraction of the hash space (and so of new games) that each node owns."""
+        owned = dict.fromkeys(self.nodes, 0)
+        previous = self._keys[-1] - self.SPACE if self._keys else 0
+        for point, node in self._points:
+            owned[node] += point - previous
+            previous = point
+        return {node: span / self.SPACE for node, span in owned.items()}
+
+
+class ShardLoad:
+    """Counters the router keeps for one shard."""
+
+    __slots__ = ("url", "routed", "in_flight", "errors", "migrated_in", "migrated_out")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.routed = 0
+        self.in_flight = 0
+        self.errors = 0
+        self.migrated_in = 0
+        self.migrated_out = 0
+
+
+class ShardRequest(BaseModel):
+    name: str
+    url: str
+
+
+class ShardRouter:
+    """
+    Front router that sends each game's requests to the shard that owns it.
+
+    ``app`` is the ASGI application to serve. Shards are base URLs of
+    ``app.main`` workers started with ``BATTLESHIP_SHARD_NAME``.
+    """
+
+    def __init__(self, shards: Mapping[str, str] = (), replicas: int = 128, timeout: float = 30.0,
+                 secret: Optional[bytes] = None, admin_token: Optional[str] = None,
+                 allowed_hosts: Iterable[str] = LOOPBACK_HOSTS):
+        self.ring = HashRing(replicas=replicas)
+        # POST/DELETE /shards need this bearer token; without one they are disabled
+        self.admin_token = admin_token or os.environ.get("BATTLESHIP_ROUTER_ADMIN_TOKEN") or None
+        # hosts a shard URL may point at (the router sends signed requests and game data there)
+        self.allowed_hosts = frozenset(allowed_hosts)
+        # shared with the shards (their BATTLESHIP_SHARD_SECRET) to sign /internal requests
+        self.secret = secret or os.environ.get("BATTLESHIP_SHARD_SECRET", "").encode()
+        if not self.secret:
+            raise ValueError("ShardRouter needs the shards' BATTLESHIP_SHARD_SECRET")
+        self.timeout = timeout
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.load: Dict[str, ShardLoad] = {}
+        self._round_robin = itertools.count()
+        # Requests in flight versus a rebalance: a rebalance waits for in-flight
+        # requests to drain and holds new ones until the ring is switched.
+        self._gate = asyncio.Condition()
+        self._active = 0
+        self._rebalancing = False
+        self.rebalances = 0
+        # game_id -> proxied WebSocket sessions as (stop, stopped) events; a game's
+        # sessions are closed before it moves so no turn lands on the old shard
+        self._sockets: Dict[str, Set[Tuple[asyncio.Event, asyncio.Event]]] = {}
+        for name, url in dict(shards).items():
+            self.check_url(url)
+            self._attach(name, url)
+            self.ring.add(name)
+        self.app = self._build_app()
+
+    # ---- shards ----
+
+    def check_url(self, url: str) -> None:
+        """Raise ValueError unless ``url`` is a plain http(s) base URL on an allowed host."""
+        try:
+            parts = urlsplit(url)
+            parts.port  # raises ValueError for a port that is not a number
+        except ValueError:
+            raise ValueError(f"Invalid shard URL {url!r}")
+        if (parts.scheme not in ("http", "https") or parts.hostname not in self.allowed_hosts
+                or parts.username is not None or parts.path.strip("/") or parts.query or parts.fragment):
+            raise ValueError(f"Shard URL {url!r} is not an http(s) base URL on an allowed host")
+
+    def _attach(self, name: str, url: str, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        self.clients[name] = httpx.AsyncClient(base_url=url, transport=transport, timeout=self.timeout)
+        self.load[name] = ShardLoad(url)
+
+    async def _detach(self, name: str) -> None:
+        del self.load[name]
+        await self.clients.pop(name).aclose()
+
+    async def add_shard(self, name: str, url: str, transport: Optional[httpx.AsyncBaseTransport] = None) -> int:
+        """
+        Put a shard on the ring and move the games it now owns to it. Returns the number moved.
+
+        If a move fails, the games already moved go back and the shard is not added.
+        """
+        if name in self.load:
+            raise ValueError(f"Shard {name} already exists")
+        self.check_url(url)
+        async with self._rebalance():
+            self._attach(name, url, transport)
+            ring = self.ring.copy()
+            ring.add(name)
+            try:
+                moved = await self._migrate(ring, self.ring.nodes)
+            except BaseException:
+                await self._detach(name)
+                raise
+            self.ring = ring
+        return moved
+
+    async def remove_shard(self, name: str) -> int:
+        """
+        Move every game off a shard, then take it off the ring. Returns the number moved.
+
+        If a move fails, the games already moved go back and the shard stays.
+        """
+        if name not in self.load:
+            raise KeyError(name)
+        if len(self.ring.nodes) == 1:
+            raise ValueError("Cannot remove the last shard")
+        async with self._rebalance():
+            ring = self.ring.copy()
+            ring.remove(name)
+            moved = await self._migrate(ring, [name])
+            self.ring = ring
+            await self._detach(name)
+        return moved
+
+    async def _internal(self, shard: str, method: str, path: str, content: bytes = b"") -> httpx.Response:
+        """A signed request to a shard's ``/internal`` endpoints."""
+        return await self.clients[shard].request(
+            method, path, content=content,
+            headers={SHARD_AUTH_HEADER: internal_signature(self.secret, method, path)})
+
+    async def _move_game(self, game_id: str, source: str, target: str) -> bool:
+        """Copy one game from ``source`` to ``target``. False if ``source`` no longer has it."""
+        path = f"/internal/games/{quote(game_id, safe='')}"
+        exported = await self._internal(source, "GET", path)
+        if exported.status_code == 404:  # expired while we were moving others
+            return False
+        exported.raise_for_status()
+        imported = await self._internal(target, "PUT", path, exported.content)
+        imported.raise_for_status()
+        return True
+
+    async def _drop_game(self, game_id: str, shard: str) -> None:
+        deleted = await self._internal(shard, "DELETE", f"/internal/games/{quote(game_id, safe='')}")
+        if deleted.status_code != 404:
+            deleted.raise_for_status()
+
+    async def _migrate(self, ring: HashRing, sources: Iterable[str]) -> int:
+        """
+        Move the games on ``sources`` whose owner on ``ring`` is another shard.
+
+        All or nothing: on an ``httpx.HTTPError`` the games already copied are
+        moved back to their source (the ring is unchanged) and the error is raised.
+        """
+        moved: List[Tuple[str, str, str]] = []
+        try:
+            for source in list(sources):
+                listing = await self._internal(source, "GET", "/internal/games")
+                listing.raise_for_status()
+                for game_id in listing.json()["game_ids"]:
+                    target = ring.node_for(game_id)
+                    if target == source:
+                        continue
+                    await self._close_sockets(game_id)
+                    if not await self._move_game(game_id, source, target):
+                        continue
+                    moved.append((game_id, source, target))
+                    await self._drop_game(game_id, source)
+        except httpx.HTTPError:
+            await self._move_back(moved)
+            raise
+        for _, source, target in moved:
+            self.load[source].migrated_out += 1
+            self.load[target].migrated_in += 1
+        self.rebalances += 1
+        return len(moved)
+
+    async def _move_back(self, moved: List[Tuple[str, str, str]]) -> None:
+        for game_id, source, target in reversed(moved):
+            try:
+                # the copy on the source may already be gone, so copy back from the target
+                if await self._move_game(game_id, target, source):
+                    await self._drop_game(game_id, target)
+            except httpx.HTTPError:
+                logger.exception("Could not move game %s back from shard %s to %s", game_id, target, source)
+
+    @asynccontextmanager
+    async def _rebalance(self) -> AsyncIterator[None]:
+        async with self._gate:
+            await self._gate.wait_for(lambda: not self._rebalancing)
+            self._rebalancing = True
+            await self._gate.wait_for(lambda: self._active == 0)
+        try:
+            yield
+        finally:
+            async with self._gate:
+                self._rebalancing = False
+                self._gate.notify_all()
+
+    @asynccontextmanager
+    async def _routing(self) -> AsyncIterator[None]:
+        async with self._gate:
+            await self._gate.wait_for(lambda: not self._rebalancing)
+            self._active += 1
+        try:
+            yield
+        finally:
+            async with self._gate:
+                self._active -= 1
+                self._gate.notify_all()
+
+    # ---- routing ----
+
+    def shard_for(self, method: str, path: str) -> Tuple[str, Optional[str]]:
+        """The shard for a request, plus the id to create when it is ``POST /games``."""
+        parts = path.strip("/").split("/")
+        if method == "POST" and parts == ["games"]:
+            new_game_id = str(uuid.uuid4())[:8]
+            return self.ring.node_for(new_game_id), new_game_id
+        if parts[0] == "games" and len(parts) > 1:
+            return self.ring.node_for(parts[1]), None
+        # Requests about no particular game (/ships, /metrics ...) go round-robin.
+        nodes = self.ring.nodes
+        return nodes[next(self._round_robin) % len(nodes)], None
+
+    async def forward(self, request: Request) -> Response:
+        path = _upstream_path(request)
+        headers = [(key, value) for key, value in request.headers.items()
+                   if key not in _HOP_BY_HOP and key not in (GAME_ID_HEADER, SHARD_AUTH_HEADER)]
+        body = await request.body()
+
+        async with self._routing():
+            shard, new_game_id = self.shard_for(request.method, path)
+            if new_game_id:
+                headers.append((GAME_ID_HEADER, new_game_id))
+            client = self.clients[shard]
+            load = self.load[shard]
+            load.routed += 1
+            load.in_flight += 1
+            try:
+                upstream = await client.send(
+                    client.build_request(request.method, path, params=request.url.query, headers=headers,
+                                         content=body),
+                    stream=True)
+                try:
+                    # raw bytes: a gzip body from the shard is passed on as is
+                    content = b"".join([chunk async for chunk in upstream.aiter_raw()])
+                finally:
+                    await upstream.aclose()
+            except httpx.HTTPError:
+                load.errors += 1
+                raise HTTPException(status_code=502, detail=f"Shard {shard} is unavailable")
+            finally:
+                load.in_flight -= 1
+
+        response_headers = {key: value for key, value in upstream.headers.items() if key not in _HOP_BY_HOP}
+        return Response(content, status_code=upstream.status_code, headers=response_headers)
+
+    async def proxy_websocket(self, websocket: WebSocket, game_id: str) -> None:
+        """Relay a game's WebSocket to its shard, frame by frame, until either side closes."""
+        if websockets is None:
+            await websocket.close(code=1011, reason="WebSocket proxying needs the websockets package")
+            return
+        await websocket.accept()
+        stop, stopped = session = asyncio.Event(), asyncio.Event()
+        # connect through the gate: a rebalance either sees this session (and closes
+        # it before the game moves) or has finished before the shard is looked up
+        async with self._routing():
+            shard = self.ring.node_for(game_id)
+            url = self.load[shard].url.replace("http", "ws", 1) + websocket.url.path
+            if websocket.url.query:
+                url += "?" + websocket.url.query
+            try:
+                upstream = await websockets.connect(url)
+            except (OSError, websockets.WebSocketException):
+                await websocket.close(code=1011, reason=f"Shard {shard} is unavailable")
+                return
+            self._sockets.setdefault(game_id, set()).add(session)
+
+        async def client_to_shard():
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                await upstream.send(message.get("text") or message.get("bytes"))
+
+        async def shard_to_client():
+            async for message in upstream:
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+
+        tasks = {asyncio.ensure_future(client_to_shard()), asyncio.ensure_future(shard_to_client()),
+                 asyncio.ensure_future(stop.wait())}
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await upstream.close()
+            sessions = self._sockets.get(game_id)
+            if sessions is not None:
+                sessions.discard(session)
+                if not sessions:
+                    del self._sockets[game_id]
+            stopped.set()
+        if stop.is_set():
+            try:
+                await websocket.close(code=1012, reason="Game moved to another shard, reconnect")
+            except RuntimeError:
+                pass
+        elif upstream.close_code is not None:
+            # pass on the shard's close code (e.g. 4404 for an unknown game)
+            try:
+                await websocket.close(code=upstream.close_code, reason=upstream.close_reason or "")
+            except RuntimeError:  # the client already went away
+                pass
+
+    async def _close_sockets(self, game_id: str) -> None:
+        """Close a game's proxied WebSockets (code 1012) and wait until their relays have stopped."""
+        sessions = list(self._sockets.get(game_id, ()))
+        for stop, _ in sessions:
+            stop.set()
+        await asyncio.gather(*(stopped.wait() for _, stopped in sessions))
+
+    async def stats(self) -> Dict:
+        """Per-shard load: live games reported by the shard, requests, migrations and ring share."""
+        shares = self.ring.shares()
+
+        async def live_games(name: str) -> Optional[int]:
+            try:
+                metrics = await self.clients[name].get("/metrics")
+                return metrics.json()["game_store"]["active"]
+            except (httpx.HTTPError, ValueError, KeyError):
+                return None
+
+        names = list(self.load)
+        games = await asyncio.gather(*(live_games(name) for name in names))
+        return {
+            "rebalances": self.rebalances,
+            "shards": {
+                name: {
+                    "url": self.load[name].url,
+                    "games": game_count,
+                    "ring_share": round(shares.get(name, 0.0), 4),
+                    "routed": self.load[name].routed,
+                    "in_flight": self.load[name].in_flight,
+                    "errors": self.load[name].errors,
+                    "migrated_in": self.load[name].migrated_in,
+                    "migrated_out": self.load[name].migrated_out,
+                }
+                for name, game_count in zip(names, games)
+            },
+        }
+
+    async def close(self) -> None:
+        for client in self.clients.values():
+            await client.aclose()
+
+    def require_admin(self, request: Request) -> None:
+        """Dependency for the shard-admin routes: a matching bearer token, or 401/403."""
+        if not self.admin_token:
+            raise HTTPException(status_code=403, detail="Shard admin is disabled (set BATTLESHIP_ROUTER_ADMIN_TOKEN)")
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), self.admin_token.encode()):
+            raise HTTPException(status_code=401, detail="Invalid admin token",
+                                headers={"WWW-Authenticate": "Bearer"})
+
+    def _build_app(self) -> FastAPI:
+        @asynccontextmanager
+        async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+            try:
+                yield
+            finally:
+                await self.close()
+
+        app = FastAPI(title="Battleship Shard Router", lifespan=lifespan)
+
+        @app.get("/shards")
+        async def get_shards():
+            """Get each shard's load and share of the ring"""
+            return await self.stats()
+
+        @app.post("/shards", dependencies=[Depends(self.require_admin)])
+        async def add_shard(request: ShardRequest):
+            """Add a shard and move the games it now owns to it"""
+            try:
+                moved = await self.add_shard(request.name, request.url)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=502, detail=f"Moving games failed and was rolled back: {e}")
+            return {"shard": request.name, "moved_games": moved}
+
+        @app.delete("/shards/{name}", dependencies=[Depends(self.require_admin)])
+        async def remove_shard(name: str):
+            """Move every game off a shard and remove it"""
+            try:
+                moved = await self.remove_shard(name)
+            except KeyError:
+                raise HTTPException(status_code=404, detail="Shard not found")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=502, detail=f"Moving games failed and was rolled back: {e}")
+            return {"shard": name, "moved_games": moved}
+
+        @app.websocket("/games/{game_id}/ws")
+        @app.websocket("/games/{game_id}/spectate")
+        async def proxy_websocket(websocket: WebSocket, game_id: str):
+            await self.proxy_websocket(websocket, game_id)
+
+        @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"])
+        async def forward(request: Request):
+            return await self.forward(request)
+
+        return app
+
+
+def _wait_until_ready(urls: Iterable[str], timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    for url in urls:
+        while True:
+            try:
+                if httpx.get(url + "/", timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Shard at {url} did not start")
+            time.sleep(0.1)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run app.main as N game-id shards behind a front router")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--base-port", type=int, default=8100, help="the shards listen on 127.0.0.1:base-port+i")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    shards = {f"shard-{index}": f"http://127.0.0.1:{args.base_port + index}" for index in range(args.workers)}
+    # a fresh secret per run unless one is given (shards added later with POST /shards need the same one)
+    secret = os.environ.get("BATTLESHIP_SHARD_SECRET") or secrets.token_hex(32)
+    workers = []
+    for index, name in enumerate(shards):
+        env = dict(os.environ, BATTLESHIP_SHARD_NAME=name, BATTLESHIP_SHARD_SECRET=secret)
+        if env.get("BATTLESHIP_SNAPSHOT_DIR"):
+            # each shard snapshots its own games
+            env["BATTLESHIP_SNAPSHOT_DIR"] = os.path.join(env["BATTLESHIP_SNAPSHOT_DIR"], name)
+        workers.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(args.base_port + index)],
+            env=env,
+        ))
+    try:
+        _wait_until_ready(shards.values())
+        extra_hosts = os.environ.get("BATTLESHIP_SHARD_HOSTS", "")
+        allowed_hosts = LOOPBACK_HOSTS | {host.strip() for host in extra_hosts.split(",") if host.strip()}
+        router = ShardRouter(shards, secret=secret.encode(), allowed_hosts=allowed_hosts)
+        uvicorn.run(router.app, host=args.host, port=args.port)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Headless AI-vs-board simulation runner.
+
+Plays full games of an ``AIOpponent`` against boards from
+``Board.place_ships_randomly`` with no HTTP layer and no AI delay, spread
+over a process pool, and reports shots-to-win and per-move decision latency
+for each difficulty.
+
+    python -m app.simulate --games 100000 --difficulty expert monte_carlo --workers 8
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.ai_opponent import AIDifficulty, AIOpponent
+from app.models.board import Board
+
+
+def play_game(difficulty: AIDifficulty, time_budget: Optional[float] = None,
+              sample_budget: Optional[int] = None) -> Tuple[int, List[float]]:
+    """Play one game to the end; return (shots fired, decision latency of every move in seconds)."""
+    board = Board()
+    board.place_ships_randomly()
+    ai = AIOpponent(difficulty, ship_sizes=sorted(board.ships.values(), reverse=True),
+                    time_budget=time_budget, sample_budget=sample_budget)
+
+    latencies = []
+    clock = time.perf_counter
+    while True:
+        started = clock()
+        row, col = ai.get_next_shot()
+        latencies.append(clock() - started)
+
+        result = board.take_shot(row, col)
+        ai.notify_shot_result(row, col, result['status'] == 'hit', result['ship_sunk'],
+                              sunk_ship_size=board.ships.get(result.get('sunk_ship_name')))
+        if result['all_ships_sunk']:
+            return len(latencies), latencies
+
+
+def run_chunk(task: Tuple[str, int, int, Optional[float], Optional[int]]) -> Dict:
+    """
+    Play ``games`` games with a RNG seeded from ``seed`` (runs inside a pool worker).
+
+    Shots and latencies come back as histograms (latency in whole microseconds),
+    so a chunk result stays small no matter how many games it covers.
+    """
+    difficulty, seed, games, time_budget, sample_budget = task
+    random.seed(seed)
+    shots = Counter()
+    latency_us = Counter()
+    for _ in range(games):
+        shot_count, latencies = play_game(AIDifficulty(difficulty), time_budget, sample_budget)
+        shots[shot_count] += 1
+        for latency in latencies:
+            latency_us[int(latency * 1_000_000)] += 1
+    return {'difficulty': difficulty, 'games': games, 'shots': shots, 'latency_us': latency_us}
+
+
+def _percentile(histogram: Counter, fraction: float) -> float:
+    total = sum(histogram.values())
+    if not total:
+        return 0.0
+    rank = fraction * (total - 1)
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen > rank:
+            return float(value)
+    return float(max(histogram))
+
+
+def _mean(histogram: Counter) -> float:
+    total = sum(histogram.values())
+    return sum(value * count for value, count in histogram.items()) / total if total else 0.0
+
+
+def summarize(difficulty: str, games: int, shots: Counter, latency_us: Counter) -> Dict:
+    """Build the report entry of one difficulty from merged histograms."""
+    return {
+        'difficulty': difficulty,
+        'games': games,
+        'shots_mean': round(_mean(shots), 3),
+        'shots_median': _percentile(shots, 0.5),
+        'shots_p95': _percentile(shots, 0.95),
+        'moves': sum(latency_us.values()),
+        'latency_mean_us': round(_mean(latency_us), 3),
+        'latency_median_us': _percentile(latency_us, 0.5),
+        'latency_p95_us': _percentile(latency_us, 0.95),
+        'latency_max_us': float(max(latency_us)) if latency_us else 0.0,
+    }
+
+
+def run_simulation(games: int, difficulties: Iterable[str], workers: int = 1, seed: int = 0,
+                   chunk_size: int = 500, time_budget: Optional[float] = None,
+                   sample_budget: Optional[int] = None) -> List[Dict]:
+    """
+    Play ``games`` games per difficulty and return one summary per difficulty.
+
+    Every chunk gets its own seed derived from ``seed``, so a run is
+    reproducible for a given chunk size regardless of the worker count.
+    """
+    difficulties = list(difficulties)
+    tasks = []
+    for difficulty_index, difficulty in enumerate(difficulties):
+        AIDifficulty(difficulty)  # reject unknown names before forking workers
+        for chunk_index, start in enumerate(range(0, games, chunk_size)):
+            chunk_seed = seed * 1_000_003 + difficulty_index * 100_003 + chunk_index
+            tasks.append((difficulty, chunk_seed, min(chunk_size, games - start), time_budget, sample_budget))
+
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            results = list(pool.imap_unordered(run_chunk, tasks))
+    else:
+        results = [run_chunk(task) for task in tasks]
+
+    merged = {difficulty: {'games': 0, 'shots': Counter(), 'latency_us': Counter()} for difficulty in difficulties}
+    for result in results:
+        bucket = merged[result['difficulty']]
+        bucket['games'] += result['games']
+        bucket['shots'].update(result['shots'])
+        bucket['latency_us'].update(result['latency_us'])
+
+    return [summarize(difficulty, **merged[difficulty]) for difficulty in difficulties]
+
+
+def format_report(report: List[Dict]) -> str:
+    header = f"{'difficulty':<12}{'games':>9}{'mean':>8}{'median':>8}{'p95':>6}{'move mean us':>14}{'move p95 us':>13}"
+    lines = [header, '-' * len(header)]
+    for row in report:
+        lines.append(
+            f"{row['difficulty']:<12}{row['games']:>9}{row['shots_mean']:>8.2f}{row['shots_median']:>8.0f}"
+            f"{row['shots_p95']:>6.0f}{row['latency_mean_us']:>14.1f}{row['latency_p95_us']:>13.0f}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Play headless AI games and report shots-to-win and move latency.')
+    parser.add_argument('--games', type=int, default=1000, help='games per difficulty')
+    parser.add_argument('--difficulty', nargs='+', default=[d.value for d in AIDifficulty],
+                        choices=[d.value for d in AIDifficulty])
+    parser.add_argument('--workers', type=int, default=1, help='process pool size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=500, help='games per pool task')
+    parser.add_argument('--time-budget-ms', type=float, default=None, help='Monte Carlo think time per move')
+    parser.add_argument('--sample-budget', type=int, default=None, help='Monte Carlo samples per move')
+    parser.add_argument('--json', dest='json_path', default=None, help="also write the report as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report = run_simulation(
+        games=args.games,
+        difficulties=args.difficulty,
+        workers=args.workers,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        time_budget=args.time_budget_ms / 1000 if args.time_budget_ms is not None else None,
+        sample_budget=args.sample_budget,
+    )
+    elapsed = time.perf_counter() - started
+
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(report))
+        print(f"\n{args.games * len(args.difficulty)} games in {elapsed:.1f}s with {args.workers} worker(s)")
+        if args.json_path:
+            with open(args.json_path, 'w') as handle:
+                json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
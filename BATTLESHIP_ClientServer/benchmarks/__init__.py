@@ -0,0 +1 @@
+"""Benchmarks for the board, AI and API hot paths (run with ``python -m benchmarks``)."""
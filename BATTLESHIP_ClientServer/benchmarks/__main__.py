@@ -0,0 +1,56 @@
+"""
+Run the benchmark suite, save the results as JSON and compare with a baseline.
+
+    python -m benchmarks --output bench.json
+    python -m benchmarks --baseline bench.json --threshold 0.25   # exit code 1 on regression
+"""
+
+import argparse
+import sys
+
+from benchmarks.cases import GROUPS, run_groups
+from benchmarks.harness import build_report, compare, load_report, save_report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the board, AI and API hot paths.')
+    parser.add_argument('--only', nargs='+', choices=sorted(GROUPS), default=list(GROUPS),
+                        help='benchmark groups to run')
+    parser.add_argument('--rounds', type=int, default=200, help='timed rounds per benchmark')
+    parser.add_argument('--quick', action='store_true', help='20 rounds, for a smoke run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with a results JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='flag benchmarks whose median grew by more than this fraction')
+    args = parser.parse_args(argv)
+
+    rounds = 20 if args.quick else args.rounds
+    print(f"Running {', '.join(args.only)} ({rounds} rounds)")
+    report = build_report(run_groups(args.only, rounds, seed=args.seed))
+
+    print(f"\n{'benchmark':<34}{'median us':>12}{'p95 us':>12}{'ops/s':>14}")
+    for name, result in report['results'].items():
+        print(f"{name:<34}{result['median_us']:>12.2f}{result['p95_us']:>12.2f}{result['ops_per_sec']:>14.1f}")
+
+    if args.output:
+        save_report(report, args.output)
+        print(f"\nSaved results to {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    rows = compare(report, load_report(args.baseline), args.threshold)
+    regressions = [row for row in rows if row['regressed']]
+    print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%} on median):")
+    for row in rows:
+        flag = 'REGRESSION' if row['regressed'] else ''
+        print(f"  {row['name']:<34}{row['baseline']:>12.2f} -> {row['current']:>10.2f}  {row['change']:+8.1%}  {flag}")
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
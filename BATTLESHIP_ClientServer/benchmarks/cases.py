@@ -0,0 +1,142 @@
+"""Benchmark cases, grouped by the layer they exercise."""
+
+import asyncio
+import random
+import time
+from typing import Callable, Dict
+
+from app.core.ai_opponent import AIDifficulty
+from app.models.board import Board
+from app.models.game_history import GameHistory
+from app.services.game_service import GameService
+from app.simulate import play_game
+
+from benchmarks.harness import measure, summarize
+
+CUSTOM_SHIPS = [
+    {"ship_name": "Carrier", "start_row": 0, "start_col": 0, "direction": "horizontal"},
+    {"ship_name": "Battleship", "start_row": 2, "start_col": 0, "direction": "horizontal"},
+    {"ship_name": "Cruiser", "start_row": 4, "start_col": 0, "direction": "horizontal"},
+    {"ship_name": "submarine", "start_row": 6, "start_col": 0, "direction": "horizontal"},
+    {"ship_name": "Destroyer", "start_row": 8, "start_col": 0, "direction": "horizontal"},
+    {"ship_name": "patrol_boat", "start_row": 9, "start_col": 3, "direction": "horizontal"},
+]
+
+ALL_CELLS = [(row, col) for row in range(10) for col in range(10)]
+
+
+def bench_board(rounds: int) -> Dict[str, Dict]:
+    board = Board()
+    state = {}
+
+    def fresh_board():
+        target = Board()
+        target.place_ships_randomly()
+        cells = ALL_CELLS[:]
+        random.shuffle(cells)
+        state['board'] = target
+        state['cells'] = iter(cells)
+
+    def shoot():
+        state['board'].take_shot(*next(state['cells']))
+
+    return {
+        'board.place_ships_randomly': measure(board.place_ships_randomly, rounds, number=10),
+        'board.take_shot': measure(shoot, rounds, number=100, setup=fresh_board),
+        'board.place_ships_custom': measure(lambda: board.place_ships_custom(CUSTOM_SHIPS), rounds, number=10),
+    }
+
+
+def bench_ai(rounds: int) -> Dict[str, Dict]:
+    """Per-move ``get_next_shot`` latency over full games (one game per round, capped at 50)."""
+    results = {}
+    games = max(1, min(rounds, 50))
+    for difficulty in AIDifficulty:
+        samples = []
+        for _ in range(games):
+            _, latencies = play_game(difficulty)
+            samples.extend(latency * 1e9 for latency in latencies)
+        results[f'ai.get_next_shot.{difficulty.value}'] = summarize(samples)
+    return results
+
+
+def _history_with(shots: int) -> GameHistory:
+    history = GameHistory('bench')
+    for number in range(shots):
+        row, col = ALL_CELLS[number % 100]
+        is_hit = number % 3 == 0
+        history.add_shot(f"{chr(65 + col)}{row + 1}", 'hit' if is_hit else 'miss',
+                         'player' if number % 2 == 0 else 'ai', is_hit, False)
+    return history
+
+
+def bench_history(rounds: int) -> Dict[str, Dict]:
+    results = {}
+    for shots in (50, 500, 5000):
+        history = _history_with(shots)
+        results[f'history.get_statistics.{shots}'] = measure(history.get_statistics, rounds)
+    return results
+
+
+def bench_api(rounds: int) -> Dict[str, Dict]:
+    """In-process round trips through the ASGI app (no sockets, AI delay 0)."""
+    import httpx
+
+    from app.main import app
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://benchmark')
+    state = {}
+
+    def call(method: str, url: str, **kwargs) -> Callable[[], None]:
+        def run():
+            response = loop.run_until_complete(client.request(method, url.format(**state), **kwargs))
+            response.raise_for_status()
+        return run
+
+    def solo_game():
+        state['game_id'] = GameService.create_new_game(ai_delay=0)['game_id']
+        cells = ALL_CELLS[:]
+        random.shuffle(cells)
+        state['cells'] = iter(cells)
+
+    def fire():
+        row, col = next(state['cells'])
+        response = loop.run_until_complete(
+            client.post(f"/games/{state['game_id']}/fire", json={'position': f"{chr(65 + col)}{row + 1}"}))
+        response.raise_for_status()
+
+    def ai_turn():
+        state['game_id'] = GameService.create_new_game(with_ai=True, ai_difficulty='hard', ai_delay=0)['game_id']
+        GameService.take_shot(state['game_id'], 0, 0)
+
+    try:
+        results = {
+            'api.post_games': measure(
+                call('POST', '/games', json={'with_ai': True, 'ai_difficulty': 'expert', 'ai_delay': 0}), rounds),
+            'api.fire': measure(fire, max(1, rounds // 20), number=20, setup=solo_game),
+            'api.ai_shot': measure(call('POST', '/games/{game_id}/ai-shot'), rounds, setup=ai_turn),
+        }
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+        GameService.games.clear()
+    return results
+
+
+GROUPS: Dict[str, Callable[[int], Dict[str, Dict]]] = {
+    'board': bench_board,
+    'ai': bench_ai,
+    'history': bench_history,
+    'api': bench_api,
+}
+
+
+def run_groups(names, rounds: int, seed: int = 0) -> Dict[str, Dict]:
+    random.seed(seed)
+    results = {}
+    for name in names:
+        started = time.perf_counter()
+        results.update(GROUPS[name](rounds))
+        print(f"  {name:<8} done in {time.perf_counter() - started:.1f}s")
+    return results
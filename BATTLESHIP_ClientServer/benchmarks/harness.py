@@ -0,0 +1,87 @@
+"""Timing, JSON storage and baseline comparison for the benchmark suite."""
+
+import json
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def summarize(samples_ns: List[float]) -> Dict[str, float]:
+    """Summarize per-call timings (nanoseconds) into microsecond statistics."""
+    ordered = sorted(samples_ns)
+    p95_index = min(len(ordered) - 1, int(0.95 * len(ordered)))
+    mean = statistics.fmean(ordered)
+    return {
+        'calls': len(ordered),
+        'mean_us': round(mean / 1000, 3),
+        'median_us': round(statistics.median(ordered) / 1000, 3),
+        'p95_us': round(ordered[p95_index] / 1000, 3),
+        'min_us': round(ordered[0] / 1000, 3),
+        'ops_per_sec': round(1e9 / mean, 1) if mean else 0.0,
+    }
+
+
+def measure(func: Callable[[], object], rounds: int, number: int = 1,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Time ``func`` in ``rounds`` rounds of ``number`` back-to-back calls.
+
+    ``setup`` runs before every round and is not timed. The per-call time of
+    a round is its total divided by ``number``.
+    """
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        started = clock()
+        for _ in range(number):
+            func()
+        samples.append((clock() - started) / number)
+    return summarize(samples)
+
+
+def build_report(results: Dict[str, Dict[str, float]]) -> Dict:
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def save_report(report: Dict, path: str) -> None:
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> Dict:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, metric: str = 'median_us') -> List[Dict]:
+    """
+    Compare two reports benchmark by benchmark.
+
+    Returns one row per benchmark present in both reports; ``regressed`` is set
+    when ``metric`` grew by more than ``threshold`` (0.2 = 20%).
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before or not before.get(metric):
+            continue
+        ratio = result[metric] / before[metric]
+        rows.append({
+            'name': name,
+            'baseline': before[metric],
+            'current': result[metric],
+            'change': round(ratio - 1, 4),
+            'regressed': ratio > 1 + threshold,
+        })
+    return rows
@@ -1,6 +1,7 @@
 import os
 import random
 import sys
+import time
 
 import pytest
 
@@ -18,3 +19,7 @@ def reset_game_service_state():
     random.seed(0)
     yield
     GameService.games.clear()
+    GameService.pool.clear()
+    GameService.spectators.clear()
+    GameService.locks.clear()
+    GameService.set_clock(time.monotonic)
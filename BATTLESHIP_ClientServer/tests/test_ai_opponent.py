@@ -0,0 +1,160 @@
+import random
+import time
+
+from app.core.ai_opponent import AIDifficulty, AIOpponent
+from app.core.endgame import EndgameSolver
+from app.core.monte_carlo import FleetSampler
+from app.models.board import Board
+
+
+def play_full_game(ai: AIOpponent, board: Board) -> int:
+    shots = 0
+    while True:
+        row, col = ai.get_next_shot()
+        result = board.take_shot(row, col)
+        shots += 1
+        assert result["status"] != "already_shot", f"AI repeated shot at {(row, col)}"
+        sunk_ship_size = board.ships.get(result.get("sunk_ship_name"))
+        ai.notify_shot_result(row, col, result["status"] == "hit", result["ship_sunk"], sunk_ship_size=sunk_ship_size)
+        if result["all_ships_sunk"]:
+            return shots
+
+
+def test_expert_density_excludes_placements_through_misses():
+    ai = AIOpponent(AIDifficulty.EXPERT)
+    # A wall of misses in column 1 leaves column 0 room only for vertical ships
+    for row in range(10):
+        ai.notify_shot_result(row, 1, hit=False)
+
+    scores = ai.density.cell_scores()
+    # Column 0 cell (0, 0) is only reachable by vertical placements starting at row 0
+    assert scores[0] == sum(ai.density.remaining.values())
+    assert all(scores[row * 10 + 1] == 0 for row in range(10))
+
+
+def test_expert_targets_along_open_hits_and_finishes_games():
+    ai = AIOpponent(AIDifficulty.EXPERT)
+    ai.notify_shot_result(4, 4, hit=True)
+    ai.notify_shot_result(4, 5, hit=True)
+
+    next_row, next_col = ai.get_next_shot()
+    assert (next_row, next_col) in {(4, 3), (4, 6)}
+
+    random.seed(3)
+    shot_counts = []
+    for _ in range(5):
+        board = Board()
+        board.place_ships_randomly()
+        shot_counts.append(play_full_game(AIOpponent(AIDifficulty.EXPERT), board))
+    assert max(shot_counts) < 100
+
+
+def test_expert_live_counts_match_full_recount():
+    random.seed(7)
+    board = Board()
+    board.place_ships_randomly()
+    ai = AIOpponent(AIDifficulty.EXPERT)
+
+    for _ in range(40):
+        row, col = ai.get_next_shot()
+        result = board.take_shot(row, col)
+        sunk_ship_size = board.ships.get(result.get("sunk_ship_name"))
+        ai.notify_shot_result(row, col, result["status"] == "hit", result["ship_sunk"], sunk_ship_size=sunk_ship_size)
+
+    density = ai.density
+    shot = density.shot_mask
+    for cell in range(100):
+        if (shot >> cell) & 1:
+            assert density.counts[cell] < 0
+            continue
+        expected = sum(
+            count * (density.tables[size].cover[cell] & density.alive(size)).bit_count()
+            for size, count in density.remaining.items()
+        )
+        assert density.counts[cell] == expected
+
+
+def test_monte_carlo_respects_sample_budget_and_finishes_games():
+    ai = AIOpponent(AIDifficulty.MONTE_CARLO, time_budget=None, sample_budget=25)
+    ai.notify_shot_result(0, 0, hit=True)
+
+    counts, accepted = FleetSampler(ai.density).occupancy(time_budget=None, sample_budget=25)
+    assert accepted == 25
+    assert counts[0] == 25, "Every accepted layout must cover the open hit"
+
+    random.seed(5)
+    board = Board()
+    board.place_ships_randomly()
+    assert play_full_game(AIOpponent(AIDifficulty.MONTE_CARLO, time_budget=None, sample_budget=30), board) < 100
+
+
+def test_monte_carlo_stops_at_time_budget():
+    ai = AIOpponent(AIDifficulty.MONTE_CARLO)
+    started = time.perf_counter()
+    _, accepted = FleetSampler(ai.density).occupancy(time_budget=0.002, sample_budget=None)
+    assert accepted > 0
+    assert time.perf_counter() - started < 0.05
+
+
+def test_endgame_solver_matches_brute_force_enumeration():
+    random.seed(11)
+    density = AIOpponent(AIDifficulty.EXPERT, ship_sizes=[3, 2]).density
+    for cell in random.sample(range(100), 30):
+        density.record_miss(cell)
+    open_hit = next(cell for cell in range(100) if not (density.shot_mask >> cell) & 1)
+    density.record_hit(open_hit)
+
+    total, counts = EndgameSolver(density).occupancy()
+
+    expected_total = 0
+    expected_counts = [0] * 100
+    for first in density.tables[3].masks:
+        for second in density.tables[2].masks:
+            union = first | second
+            if first & second or union & density.miss_mask or union & (1 << open_hit) == 0:
+                continue
+            expected_total += 1
+            for cell in range(100):
+                expected_counts[cell] += (union >> cell) & 1
+
+    assert total == expected_total > 0
+    for cell in range(100):
+        if not (density.shot_mask >> cell) & 1:
+            assert counts[cell] == expected_counts[cell]
+
+
+def test_ai_switches_to_endgame_solver_with_few_ships_left():
+    assert AIOpponent.endgame_max_ships == 0  # opt-in
+    ai = AIOpponent(AIDifficulty.EXPERT, ship_sizes=[2])
+    ai.endgame_max_ships = 2
+    # Only a vertical destroyer through (5, 5) is left: it must be (4, 5) or (6, 5)
+    for cell in (54, 56):
+        ai.notify_shot_result(*divmod(cell, 10), hit=False)
+    ai.notify_shot_result(5, 5, hit=True)
+
+    assert ai.get_next_shot() in {(4, 5), (6, 5)}
+
+
+def test_random_and_checkerboard_shots_cover_board_without_repeats():
+    for difficulty in (AIDifficulty.EASY, AIDifficulty.HARD):
+        ai = AIOpponent(difficulty)
+        shots = [ai.get_next_shot() for _ in range(100)]
+        assert len(set(shots)) == 100
+        assert not ai.unshot_cells and ai.shot_mask == (1 << 100) - 1
+
+    hard = AIOpponent(AIDifficulty.HARD)
+    assert [hard.get_next_shot() for _ in range(3)] == [(0, 0), (0, 2), (0, 4)]
+
+
+def test_target_queue_has_no_duplicates_or_shot_cells():
+    ai = AIOpponent(AIDifficulty.MEDIUM)
+    ai.notify_shot_result(4, 4, hit=True)
+    ai.notify_shot_result(4, 6, hit=True)  # (4, 5) is adjacent to both hits
+    ai.notify_shot_result(3, 4, hit=False)
+
+    assert len(ai.target_queue) == len(set(ai.target_queue)) == ai.queued_mask.bit_count()
+    assert ai.queued_mask >> 45 & 1, "(4, 5) should be queued once"
+
+    follow_ups = [ai.get_next_shot() for _ in range(len(ai.target_queue))]
+    assert (3, 4) not in follow_ups
+    assert len(set(follow_ups)) == len(follow_ups)
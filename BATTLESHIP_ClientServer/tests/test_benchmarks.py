@@ -0,0 +1,22 @@
+from benchmarks.harness import compare, measure
+
+
+def test_measure_reports_per_call_statistics():
+    calls = []
+    result = measure(lambda: calls.append(1), rounds=5, number=4, setup=lambda: calls.clear())
+
+    assert result["calls"] == 5
+    assert len(calls) == 4
+    assert 0 < result["min_us"] <= result["median_us"] <= result["p95_us"]
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {"results": {"fast": {"median_us": 10.0}, "slow": {"median_us": 10.0}, "gone": {"median_us": 1.0}}}
+    current = {"results": {"fast": {"median_us": 11.0}, "slow": {"median_us": 13.0}, "new": {"median_us": 5.0}}}
+
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.2)}
+
+    assert set(rows) == {"fast", "slow"}
+    assert rows["fast"]["regressed"] is False
+    assert rows["slow"]["regressed"] is True
+    assert rows["slow"]["change"] == 0.3
@@ -2,6 +2,7 @@ import random
 
 import pytest
 
+from app.core.bitboard import random_fleet, ship_mask
 from app.models.board import Board
 
 
@@ -86,3 +87,49 @@ def test_place_ships_custom_detects_overlap(deterministic_board):
     result = deterministic_board.place_ships_custom(overlapping_custom_ships)
     assert result["success"] is False
     assert "ไม่สามารถวางเรือ" in result["message"]
+
+
+def test_ship_masks_track_positions_and_hits(deterministic_board):
+    deterministic_board.clear_ships()
+    assert deterministic_board.place_ship_at_position("Cruiser", 2, 5, 3, "vertical")
+    assert not deterministic_board.can_place_ship(3, 4, 3, "horizontal"), "Overlap must be rejected"
+    assert not deterministic_board.can_place_ship(0, 8, 3, "horizontal"), "Ship must stay on the board"
+
+    assert deterministic_board.ships_position["Cruiser"] == [(2, 5), (3, 5), (4, 5)]
+    assert deterministic_board.occupied_mask == deterministic_board.ship_masks["Cruiser"]
+
+    deterministic_board.take_shot(3, 5)
+    deterministic_board.take_shot(0, 0)
+    assert deterministic_board.hit_mask == 1 << 35
+    assert deterministic_board.miss_mask == 1
+    assert deterministic_board.get_ships_remaining() == ["Cruiser"]
+
+
+@pytest.mark.parametrize("uniform", [False, True])
+def test_place_ships_randomly_fills_every_ship_without_overlap(deterministic_board, uniform):
+    for _ in range(200):
+        deterministic_board.place_ships_randomly(uniform=uniform)
+        masks = deterministic_board.ship_masks
+        assert sum(mask.bit_count() for mask in masks.values()) == sum(deterministic_board.ships.values())
+        assert deterministic_board.occupied_mask.bit_count() == sum(deterministic_board.ships.values())
+        for ship_name, size in deterministic_board.ships.items():
+            start_row, start_col = deterministic_board.ships_position[ship_name][0]
+            direction = "horizontal" if deterministic_board.ships_position[ship_name][-1][0] == start_row else "vertical"
+            assert ship_mask(start_row, start_col, size, direction) == masks[ship_name]
+
+
+def test_can_place_ship_matches_ship_mask_for_every_start(deterministic_board):
+    deterministic_board.clear_ships()
+    for size in (1, 2, 5):
+        for direction in ("horizontal", "vertical"):
+            for row in range(-1, 11):
+                for col in range(-1, 11):
+                    expected = bool(ship_mask(row, col, size, direction))
+                    assert deterministic_board.can_place_ship(row, col, size, direction) is expected
+
+
+def test_random_fleet_rejects_a_fleet_that_cannot_fit():
+    with pytest.raises(ValueError):
+        random_fleet([11])
+    with pytest.raises(ValueError):
+        random_fleet([10] * 11, uniform=True)
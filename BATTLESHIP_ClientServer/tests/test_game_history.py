@@ -0,0 +1,80 @@
+import pytest
+
+from app.models.game_archive import ArchivedHistory
+from app.models.game_history import GameHistory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _history(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(GameHistory, 'clock', staticmethod(clock))
+    return GameHistory('game-1'), clock
+
+
+def test_counters_track_shots_hits_and_sinks(monkeypatch):
+    history, clock = _history(monkeypatch)
+    history.add_shot('A1', 'hit', 'player', True)
+    clock.now += 1.5
+    history.add_shot('B1', 'hit', 'player', True, True, sunk_ship_name='patrol_boat')
+    history.add_shot('J10', 'miss', 'ai')
+    history.add_shot('C3', 'already_shot', 'player')
+    clock.now += 2.25
+    history.end_game('player')
+
+    stats = history.get_statistics()
+    assert stats['total_shots'] == 4
+    assert (stats['player_shots'], stats['player_hits'], stats['player_ships_sunk']) == (3, 2, 1)
+    assert (stats['ai_shots'], stats['ai_hits'], stats['ai_ships_sunk']) == (1, 0, 0)
+    assert stats['player_hit_rate'] == pytest.approx(200 / 3)
+    assert stats['ai_hit_rate'] == 0
+    assert stats['duration_seconds'] == pytest.approx(3.75)
+    assert stats['winner'] == 'player'
+
+
+def test_shots_are_decoded_on_demand(monkeypatch):
+    history, clock = _history(monkeypatch)
+    clock.now += 0.5
+    history.add_shot('B1', 'hit', 'ai', True, True, sunk_ship_name='Carrier')
+
+    [shot] = history.shots
+    assert shot == {
+        'shot_number': 1,
+        'timestamp': history.timestamp(0).isoformat(),
+        'position': 'B1',
+        'result': 'hit',
+        'player': 'ai',
+        'is_hit': True,
+        'ship_sunk': True,
+        'sunk_ship_name': 'Carrier',
+    }
+    assert (history.timestamp(0) - history.start_time).total_seconds() == pytest.approx(0.5)
+    assert history.shots is not history.shots
+
+
+def test_unknown_shot_values_are_rejected():
+    history = GameHistory('game-1')
+    with pytest.raises(ValueError):
+        history.add_shot('K1', 'miss')
+    with pytest.raises(ValueError):
+        history.add_shot('A1', 'sunk')
+    with pytest.raises(ValueError):
+        history.add_shot('A1', 'hit', 'player', True, True, sunk_ship_name='Yacht')
+    assert history.shot_count == 0
+
+
+def test_archived_history_matches_live_history(monkeypatch):
+    history, clock = _history(monkeypatch)
+    for step, position in enumerate(('A1', 'E5', 'J10')):
+        clock.now += 0.123457 * (step + 1)
+        history.add_shot(position, 'miss', 'player' if step % 2 == 0 else 'ai')
+    history.end_game('ai')
+
+    archived = ArchivedHistory.pack(history)
+    assert archived.to_dict() == history.to_dict()
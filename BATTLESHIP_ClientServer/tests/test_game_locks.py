@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from copy import deepcopy
+
+from app.services.game_service import GameService
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+
+def _new_game(ai_difficulty="medium"):
+    return GameService.create_new_game(with_ai=True, ai_difficulty=ai_difficulty,
+                                       custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+
+
+def test_concurrent_ai_shots_on_one_game_fire_once():
+    game_id = _new_game("monte_carlo")
+    GameService.take_shot(game_id, 0, 0)
+
+    async def scenario():
+        return await asyncio.gather(*(GameService.ai_take_shot_async(game_id) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert sorted(result["status"] == "error" for result in results) == [False, True, True]
+    assert GameService.get_game_version(game_id) == 2
+    stats = GameService.get_lock_stats()
+    assert stats["contended"] == 2 and stats["held"] == stats["waiting"] == 0
+
+
+def test_a_locked_game_does_not_block_other_games():
+    busy, free = _new_game(), _new_game()
+
+    async def scenario():
+        async with GameService.locks.hold(busy):
+            waiting = asyncio.ensure_future(GameService.take_shot_async(busy, 0, 0))
+            result = await asyncio.wait_for(GameService.take_shot_async(free, 0, 0), timeout=1)
+            await asyncio.sleep(0)
+            assert not waiting.done()
+        return result, await waiting
+
+    free_result, busy_result = asyncio.run(scenario())
+    assert free_result["version"] == busy_result["version"] == 1
+
+
+def test_heavy_ai_runs_off_the_event_loop(monkeypatch):
+    threads = []
+    ai_take_shot = GameService.ai_take_shot.__func__
+
+    def recording_ai_take_shot(cls, game_id, compact=False):
+        threads.append(threading.get_ident())
+        return ai_take_shot(cls, game_id, compact)
+
+    monkeypatch.setattr(GameService, "ai_take_shot", classmethod(recording_ai_take_shot))
+    heavy, light = _new_game("expert"), _new_game("easy")
+    for game_id in (heavy, light):
+        GameService.take_shot(game_id, 0, 0)
+
+    async def scenario():
+        await GameService.ai_take_shot_async(heavy)
+        await GameService.ai_take_shot_async(light)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads[0] != loop_thread
+    assert threads[1] == loop_thread
@@ -1,5 +1,10 @@
+import json
+import time
 from copy import deepcopy
 
+from app.core.ai_opponent import DEFAULT_SHIP_SIZES
+from app.models.game_archive import ArchivedGame, ArchivedHistory
+from app.services.game_pool import GamePool
 from app.services.game_service import GameService
 
 
@@ -21,9 +26,9 @@ def test_create_new_game_without_ai():
     assert response["current_turn"] == "player"
 
     stored_game = GameService.games[response["game_id"]]
-    assert stored_game["player_board"] is not None
-    assert stored_game["ai_board"] is None
-    assert stored_game["history"].shots == []
+    assert stored_game.player_board is not None
+    assert stored_game.ai_board is None
+    assert stored_game.history.shots == []
 
 
 def test_create_new_game_with_ai_and_custom_board():
@@ -34,9 +39,9 @@ def test_create_new_game_with_ai_and_custom_board():
     assert response["current_turn"] == "player"
 
     stored_game = GameService.games[response["game_id"]]
-    assert stored_game["ai_board"] is not None
-    assert stored_game["ai_opponent"] is not None
-    assert stored_game["ai_difficulty"] == "expert"
+    assert stored_game.ai_board is not None
+    assert stored_game.ai_opponent is not None
+    assert stored_game.ai_difficulty == "expert"
 
 
 def test_take_shot_against_ai_switches_turn_and_records_hit():
@@ -44,7 +49,7 @@ def test_take_shot_against_ai_switches_turn_and_records_hit():
     game_id = response["game_id"]
 
     game = GameService.games[game_id]
-    placement_result = game["ai_board"].place_ships_custom(deepcopy(DEFAULT_CUSTOM_SHIPS))
+    placement_result = game.ai_board.place_ships_custom(deepcopy(DEFAULT_CUSTOM_SHIPS))
     assert placement_result["success"], placement_result
 
     shot_result = GameService.take_shot(game_id, 0, 0)
@@ -53,8 +58,8 @@ def test_take_shot_against_ai_switches_turn_and_records_hit():
     assert shot_result["ship_sunk"] is False
     assert shot_result["target_type"] == "ai"
     assert shot_result["current_turn"] == "ai"
-    assert game["current_turn"] == "ai"
-    assert len(game["history"].shots) == 1
+    assert game.current_turn == "ai"
+    assert len(game.history.shots) == 1
 
 
 def test_ai_take_shot_requires_player_turn_to_finish_first():
@@ -71,20 +76,20 @@ def test_ai_take_shot_after_player_attack():
     game_id = response["game_id"]
     game = GameService.games[game_id]
 
-    game["ai_board"].place_ships_custom(deepcopy(DEFAULT_CUSTOM_SHIPS))
+    game.ai_board.place_ships_custom(deepcopy(DEFAULT_CUSTOM_SHIPS))
 
     # Player fires first to give AI the turn
     GameService.take_shot(game_id, 0, 0)
 
     # Force AI to target a known ship cell
-    game["ai_opponent"].get_next_shot = lambda board_size=10: (0, 0)
+    game.ai_opponent.get_next_shot = lambda board_size=10: (0, 0)
 
     ai_result = GameService.ai_take_shot(game_id)
 
     assert ai_result["status"] == "hit"
     assert ai_result["current_turn"] == "player"
-    assert game["player_board"].ships_board[0][0] == "H"
-    assert len(game["history"].shots) == 2
+    assert game.player_board.ships_board[0][0] == "H"
+    assert len(game.history.shots) == 2
 
 
 def test_validate_ship_placement_uses_board_rules():
@@ -96,3 +101,155 @@ def test_validate_ship_placement_uses_board_rules():
 
     invalid_result = GameService.validate_ship_placement(invalid)
     assert invalid_result["success"] is False
+
+
+def test_ai_delay_is_tracked_with_injected_clock_instead_of_sleeping():
+    now = [100.0]
+    GameService.set_clock(lambda: now[0])
+
+    response = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=1.5)
+    game_id = response["game_id"]
+    assert response["ai_delay"] == 1.5
+    assert GameService.get_ai_wait(game_id) == 0.0
+
+    GameService.take_shot(game_id, 5, 5)
+    assert GameService.get_ai_wait(game_id) == 1.5
+
+    now[0] += 1.0
+    assert GameService.get_ai_wait(game_id) == 0.5
+
+    now[0] += 1.0
+    assert GameService.get_ai_wait(game_id) == 0.0
+    assert GameService.ai_take_shot(game_id)["current_turn"] == "player"
+    assert GameService.get_ai_wait("missing") is None
+
+
+def test_create_new_game_pops_prebuilt_games_from_pool(monkeypatch):
+    monkeypatch.setattr(GameService.pool, "watermark", 2)
+    assert GameService.pool.fill() == 2 * 6
+
+    first = GameService.create_new_game(with_ai=True, ai_difficulty="hard")
+    GameService.create_new_game(with_ai=True, ai_difficulty="hard")
+    third = GameService.create_new_game(with_ai=True, ai_difficulty="hard")
+    GameService.create_new_game(with_ai=True, ai_difficulty="expert", custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS))
+
+    stats = GameService.get_pool_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1, "Custom boards bypass the pool"
+    assert stats["ready"]["ai:hard"] == 0
+    assert stats["ready"]["ai:expert"] == 2 and stats["ready"]["solo"] == 2
+
+    for response in (first, third):
+        game = GameService.games[response["game_id"]]
+        assert game.ai_opponent.difficulty.value == "hard"
+        assert game.history.game_id == response["game_id"]
+
+
+def test_game_pool_thread_refills_after_acquire():
+    pool = GamePool(lambda with_ai, ai_difficulty: GameService.build_game_parts(with_ai, ai_difficulty),
+                    watermark=1, keys=[(False, None)])
+    pool.start()
+    try:
+        deadline = time.monotonic() + 5
+        while pool.stats()["ready"]["solo"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.acquire(False, "medium") is not None
+        while pool.stats()["built"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.stats()["ready"]["solo"] == 1
+        assert pool.acquire(True, "easy") is None, "Keys that are not warmed always miss"
+    finally:
+        pool.stop()
+
+
+def test_game_record_and_boards_stay_compact():
+    game_id = GameService.create_new_game(with_ai=True, ai_difficulty="expert")["game_id"]
+    game = GameService.games[game_id]
+
+    assert not hasattr(game, "__dict__") and not hasattr(game.player_board, "__dict__")
+    assert game.player_board.ships is game.ai_board.ships, "Boards share one immutable fleet definition"
+    assert game.ai_opponent.ship_sizes is DEFAULT_SHIP_SIZES
+
+    stats = GameService.get_memory_stats()
+    assert stats["live_games"] == stats["sampled_games"] == 1
+    assert 0 < stats["bytes_per_game"] < 8000
+
+    GameService.create_new_game(with_ai=True, ai_difficulty="expert")
+    assert GameService.get_memory_stats(max_age=60) is stats, "Recent measurement is reused"
+    assert GameService.get_memory_stats()["live_games"] == 2
+
+
+def test_finished_game_is_archived_with_identical_history_and_statistics():
+    game_id = GameService.create_new_game(with_ai=True, ai_difficulty="hard", ai_delay=0)["game_id"]
+    live = GameService.games[game_id]
+    live_history, live_ai = live.history, live.ai_opponent
+
+    cells = iter(divmod(cell, 10) for cell in range(100))
+    while GameService.games[game_id].game_status == "active":
+        GameService.take_shot(game_id, *next(cells))
+        if GameService.games[game_id].current_turn == "ai":
+            GameService.ai_take_shot(game_id)
+
+    archived = GameService.games[game_id]
+    assert isinstance(archived, ArchivedGame)
+    assert isinstance(archived.history, ArchivedHistory), "Shots recorded by the service must pack"
+    assert json.dumps(GameService.get_game_history(game_id)) == json.dumps(live_history.to_dict())
+    assert json.dumps(GameService.get_game_statistics(game_id)) == json.dumps(live_history.get_statistics())
+    assert GameService.get_ai_statistics(game_id) == live_ai.get_ai_stats()
+    assert GameService.get_game_state(game_id)["game_status"] == archived.game_status
+    assert GameService.take_shot(game_id, 0, 0)["message"] == "Game is already finished."
+    assert "Not AI turn" in GameService.ai_take_shot(game_id)["message"]
+
+
+def test_game_history_pages_with_since_shot_cursor():
+    game_id = GameService.create_new_game()["game_id"]
+    for col in range(5):
+        GameService.take_shot(game_id, 0, col)
+
+    first = GameService.get_game_history(game_id, since_shot=0, limit=2)
+    assert [shot["position"] for shot in first["shots"]] == ["A1", "B1"]
+    assert (first["next_shot"], first["has_more"]) == (2, True)
+
+    rest = GameService.get_game_history(game_id, since_shot=first["next_shot"])
+    assert [shot["shot_number"] for shot in rest["shots"]] == [3, 4, 5]
+    assert (rest["next_shot"], rest["has_more"]) == (5, False)
+    assert rest["statistics"]["total_shots"] == 5
+
+    caught_up = GameService.get_game_history(game_id, since_shot=99)
+    assert caught_up["shots"] == [] and caught_up["next_shot"] == 5
+
+    full = GameService.get_game_history(game_id)
+    assert set(full) == {"game_id", "shots", "statistics"}
+    assert full["shots"] == first["shots"] + rest["shots"]
+
+
+def test_game_state_can_leave_out_history():
+    game_id = GameService.create_new_game()["game_id"]
+    GameService.take_shot(game_id, 0, 0)
+
+    assert "history" in GameService.get_game_state(game_id)
+    assert "history" not in GameService.get_game_state(game_id, include_history=False)
+
+
+def test_game_version_and_changes_since_version():
+    game_id = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    game = GameService.games[game_id]
+    game.ai_board.place_ships_custom(deepcopy(DEFAULT_CUSTOM_SHIPS))
+    assert GameService.get_game_version(game_id) == 0
+
+    shot = GameService.take_shot(game_id, 0, 0)
+    ai_shot = GameService.ai_take_shot(game_id)
+    assert (shot["version"], ai_shot["version"]) == (1, 2)
+    assert GameService.get_game_state(game_id)["version"] == 2
+
+    changes = GameService.get_game_changes(game_id, since_version=1)
+    assert changes["version"] == 2
+    assert [event["player"] for event in changes["events"]] == ["ai"]
+    [change] = changes["changes"]
+    assert change["board"] == "player"
+    assert change["position"] == ai_shot["position"]
+    assert change["value"] == ai_shot["board_state"][change["row"]][change["col"]]
+
+    first = GameService.get_game_changes(game_id, since_version=0)["changes"][0]
+    assert (first["board"], first["position"], first["value"]) == ("ai", "A1", "H")
+    assert GameService.get_game_changes(game_id, since_version=2)["changes"] == []
+    assert "player_board_state" in GameService.get_game_changes(game_id, since_version=5)
@@ -0,0 +1,64 @@
+from app.services.game_service import GameService
+from app.services.game_store import GameStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idle_games_expire_and_access_refreshes_ttl():
+    clock = FakeClock()
+    store = GameStore(ttl=60, bucket_seconds=10, clock=clock)
+    store["idle"] = {"n": 1}
+    store["busy"] = {"n": 2}
+
+    clock.now += 50
+    assert store["busy"]["n"] == 2  # refreshes busy until t=1110
+    clock.now += 20
+
+    assert "idle" not in store
+    assert "busy" in store
+    assert store.stats()["expired"] == 1
+    assert store.stats()["active"] == 1
+
+
+def test_sweep_removes_only_expired_buckets():
+    clock = FakeClock()
+    store = GameStore(ttl=30, bucket_seconds=10, clock=clock)
+    for index in range(5):
+        store[f"old{index}"] = index
+    clock.now += 25
+    store["new"] = "kept"
+
+    assert store.sweep() == 0
+    clock.now += 10
+    assert store.sweep() == 5
+    assert list(store) == ["new"]
+    assert store.stats()["expiry_buckets"] == 1
+
+
+def test_lru_cap_evicts_least_recently_used():
+    store = GameStore(max_games=2)
+    store["a"] = 1
+    store["b"] = 2
+    store["a"]  # a is now the most recently used
+    store["c"] = 3
+
+    assert sorted(store) == ["a", "c"]
+    assert store.stats()["evicted"] == 1
+
+
+def test_game_service_forgets_expired_games():
+    clock = FakeClock()
+    GameService.set_clock(clock)
+    game_id = GameService.create_new_game()["game_id"]
+
+    clock.now += GameService.games.ttl - 1
+    assert GameService.take_shot(game_id, 0, 0) is not None
+    clock.now += GameService.games.ttl + 1
+    assert GameService.take_shot(game_id, 0, 1) is None
+    assert GameService.get_store_stats()["expired"] == 1
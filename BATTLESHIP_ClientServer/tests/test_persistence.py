@@ -0,0 +1,78 @@
+import sqlite3
+from copy import deepcopy
+
+import pytest
+
+from app.services.game_service import GameService
+from app.services.persistence import GamePersistence
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+
+@pytest.fixture
+def persistence(tmp_path, monkeypatch):
+    store = GamePersistence(str(tmp_path / "games.db"), batch_size=3)
+    monkeypatch.setattr(GameService, "persistence", store)
+    yield store
+    store.close()
+
+
+def _rows(store, query):
+    with sqlite3.connect(store.path) as connection:
+        return connection.execute(query).fetchall()
+
+
+def test_shots_are_queued_and_written_in_batches(persistence):
+    game_id = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    GameService.take_shot(game_id, 0, 0)
+    GameService.ai_take_shot(game_id)
+
+    # ยังไม่มีอะไรลงดิสก์จนกว่า writer จะ flush
+    assert persistence.stats()["queue_depth"] == 3
+    assert _rows(persistence, "SELECT COUNT(*) FROM shots") == [(0,)]
+
+    GameService.take_shot(game_id, 0, 1)
+    assert persistence.flush() == 4
+    stats = persistence.stats()
+    assert (stats["queue_depth"], stats["batches"], stats["batch_size_max"]) == (0, 2, 3)
+
+    history = GameService.games[game_id].history
+    rows = _rows(persistence, "SELECT shot_number, cell, flags FROM shots ORDER BY shot_number")
+    assert rows == [(number + 1, history.cells[number], history.flags[number]) for number in range(3)]
+    assert _rows(persistence, "SELECT has_ai, game_status FROM games") == [(1, "active")]
+    assert _rows(persistence, "PRAGMA journal_mode") == [("wal",)]
+
+
+def test_finished_game_status_is_persisted(persistence):
+    game_id = GameService.create_new_game()["game_id"]
+    for cell in range(100):
+        GameService.take_shot(game_id, *divmod(cell, 10))
+        if GameService.games[game_id].game_status != "active":
+            break
+    persistence.flush()
+
+    assert _rows(persistence, "SELECT game_status, winner FROM games") == [("completed", "player")]
+    assert _rows(persistence, "SELECT COUNT(*) FROM shots")[0][0] == GameService.games[game_id].history.shot_count
+
+
+def test_failed_batch_is_kept_and_retried_after_backoff(persistence):
+    game_id = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    for cell in range(3):
+        GameService.take_shot(game_id, 0, cell)
+        GameService.ai_take_shot(game_id)
+    persistence._connection.execute("PRAGMA busy_timeout = 0")
+
+    # worker อื่นถือ lock ของไฟล์ไว้: เขียนไม่ได้แต่ไม่มีรายการหาย
+    blocker = sqlite3.connect(persistence.path, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    assert persistence.flush() == 0
+    assert persistence.stats()["queue_depth"] == 7 and persistence.errors == 1
+    assert persistence.flush() == 0 and persistence.errors == 1, "no retry before the backoff ends"
+    assert persistence.stats()["retry_in_ms"] > 0
+    blocker.execute("ROLLBACK")
+    blocker.close()
+
+    assert persistence.flush(force=True) == 7
+    history = GameService.games[game_id].history
+    rows = _rows(persistence, "SELECT shot_number, cell FROM shots ORDER BY shot_number")
+    assert rows == [(number + 1, history.cells[number]) for number in range(6)]
+    assert persistence.stats()["retry_in_ms"] == 0
@@ -0,0 +1,115 @@
+import json
+
+import msgpack
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app import responses
+from app.main import CreateGameResponse, GameChangesResponse, GameStateResponse, HistoryResponse, ShotResponse, app
+from app.models.board import Board
+from app.services.game_service import GameService
+
+
+def test_compact_board_format_matches_grid():
+    board = Board()
+    board.place_ships_randomly()
+    board.take_shot(0, 0)
+    board.take_shot(9, 9)
+
+    assert board.get_board_state(compact=True) == "".join("".join(row) for row in board.get_board_state())
+    assert board.get_ships_position(compact=True) == {
+        name: [row * 10 + col for row, col in positions] for name, positions in board.ships_position.items()
+    }
+
+
+def test_responses_match_their_models_in_both_board_formats():
+    client = TestClient(app)
+    for board_format in ("grid", "compact"):
+        created = client.post(f"/games?board_format={board_format}", json={"with_ai": True, "ai_delay": 0}).json()
+        CreateGameResponse.model_validate(created)
+        game_id = created["game_id"]
+        ShotResponse.model_validate(client.post(f"/games/{game_id}/fire?board_format={board_format}",
+                                                json={"position": "A1"}).json())
+        ShotResponse.model_validate(client.post(f"/games/{game_id}/ai-shot?board_format={board_format}").json())
+        GameStateResponse.model_validate(client.get(f"/games/{game_id}?board_format={board_format}").json())
+        GameChangesResponse.model_validate(client.get(f"/games/{game_id}?since_version=0").json())
+        HistoryResponse.model_validate(client.get(f"/games/{game_id}/history?since_shot=1").json())
+
+    assert isinstance(created["player_board_state"], str) and len(created["player_board_state"]) == 100
+
+
+def test_msgpack_is_negotiated_only_when_available(monkeypatch):
+    client = TestClient(app)
+    game_id = client.post("/games", json={}).json()["game_id"]
+
+    monkeypatch.setattr(responses, "msgpack", None)
+    response = client.get(f"/games/{game_id}", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/json"
+
+    class FakeMsgpack:
+        @staticmethod
+        def packb(content, use_bin_type):
+            return b"packed:" + json.dumps(content).encode()
+
+    monkeypatch.setattr(responses, "msgpack", FakeMsgpack)
+    response = client.get(f"/games/{game_id}", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.content.startswith(b"packed:")
+    as_json = client.get(f"/games/{game_id}", headers={"If-None-Match": response.headers["etag"]})
+    assert as_json.status_code == 200 and as_json.headers["content-type"] == "application/json"
+
+
+def test_etag_is_scoped_to_the_representation():
+    client = TestClient(app)
+    game_id = client.post("/games", json={}).json()["game_id"]
+    etag = client.get(f"/games/{game_id}").headers["etag"]
+
+    assert client.get(f"/games/{game_id}", headers={"If-None-Match": etag}).status_code == 304
+    for query in ("debug_mode=true", "include_history=false", "board_format=compact", "since_version=0"):
+        response = client.get(f"/games/{game_id}?{query}", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+        assert client.get(f"/games/{game_id}?{query}",
+                          headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_ai_stats_predicts_moves_for_an_expert_game_with_queued_targets():
+    client = TestClient(app)
+    game_id = client.post("/games", json={"with_ai": True, "ai_difficulty": "expert", "ai_delay": 0}).json()["game_id"]
+    ai = GameService.games[game_id].ai_opponent
+    for cell in range(100):
+        client.post(f"/games/{game_id}/fire", json={"position": f"{'ABCDEFGHIJ'[cell // 10]}{cell % 10 + 1}"})
+        client.post(f"/games/{game_id}/ai-shot")
+        if ai.target_queue:
+            break
+    assert ai.target_queue, "AI should have hit a ship and queued follow-up targets"
+
+    response = client.get(f"/games/{game_id}/ai-stats")
+    assert response.status_code == 200
+    assert response.json()["current_targets"] == len(ai.target_queue)
+    assert response.json()["predicted_moves"]
+
+
+def test_msgpack_round_trips_with_the_real_encoder():
+    client = TestClient(app)
+    game_id = client.post("/games", json={"with_ai": True, "ai_delay": 0}).json()["game_id"]
+    client.post(f"/games/{game_id}/fire", json={"position": "A1"})
+
+    response = client.get(f"/games/{game_id}", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content, raw=False) == client.get(f"/games/{game_id}").json()
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/msgpack, application/json", True),
+    ("application/json, application/msgpack", False),
+    ("application/json;q=0.5, application/msgpack;q=0.9", True),
+    ("application/msgpack, */*;q=0.1", True),
+    ("application/msgpack;q=0, */*", False),
+    ("application/x-msgpack-extra, application/json", False),
+    ("*/*", False),
+    ("", False),
+])
+def test_accept_header_is_negotiated_by_quality_and_order(accept, expected):
+    assert responses.prefers_msgpack(accept) is expected
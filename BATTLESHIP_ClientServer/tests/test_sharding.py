@@ -0,0 +1,259 @@
+import asyncio
+from copy import deepcopy
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+
+from app.services.game_service import GameService
+from app.sharding import GAME_ID_HEADER, SHARD_AUTH_HEADER, HashRing, ShardRouter, internal_signature
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+KEYS = [f"game{index}" for index in range(4000)]
+SECRET = b"test-shard-secret"
+ADMIN = {"Authorization": "Bearer test-admin-token"}
+FAKE_HOSTS = ("s0", "s1", "s2")
+
+
+def fake_shard(name, requests=None, accept_imports=None):
+    """
+    shard จำลองที่เก็บเกมใน dict ของตัวเอง (แทน app.main ที่รันเป็น process แยก) บันทึก path ที่ได้รับลง requests
+
+    accept_imports: รับเกมที่ย้ายมาได้กี่เกม หลังจากนั้น PUT ได้ 500 (None = ไม่จำกัด)
+    """
+    games = {}
+
+    def require_shard_auth(request: Request):
+        if request.headers.get(SHARD_AUTH_HEADER) != internal_signature(SECRET, request.method, request.url.path):
+            raise HTTPException(status_code=403, detail="Forbidden")
+
+    app = FastAPI()
+    app.state.games = games
+    app.state.accept_imports = accept_imports
+    if requests is not None:
+        @app.middleware("http")
+        async def record_path(request: Request, call_next):
+            requests.append(request.url.path)
+            return await call_next(request)
+
+    @app.post("/games")
+    async def create_game(request: Request):
+        game_id = request.headers[GAME_ID_HEADER]
+        games[game_id] = name.encode()
+        return {"game_id": game_id}
+
+    @app.get("/games/{game_id}")
+    async def get_game(game_id: str):
+        if game_id not in games:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return {"game_id": game_id, "shard": name, "created_on": games[game_id].decode()}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {"game_store": {"active": len(games)}}
+
+    @app.get("/internal/games", dependencies=[Depends(require_shard_auth)])
+    async def list_games():
+        return {"game_ids": list(games)}
+
+    @app.get("/internal/games/{game_id}", dependencies=[Depends(require_shard_auth)])
+    async def export_game(game_id: str):
+        return Response(games[game_id], media_type="application/octet-stream")
+
+    @app.put("/internal/games/{game_id}", dependencies=[Depends(require_shard_auth)])
+    async def import_game(game_id: str, request: Request):
+        if app.state.accept_imports is not None:
+            if app.state.accept_imports <= 0:
+                raise HTTPException(status_code=500, detail="Disk full")
+            app.state.accept_imports -= 1
+        games[game_id] = await request.body()
+        return {"game_id": game_id}
+
+    @app.delete("/internal/games/{game_id}", dependencies=[Depends(require_shard_auth)])
+    async def delete_game(game_id: str):
+        del games[game_id]
+        return {"game_id": game_id}
+
+    return app
+
+
+def test_ring_spreads_keys_and_moves_few_on_change():
+    ring = HashRing(["a", "b", "c", "d"])
+    owners = {key: ring.node_for(key) for key in KEYS}
+    reordered = HashRing(["d", "c", "b", "a"])
+    assert owners == {key: reordered.node_for(key) for key in KEYS}
+    assert all(0.15 < share < 0.35 for share in ring.shares().values())
+    assert sum(ring.shares().values()) == pytest.approx(1.0)
+
+    grown = ring.copy()
+    grown.add("e")
+    moved = [key for key in KEYS if grown.node_for(key) != owners[key]]
+    assert all(grown.node_for(key) == "e" for key in moved)  # เกมย้ายไปเฉพาะ node ใหม่
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+    ring.remove("b")
+    assert all(ring.node_for(key) == owners[key] for key in KEYS if owners[key] != "b")
+
+
+def test_router_keeps_games_on_their_shard_across_rebalances():
+    async def scenario():
+        router = ShardRouter(secret=SECRET, admin_token="test-admin-token", allowed_hosts=FAKE_HOSTS)
+        for name in ("s0", "s1"):
+            await router.add_shard(name, f"http://{name}", transport=httpx.ASGITransport(app=fake_shard(name)))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=router.app), base_url="http://router")
+
+        game_ids = []
+        for _ in range(40):
+            created = await client.post("/games", headers={GAME_ID_HEADER: "chosen-by-client"})
+            game_ids.append(created.json()["game_id"])
+        assert "chosen-by-client" not in game_ids
+        for game_id in game_ids:
+            state = (await client.get(f"/games/{game_id}")).json()
+            assert state["shard"] == state["created_on"] == router.ring.node_for(game_id)
+
+        owners = {game_id: router.ring.node_for(game_id) for game_id in game_ids}
+        moved = await router.add_shard("s2", "http://s2", transport=httpx.ASGITransport(app=fake_shard("s2")))
+        assert moved == sum(router.ring.node_for(game_id) != owners[game_id] for game_id in game_ids) > 0
+        for game_id in game_ids:
+            assert (await client.get(f"/games/{game_id}")).json()["shard"] == router.ring.node_for(game_id)
+
+        stats = (await client.get("/shards")).json()["shards"]
+        assert sum(shard["games"] for shard in stats.values()) == 40
+        assert stats["s2"]["migrated_in"] == moved
+
+        removed = await client.delete("/shards/s0", headers=ADMIN)
+        assert removed.json()["moved_games"] == stats["s0"]["games"]
+        for game_id in game_ids:
+            assert (await client.get(f"/games/{game_id}")).status_code == 200
+        assert (await client.get("/internal/games")).status_code == 404
+        await client.aclose()
+        await router.close()
+
+    asyncio.run(scenario())
+
+
+def test_game_service_creates_exports_and_imports_games_by_id(monkeypatch):
+    monkeypatch.setattr(GameService, "shard_secret", SECRET)
+    created = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS),
+                                          game_id="shard01")
+    assert created["game_id"] == "shard01"
+    assert "error" in GameService.create_new_game(game_id="shard01")
+    GameService.take_shot("shard01", 0, 0)
+
+    data = GameService.export_game("shard01")
+    assert GameService.remove_game("shard01")
+    assert GameService.export_game("shard01") is None
+    for forged in (data[:32] + data[32:].replace(b"shard01", b"shard02"), data[32:], b"x" * 32 + data[32:]):
+        with pytest.raises(ValueError):
+            GameService.import_game("shard01", forged)
+    with pytest.raises(ValueError):
+        GameService.import_game("shard02", data)  # ลายเซ็นผูกกับ game_id
+    assert GameService.export_game("shard01") is None
+
+    GameService.import_game("shard01", data)
+    assert GameService.get_game_version("shard01") == 1
+
+
+def test_router_refuses_paths_that_resolve_elsewhere_on_the_shard():
+    async def scenario():
+        requests = []
+        router = ShardRouter(secret=SECRET, allowed_hosts=FAKE_HOSTS)
+        await router.add_shard("s0", "http://s0", transport=httpx.ASGITransport(app=fake_shard("s0", requests)))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=router.app), base_url="http://router")
+        requests.clear()
+
+        for path in ("/games/x/%2e%2e/%2E%2E/internal/games/abc", "/games/x%2f..%2f..%2finternal/games",
+                     "/games/x%5C..", "/games/x/%2e/fire", "/games//x"):
+            response = await client.put(path, content=b"payload")
+            assert response.status_code == 400, path
+        # httpx ฝั่ง client ตัด ../ ออกเอง จึงส่ง scope ที่มี .. ตรง ๆ เหมือน client ที่ส่ง byte ดิบ
+        scope = {"type": "http", "method": "PUT", "path": "/games/x/../../internal/games/abc",
+                 "raw_path": b"/games/x/../../internal/games/abc", "query_string": b"", "headers": []}
+        with pytest.raises(HTTPException) as refused:
+            await router.forward(Request(scope))
+        assert refused.value.status_code == 400
+        assert (await client.get("/internal/games")).status_code == 404
+        assert (await client.get("/Internal/games")).status_code == 404  # ส่งต่อได้ แต่ shard ไม่มี path นี้
+        assert requests == ["/Internal/games"]
+
+        created = (await client.post("/games")).json()["game_id"]
+        assert (await client.get(f"/games/{created}")).status_code == 200
+        unsigned = await router.clients["s0"].get("/internal/games")
+        assert unsigned.status_code == 403
+        await client.aclose()
+        await router.close()
+
+    asyncio.run(scenario())
+
+
+def test_shard_admin_needs_the_token_and_an_allowed_url():
+    async def scenario():
+        router = ShardRouter({"s0": "http://127.0.0.1:8100"}, secret=SECRET, admin_token="test-admin-token")
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=router.app), base_url="http://router")
+        shard = {"name": "evil", "url": "http://127.0.0.1:8101"}
+        assert (await client.post("/shards", json=shard)).status_code == 401
+        assert (await client.post("/shards", json=shard, headers={"Authorization": "Bearer nope"})).status_code == 401
+        assert (await client.delete("/shards/s0")).status_code == 401
+        for url in ("http://attacker.example:8100", "file:///etc/passwd", "http://user@127.0.0.1:8100",
+                    "http://127.0.0.1:8100/internal", "http://127.0.0.1:port"):
+            response = await client.post("/shards", json={"name": "evil", "url": url}, headers=ADMIN)
+            assert response.status_code == 400, url
+        assert router.ring.nodes == ["s0"]
+        with pytest.raises(ValueError):
+            ShardRouter({"s0": "http://10.0.0.5:8100"}, secret=SECRET)
+        await client.aclose()
+        await router.close()
+
+        disabled = ShardRouter(secret=SECRET)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=disabled.app), base_url="http://router")
+        assert (await client.post("/shards", json=shard, headers=ADMIN)).status_code == 403
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_rebalance_moves_games_back():
+    async def scenario():
+        shards = {name: fake_shard(name) for name in ("s0", "s1")}
+        router = ShardRouter(secret=SECRET, admin_token="test-admin-token", allowed_hosts=FAKE_HOSTS)
+        for name, shard in shards.items():
+            await router.add_shard(name, f"http://{name}", transport=httpx.ASGITransport(app=shard))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=router.app), base_url="http://router")
+        for _ in range(40):
+            await client.post("/games")
+        placement = {name: dict(shard.state.games) for name, shard in shards.items()}
+
+        # WebSocket ที่ต่ออยู่กับเกมแรกที่จะย้ายต้องถูกปิด (และ relay หยุดแล้ว) ก่อนย้าย
+        grown = router.ring.copy()
+        grown.add("s2")
+        first_moved = next(game_id for game_id in placement["s0"] if grown.node_for(game_id) == "s2")
+        stop, stopped = asyncio.Event(), asyncio.Event()
+        router._sockets[first_moved] = {(stop, stopped)}
+
+        async def relay():
+            await stop.wait()
+            stopped.set()
+        relay_task = asyncio.ensure_future(relay())
+
+        broken = fake_shard("s2", accept_imports=2)
+        with pytest.raises(httpx.HTTPStatusError):
+            await router.add_shard("s2", "http://s2", transport=httpx.ASGITransport(app=broken))
+        await asyncio.wait_for(relay_task, timeout=1)
+        assert "s2" not in router.load and router.ring.nodes == ["s0", "s1"]
+        assert broken.state.games == {}
+        assert {name: shard.state.games for name, shard in shards.items()} == placement
+
+        # ลบ shard ไม่สำเร็จ: เกมกลับไปที่ s0 และ s0 ยังอยู่บน ring
+        shards["s1"].state.accept_imports = 1
+        failed = await client.delete("/shards/s0", headers=ADMIN)
+        assert failed.status_code == 502
+        assert router.ring.nodes == ["s0", "s1"]
+        assert {name: shard.state.games for name, shard in shards.items()} == placement
+
+        # เพิ่ม shard ชื่อเดิมซ้ำได้หลังล้มเหลว
+        moved = await router.add_shard("s2", "http://s2", transport=httpx.ASGITransport(app=fake_shard("s2")))
+        assert moved > 0 and router.ring.nodes == ["s0", "s1", "s2"]
+        await client.aclose()
+        await router.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,14 @@
+from app.simulate import run_simulation
+
+
+def test_run_simulation_reports_each_difficulty_and_is_reproducible():
+    report = run_simulation(games=6, difficulties=["easy", "expert"], seed=3, chunk_size=4)
+
+    assert [row["difficulty"] for row in report] == ["easy", "expert"]
+    for row in report:
+        assert row["games"] == 6
+        assert 17 <= row["shots_median"] <= row["shots_p95"] <= 100
+        assert row["moves"] >= 6 * 17
+
+    again = run_simulation(games=6, difficulties=["easy", "expert"], seed=3, chunk_size=4)
+    assert [row["shots_mean"] for row in again] == [row["shots_mean"] for row in report]
@@ -0,0 +1,118 @@
+import asyncio
+import os
+from copy import deepcopy
+
+import pytest
+
+from app.services.game_service import GameService
+from app.services.snapshot import GameSnapshots
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    snapshots = GameSnapshots(str(tmp_path / "snapshots"))
+    monkeypatch.setattr(GameService, "journal", snapshots)
+    return snapshots
+
+
+def _play(game_id, turns, first_cell=0):
+    """ผู้เล่นยิงไล่ทีละช่อง สลับกับ AI"""
+    for cell in range(first_cell, first_cell + turns):
+        GameService.take_shot(game_id, cell // 10, cell % 10)
+        if GameService.games[game_id].has_ai:
+            GameService.ai_take_shot(game_id)
+
+
+def _state(game_id):
+    state = GameService.get_game_state(game_id)
+    state.pop("history")
+    history = GameService.get_game_history(game_id)
+    return state, history["shots"], GameService.games[game_id].history.get_statistics()["total_shots"]
+
+
+def _restart(journal):
+    """จำลอง restart: ล้างหน่วยความจำแล้ว restore จากดิสก์ด้วย GameSnapshots ตัวใหม่"""
+    GameService.games.clear()
+    restored = GameSnapshots(journal.directory)
+    stats = restored.restore(GameService)
+    return restored, stats
+
+
+def test_journal_alone_restores_games(journal):
+    ai_game = GameService.create_new_game(with_ai=True, ai_difficulty="expert",
+                                          custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    solo_game = GameService.create_new_game(custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS))["game_id"]
+    _play(ai_game, 6)
+    _play(solo_game, 4)
+    expected = {game_id: _state(game_id) for game_id in (ai_game, solo_game)}
+    ai_shot_mask = GameService.games[ai_game].ai_opponent.shot_mask
+
+    assert journal.flush() == 2 + 12 + 4
+    _, stats = _restart(journal)
+
+    assert (stats["restored_games"], stats["replayed_entries"]) == (0, 18)
+    assert {game_id: _state(game_id) for game_id in expected} == expected
+    # AI ได้ผลการยิงทุกนัดซ้ำ จึงรู้ว่ายิงช่องไหนไปแล้ว
+    assert GameService.games[ai_game].ai_opponent.shot_mask == ai_shot_mask
+
+
+def test_snapshot_then_journal_tail(journal):
+    game_id = GameService.create_new_game(with_ai=True, ai_difficulty="hard",
+                                          custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    _play(game_id, 3)
+    size = asyncio.run(journal.snapshot(GameService.games))
+    assert size == os.path.getsize(journal.snapshot_path)
+    # journal ก่อน snapshot ถูกลบ (compaction)
+    assert [os.path.basename(path) for path in journal._journal_files()] == ["journal.1"]
+
+    _play(game_id, 2, first_cell=3)
+    GameService.take_shot(game_id, 9, 9)
+    expected = _state(game_id)
+    journal.flush()
+
+    restored, stats = _restart(journal)
+    assert stats["restored_games"] == 1
+    assert stats["replayed_entries"] == 5
+    assert _state(game_id) == expected
+    assert GameService.get_game_version(game_id) == expected[2]
+    assert restored.generation == 2
+
+
+def test_finished_game_survives_restart(journal):
+    game_id = GameService.create_new_game(custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS))["game_id"]
+    _play(game_id, 100)
+    assert GameService.get_game_state(game_id)["game_status"] == "completed"
+    statistics = GameService.get_game_statistics(game_id)
+    journal.flush()
+
+    _restart(journal)
+    assert GameService.get_game_statistics(game_id) == statistics
+
+
+def test_torn_journal_tail_is_ignored(journal):
+    game_id = GameService.create_new_game(custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS))["game_id"]
+    _play(game_id, 3)
+    journal.flush()
+    with open(journal.journal_path(journal.generation), "ab") as torn:
+        torn.write(b"\x80\x05\x95\x10")  # process ตายระหว่างเขียนรายการถัดไป
+
+    _, stats = _restart(journal)
+    assert stats["replayed_entries"] == 4
+    assert GameService.get_game_version(game_id) == 3
+
+
+def test_pending_ai_delay_survives_a_restart_on_a_fresh_host(journal):
+    uptime = [5000.0]
+    GameService.set_clock(lambda: uptime[0])
+    game_id = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS),
+                                          ai_delay=3)["game_id"]
+    GameService.take_shot(game_id, 0, 0)
+    uptime[0] += 1
+    asyncio.run(journal.snapshot(GameService.games))
+
+    uptime[0] = 20.0  # เครื่องใหม่/reboot: monotonic clock เริ่มนับใหม่
+    _restart(journal)
+    assert 0 < GameService.get_ai_wait(game_id) <= 2
+    uptime[0] += 2
+    assert GameService.get_ai_wait(game_id) == 0
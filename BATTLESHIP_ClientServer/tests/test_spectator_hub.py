@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+from copy import deepcopy
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.game_service import GameService
+from app.services.spectator_hub import SpectatorHub
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+
+def test_publish_serializes_once_and_shares_the_payload():
+    async def scenario():
+        hub = SpectatorHub(max_queue=4)
+        first = hub.subscribe("game")
+        second = hub.subscribe("game")
+        other = hub.subscribe("other")
+
+        assert hub.publish("game", {"type": "shot", "position": "A1"}) == 2
+        payload = await first.get()
+        assert payload == '{"type":"shot","position":"A1"}'
+        assert await second.get() is payload
+        assert other.queue.empty()
+        return hub.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["published"], stats["delivered"], stats["subscribers"]) == (1, 2, 3)
+
+
+def test_fanout_latency_counts_the_wait_for_the_spectators_loop():
+    async def scenario():
+        hub = SpectatorHub()
+        subscription = hub.subscribe("game")
+        publisher = threading.Thread(target=hub.publish, args=("game", {"type": "ai_shot"}))
+        publisher.start()
+        publisher.join()
+        time.sleep(0.05)  # event loop ไม่ว่าง: ข้อความยังไม่ถึงผู้ชม
+        assert hub.stats()["delivered"] == 0
+        await subscription.get()
+        return hub.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["delivered"] == 1 and stats["fanout_us_max"] >= 50_000
+
+
+def test_slow_spectator_is_dropped_without_blocking_the_others():
+    async def scenario():
+        hub = SpectatorHub(max_queue=2)
+        slow = hub.subscribe("game")
+        fast = hub.subscribe("game")
+        for number in range(3):
+            hub.publish("game", {"shot": number})
+            await fast.get()
+
+        assert slow.dropped and await slow.get() is None
+        assert not fast.dropped
+        return hub.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["dropped"], stats["subscribers"], stats["max_queue_depth"]) == (1, 1, 2)
+
+
+def test_spectator_sees_shots_without_ship_positions():
+    game_id = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    client = TestClient(app)
+    with client.websocket_connect(f"/games/{game_id}/spectate") as spectator:
+        state = spectator.receive_json()
+        assert state["type"] == "state"
+        assert state["player_ships_positions"] is None and state["ai_ships_positions"] is None
+
+        client.post(f"/games/{game_id}/fire", json={"position": "C3"})
+        client.post(f"/games/{game_id}/ai-shot")
+        shot = spectator.receive_json()
+        ai_shot = spectator.receive_json()
+
+    assert (shot["type"], shot["position"], shot["version"]) == ("shot", "C3", 1)
+    assert (ai_shot["type"], ai_shot["version"]) == ("ai_shot", 2)
+    assert "board_state" not in shot
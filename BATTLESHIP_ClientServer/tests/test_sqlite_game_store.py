@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import pickle
+import sqlite3
+import threading
+from copy import deepcopy
+
+import pytest
+
+from app.models.game_archive import ArchivedGame
+from app.services.game_service import GameService
+from app.services.sqlite_game_store import SQLiteGameStore
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "live_games.db")
+
+
+@pytest.fixture
+def shared_games(store_path, monkeypatch):
+    store = SQLiteGameStore(store_path, ttl=1800, max_games=100, version_of=GameService._version)
+    monkeypatch.setattr(GameService, "games", store)
+    return store
+
+
+def _increment(path, game_id, times):
+    store = SQLiteGameStore(path)
+    for _ in range(times):
+        with store.edit(game_id) as counter:
+            counter["n"] += 1
+
+
+def test_games_are_shared_between_store_instances(store_path):
+    first, second = SQLiteGameStore(store_path), SQLiteGameStore(store_path)
+    first["a"] = {"n": 1}
+
+    with second.edit("a") as game:
+        game["n"] += 1
+    with second.edit("missing") as game:
+        assert game is None
+
+    assert first["a"] == {"n": 2}
+    assert "a" in second and "missing" not in first
+    assert len(first) == 1
+
+
+def test_failed_edit_is_rolled_back(store_path):
+    store = SQLiteGameStore(store_path)
+    store["a"] = {"n": 1}
+    with pytest.raises(RuntimeError):
+        with store.edit("a") as game:
+            game["n"] = 99
+            raise RuntimeError("boom")
+    assert store["a"] == {"n": 1}
+
+
+def test_edits_from_several_processes_do_not_lose_updates(store_path):
+    SQLiteGameStore(store_path)["counter"] = {"n": 0}
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_increment, args=(store_path, "counter", 50)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert SQLiteGameStore(store_path)["counter"] == {"n": 150}
+
+
+def test_expiry_and_lru_cap(store_path):
+    clock = FakeClock()
+    store = SQLiteGameStore(store_path, ttl=60, max_games=2, clock=clock)
+    store["old"] = 1
+    clock.now += 1
+    store["mid"] = 2
+    clock.now += 1
+    store["new"] = 3  # เกินจำนวน: ไล่ "old" ออก
+    assert sorted(store) == ["mid", "new"]
+
+    clock.now += 59
+    assert "mid" not in store
+    assert store.sweep() == 1
+    assert store.stats()["evicted"] == 1
+    assert store.stats()["active"] == 1
+
+
+def test_game_service_plays_through_the_shared_store(shared_games, store_path):
+    game_id = GameService.create_new_game(with_ai=True, ai_difficulty="expert",
+                                          custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    other_worker = SQLiteGameStore(store_path)
+
+    assert GameService.take_shot(game_id, 0, 0)["version"] == 1
+    assert GameService.ai_take_shot(game_id)["version"] == 2
+    assert other_worker[game_id].history.shot_count == 2
+    assert GameService.get_game_state(game_id)["version"] == 2
+
+    # ผู้เล่นยิงครบทุกช่อง: เกมจบแล้วถูก archive แทนที่ระหว่าง edit (ไม่ถูกเขียนทับด้วยเกมเดิม)
+    for cell in range(1, 100):
+        if GameService.take_shot(game_id, cell // 10, cell % 10)["game_status"] != "active":
+            break
+        GameService.ai_take_shot(game_id)
+    assert isinstance(other_worker[game_id], ArchivedGame)
+    assert GameService.get_game_statistics(game_id)["winner"] is not None
+
+
+def test_version_is_read_without_unpickling_the_game(shared_games, store_path, monkeypatch):
+    game_id = GameService.create_new_game(with_ai=True, ai_delay=0)["game_id"]
+    GameService.take_shot(game_id, 0, 0)
+
+    def no_unpickling(data):
+        raise AssertionError("version should come from its own column")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pickle, "loads", no_unpickling)
+        assert GameService.get_game_version(game_id) == 1
+        assert GameService.get_game_version("missing") is None
+
+    # ไฟล์เก่าที่ยังไม่มีคอลัมน์ version: เพิ่มคอลัมน์ให้ แถวเดิมโหลดเกมมาดูแทน
+    old_path = store_path + ".old"
+    with sqlite3.connect(old_path) as connection:
+        connection.execute("CREATE TABLE live_games (game_id TEXT PRIMARY KEY, data BLOB NOT NULL, "
+                           "touched_at REAL NOT NULL, expires_at REAL)")
+        connection.execute("INSERT INTO live_games VALUES (?, ?, 0, NULL)",
+                           (game_id, pickle.dumps(shared_games[game_id])))
+    assert SQLiteGameStore(old_path, version_of=GameService._version).version(game_id) == 1
+
+
+def test_store_calls_from_handlers_run_off_the_event_loop(shared_games, monkeypatch):
+    threads = []
+    connection = shared_games._connection
+
+    def recording_connection():
+        threads.append(threading.get_ident())
+        return connection()
+
+    monkeypatch.setattr(shared_games, "_connection", recording_connection)
+
+    async def scenario():
+        created = await GameService.create_new_game_async(with_ai=True, ai_delay=0)
+        await GameService.get_game_version_async(created["game_id"])
+        await GameService.get_ai_wait_async(created["game_id"])
+        assert (await GameService.get_game_statistics_async(created["game_id"]))["total_shots"] == 0
+        assert (await GameService.get_game_state_with_debug_async(created["game_id"]))["game_id"] == created["game_id"]
+        assert (await GameService.get_memory_stats_async())["sampled_games"] == 1
+        assert (await GameService.get_store_stats_async())["active"] == 1
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
@@ -0,0 +1,55 @@
+from copy import deepcopy
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.game_service import GameService
+from tests.test_game_service import DEFAULT_CUSTOM_SHIPS
+
+
+def _ai_game():
+    game_id = GameService.create_new_game(with_ai=True, custom_ships=deepcopy(DEFAULT_CUSTOM_SHIPS), ai_delay=0)["game_id"]
+    GameService.games[game_id].ai_board.place_ships_custom(deepcopy(DEFAULT_CUSTOM_SHIPS))
+    return game_id
+
+
+def test_fire_pushes_player_and_ai_shot_events():
+    game_id = _ai_game()
+    with TestClient(app).websocket_connect(f"/games/{game_id}/ws") as websocket:
+        state = websocket.receive_json()
+        assert (state["type"], state["version"], state["ai_ships_positions"]) == ("state", 0, None)
+        assert "history" not in state
+
+        websocket.send_json({"type": "fire", "position": "A1"})
+        shot = websocket.receive_json()
+        ai_shot = websocket.receive_json()
+
+    assert (shot["type"], shot["status"], shot["position"], shot["version"]) == ("shot", "hit", "A1", 1)
+    assert (ai_shot["type"], ai_shot["current_turn"], ai_shot["version"]) == ("ai_shot", "player", 2)
+    assert "board_state" not in shot and "board_state" not in ai_shot
+    assert GameService.get_game_version(game_id) == 2
+
+
+def test_errors_and_sync_are_reported_as_events():
+    game_id = _ai_game()
+    with TestClient(app).websocket_connect(f"/games/{game_id}/ws") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "fire", "position": "Z99"})
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_text("not json")
+        assert websocket.receive_json()["type"] == "error"
+
+        websocket.send_json({"type": "fire", "position": "B2"})
+        websocket.receive_json()
+        websocket.receive_json()
+        websocket.send_json({"type": "sync", "since_version": 1})
+        changes = websocket.receive_json()
+
+    assert changes["type"] == "changes"
+    assert [change["board"] for change in changes["changes"]] == ["player"]
+
+
+def test_unknown_game_closes_the_socket():
+    with TestClient(app).websocket_connect("/games/missing/ws") as websocket:
+        message = websocket.receive()
+    assert message == {"type": "websocket.close", "code": 4404, "reason": "Game not found"}